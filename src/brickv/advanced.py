@@ -50,7 +50,7 @@ class AdvancedWindow(QDialog, Ui_Advanced):
         self.combo_brick.currentIndexChanged.connect(self.brick_changed)
         self.check_enable_calibration.stateChanged.connect(self.enable_calibration_changed)
 
-        inventory.info_changed.connect(self.update_bricks)
+        inventory.infos_changed.connect(self.update_bricks)
 
         self.button_close.clicked.connect(self.hide)
 
@@ -24,49 +24,214 @@ Boston, MA 02111-1307, USA.
 """
 
 import sys
-from threading import Lock
-from collections import namedtuple
+import time
+from threading import Lock, Condition, Thread
+from collections import namedtuple, deque
 import logging
 import functools
 from queue import Queue
 
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QThread, QEvent, QTimer
+from PyQt5.QtCore import QObject, QEvent, QTimer
 
 ASYNC_EVENT = 12345
+ASYNC_WORKER_COUNT = 4
+ASYNC_EVENT_TIME_BUDGET = 0.025 # seconds, per async_event_handler call
 
-async_call_queue = Queue()
 async_event_queue = Queue()
+async_event_lock = Lock()
+async_event_posted = False # protected by async_event_lock
+async_event_target = None # set by async_start_thread
+async_event_stats = {'handled': 0, 'wakeups': 0, 'backlog_peak': 0}
 async_session_lock = Lock()
 async_session_id = 1
 
-AsyncCall = namedtuple('AsyncCall', 'function arguments result_callback error_callback pass_arguments_to_result_callback pass_arguments_to_error_callback pass_exception_to_error_callback expand_arguments_tuple_for_callback expand_result_tuple_for_callback debug_exception retry_on_exception session_id')
+AsyncCall = namedtuple('AsyncCall', 'function arguments result_callback error_callback pass_arguments_to_result_callback pass_arguments_to_error_callback pass_exception_to_error_callback expand_arguments_tuple_for_callback expand_result_tuple_for_callback debug_exception retry_on_exception session_id lane coalesce_key')
+
+class AsyncCallLanes:
+    """
+    Pending async calls, grouped into lanes. Calls of the same lane are
+    executed one after another in order, calls of different lanes can be
+    executed concurrently. Lanes with pending calls are served round-robin,
+    so a lane with many or slow calls doesn't block the other lanes.
+
+    A call with a coalescing key replaces a pending call of the same lane with
+    the same key. The replaced call is dropped without calling its callbacks.
+    """
+
+    def __init__(self):
+        self.condition = Condition()
+        self.lanes = {} # by lane key, deque of AsyncCall
+        self.ready_lanes = deque() # lanes with pending calls that are not busy
+        self.busy_lanes = set() # lanes with a call being executed
+        self.coalesced_count = 0 # number of calls replaced by a newer call
+        self.stopped = False
+
+    def put(self, ac):
+        with self.condition:
+            if ac.lane not in self.lanes:
+                self.lanes[ac.lane] = deque()
+
+            lane = self.lanes[ac.lane]
+            was_empty = len(lane) == 0
+
+            if ac.coalesce_key != None:
+                for pending in lane:
+                    if pending.coalesce_key == ac.coalesce_key:
+                        lane.remove(pending)
+                        self.coalesced_count += 1
+                        break
+
+            lane.append(ac)
+
+            if ac.lane not in self.busy_lanes and was_empty:
+                self.ready_lanes.append(ac.lane)
+                self.condition.notify()
+
+    # returns the next call to execute and marks its lane as busy until done
+    # is called for it, returns None if stopped
+    def get(self):
+        with self.condition:
+            while not self.stopped and len(self.ready_lanes) == 0:
+                self.condition.wait()
+
+            if self.stopped:
+                return None
+
+            lane = self.ready_lanes.popleft()
+
+            self.busy_lanes.add(lane)
+
+            return self.lanes[lane].popleft()
+
+    def done(self, ac):
+        with self.condition:
+            self.busy_lanes.discard(ac.lane)
+
+            if len(self.lanes[ac.lane]) > 0:
+                self.ready_lanes.append(ac.lane)
+                self.condition.notify()
+            else:
+                del self.lanes[ac.lane]
+
+    def clear(self):
+        with self.condition:
+            for lane in list(self.lanes.keys()):
+                self.lanes[lane].clear()
+
+                if lane not in self.busy_lanes:
+                    del self.lanes[lane]
+
+            self.ready_lanes.clear()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def get_stats(self):
+        with self.condition:
+            return {'pending': sum(len(lane) for lane in self.lanes.values()),
+                    'coalesced': self.coalesced_count}
+
+async_call_lanes = AsyncCallLanes()
 
 def async_stop_thread():
-    async_call_queue.put(None)
+    async_call_lanes.stop()
+
+# returns the lane of the object the function is bound to, or None. objects
+# can provide an async_lane attribute (e.g. plugins and RED Brick API objects),
+# otherwise the UID of a Device is used
+def get_async_lane(function):
+    while isinstance(function, functools.partial):
+        function = function.func
+
+    bound_object = getattr(function, '__self__', None)
+
+    if bound_object == None:
+        return None
+
+    lane = getattr(bound_object, 'async_lane', None)
+
+    if lane != None:
+        return lane
+
+    return getattr(bound_object, 'uid_string', None)
 
 def async_call(function, arguments, result_callback, error_callback,
                pass_arguments_to_result_callback=False, pass_arguments_to_error_callback=False, pass_exception_to_error_callback=False,
                expand_arguments_tuple_for_callback=False, expand_result_tuple_for_callback=False,
-               debug_exception=False, retry_on_exception=False, delay=None):
+               debug_exception=False, retry_on_exception=False, delay=None, lane=None, coalesce_key=None):
     if pass_arguments_to_result_callback or pass_arguments_to_error_callback:
         assert arguments != None
 
     with async_session_lock:
         session_id = async_session_id
 
+    # calls of the same device are serialized, calls of different devices
+    # don't block each other. calls without a device share one lane, unless
+    # a lane is passed. pass a device UID to order a closure with the calls
+    # of that device, or an object unique to the call (e.g. the closure) if
+    # the call doesn't have to be ordered with anything
+    if lane == None:
+        lane = get_async_lane(function)
+
+    # for setters driven by sliders and similar controls only the latest
+    # value matters. pass the setter (or the setter and e.g. a channel) as
+    # coalescing key to replace a still pending call with the newest arguments
     ac = AsyncCall(function, arguments, result_callback, error_callback,
                    pass_arguments_to_result_callback, pass_arguments_to_error_callback, pass_exception_to_error_callback,
                    expand_arguments_tuple_for_callback, expand_result_tuple_for_callback,
-                   debug_exception, retry_on_exception, session_id)
+                   debug_exception, retry_on_exception, session_id, lane, coalesce_key)
 
     if delay != None:
-        QTimer.singleShot(int(delay * 1000), functools.partial(async_call_queue.put, ac))
+        QTimer.singleShot(int(delay * 1000), functools.partial(async_call_lanes.put, ac))
     else:
-        async_call_queue.put(ac)
+        async_call_lanes.put(ac)
+
+# posts a wake-up event to the GUI thread, unless one is already pending
+def async_post_event():
+    global async_event_posted
+
+    with async_event_lock:
+        if async_event_posted:
+            return
+
+        async_event_posted = True
 
+    QApplication.postEvent(async_event_target, QEvent(ASYNC_EVENT))
+
+def async_put_event(ac, success, result):
+    async_event_queue.put((ac, success, result))
+    async_post_event()
+
+# returns the number of handled results, wake-up events, the current and peak
+# result backlog, and the number of pending and coalesced calls
+def async_get_stats():
+    return dict(async_event_stats, backlog=async_event_queue.qsize(), **async_call_lanes.get_stats())
+
+# handles all results that are ready, but for at most the time budget. if
+# results are left, then another wake-up event is posted, so other events
+# are processed in between
 def async_event_handler():
+    global async_event_posted
+
+    # reset before draining, results added after this point post a new event
+    with async_event_lock:
+        async_event_posted = False
+
+    async_event_stats['wakeups'] += 1
+    async_event_stats['backlog_peak'] = max(async_event_stats['backlog_peak'], async_event_queue.qsize())
+
+    deadline = time.monotonic() + ASYNC_EVENT_TIME_BUDGET
+
     while not async_event_queue.empty():
+        if time.monotonic() > deadline:
+            async_post_event()
+            break
+
+        async_event_stats['handled'] += 1
+
         try:
             event = async_event_queue.get(False)
 
@@ -120,71 +285,94 @@ def async_next_session():
     with async_session_lock:
         async_session_id += 1
 
-        with async_call_queue.mutex:
-            async_call_queue.queue.clear()
+        async_call_lanes.clear()
 
-class AsyncThread(QThread):
-    def run(self):
-        while True:
-            ac = async_call_queue.get()
+class AsyncExecutor(QObject):
+    """
+    Executes the async calls with a fixed number of worker threads. Wake-up
+    events for the results are posted to this object, that lives in the GUI
+    thread.
+    """
 
-            if ac == None:
-                break
+    def __init__(self, parent):
+        super().__init__(parent)
 
-            if ac.function == None:
-                continue
+        self.threads = []
 
-            with async_session_lock:
-                if ac.session_id != async_session_id:
-                    continue
+    def start(self):
+        for _ in range(ASYNC_WORKER_COUNT):
+            thread = Thread(target=self.loop, daemon=True)
+            thread.start()
 
-            result = None
+            self.threads.append(thread)
+
+    def loop(self):
+        while True:
+            ac = async_call_lanes.get()
+
+            if ac == None:
+                break
 
             try:
-                retry_on_exception = ac.retry_on_exception
+                self.execute(ac)
+            finally:
+                async_call_lanes.done(ac)
 
-                for _ in range(2):
-                    try:
-                        if ac.arguments == None:
-                            result = ac.function()
-                        elif isinstance(ac.arguments, tuple):
-                            result = ac.function(*ac.arguments)
-                        else:
-                            result = ac.function(ac.arguments)
-                    except:
-                        if not retry_on_exception:
-                            raise
+    def execute(self, ac):
+        if ac.function == None:
+            return
 
-                        retry_on_exception = False
-                        continue
+        with async_session_lock:
+            if ac.session_id != async_session_id:
+                return
 
-                    break
-            except Exception as e:
-                with async_session_lock:
-                    if ac.session_id != async_session_id:
-                        continue
+        result = None
 
-                if ac.debug_exception:
-                    logging.exception('Error while doing async call')
+        try:
+            retry_on_exception = ac.retry_on_exception
+
+            for _ in range(2):
+                try:
+                    if ac.arguments == None:
+                        result = ac.function()
+                    elif isinstance(ac.arguments, tuple):
+                        result = ac.function(*ac.arguments)
+                    else:
+                        result = ac.function(ac.arguments)
+                except:
+                    if not retry_on_exception:
+                        raise
+
+                    retry_on_exception = False
+                    continue
 
-                if ac.error_callback != None:
-                    async_event_queue.put((ac, False, e))
+                break
+        except Exception as e:
+            with async_session_lock:
+                if ac.session_id != async_session_id:
+                    return
 
-                    QApplication.postEvent(self, QEvent(ASYNC_EVENT))
+            if ac.debug_exception:
+                logging.exception('Error while doing async call')
 
-                continue
+            if ac.error_callback != None:
+                async_put_event(ac, False, e)
 
-            if ac.result_callback != None:
-                with async_session_lock:
-                    if ac.session_id != async_session_id:
-                        continue
+            return
 
-                async_event_queue.put((ac, True, result))
+        if ac.result_callback != None:
+            with async_session_lock:
+                if ac.session_id != async_session_id:
+                    return
 
-                QApplication.postEvent(self, QEvent(ASYNC_EVENT))
+            async_put_event(ac, True, result)
 
 def async_start_thread(parent):
-    async_thread = AsyncThread(parent)
-    async_thread.start()
+    global async_event_target
+
+    async_executor = AsyncExecutor(parent)
+    async_event_target = async_executor
+
+    async_executor.start()
 
-    return async_thread
+    return async_executor
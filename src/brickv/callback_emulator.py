@@ -3,7 +3,7 @@
 brickv (Brick Viewer)
 Copyright (C) 2015, 2017, 2019 Matthias Bolte <matthias@tinkerforge.com>
 
-callback_emulator.py: Emulate callback using getters and threads
+callback_emulator.py: Emulate callback using getters and a shared scheduler
 
 This program is free software; you can redistribute it and/or
 modify it under the terms of the GNU General Public License
@@ -21,13 +21,216 @@ Free Software Foundation, Inc., 59 Temple Place - Suite 330,
 Boston, MA 02111-1307, USA.
 """
 
+import sys
 import threading
 import logging
 import time
 import queue
+import heapq
+import itertools
+import inspect
+import functools
+from collections import namedtuple
 
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from brickv.async_call import async_call
+
+WORKERS_PER_CONNECTION = 4
+
+NativeCallback = namedtuple('NativeCallback', 'device callback_id configure configure_arguments result_type')
+
+callback_scheduler = None
+
+def get_callback_scheduler():
+    global callback_scheduler
+
+    if callback_scheduler == None:
+        callback_scheduler = CallbackScheduler()
+
+    return callback_scheduler
+
+class CallbackDispatcher(QObject):
+    """
+    Delivers the results of all emulated callbacks in the GUI thread. Results
+    are collected in a list and only the first result of a burst emits the
+    signal, so many results arriving at the same time are handled by a single
+    queued signal instead of one per result.
+    """
+
+    qtcb_pending = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.pending_lock = threading.Lock()
+        self.pending = [] # (emulator, enable_ref, success, result_or_exception)
+
+        self.qtcb_pending.connect(self.cb_pending)
+
+    def post(self, emulator, enable_ref, success, value):
+        with self.pending_lock:
+            self.pending.append((emulator, enable_ref, success, value))
+            first = len(self.pending) == 1
+
+        if first:
+            self.qtcb_pending.emit()
+
+    def cb_pending(self):
+        with self.pending_lock:
+            pending = self.pending
+            self.pending = []
+
+        for emulator, enable_ref, success, value in pending:
+            if not enable_ref[0]:
+                continue
+
+            try:
+                emulator.objectName() # raises RuntimeError if the emulator was deleted
+            except RuntimeError:
+                emulator.set_period(0)
+                continue
+
+            try:
+                if success:
+                    emulator.cb_result(value)
+                else:
+                    emulator.cb_error(value)
+            except:
+                sys.excepthook(*sys.exc_info())
+
+class CallbackWorkerPool:
+    """
+    Fixed number of worker threads calling the getters of one IP connection
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.job_queue = queue.Queue()
+        self.threads = []
+
+    def submit(self, job):
+        if len(self.threads) < self.size:
+            thread = threading.Thread(target=self.loop, daemon=True)
+            thread.start()
+
+            self.threads.append(thread)
+
+        self.job_queue.put(job)
+
+    def stop(self):
+        for _ in self.threads:
+            self.job_queue.put(None)
+
+        self.threads = []
+
+    def loop(self):
+        while True:
+            job = self.job_queue.get()
+
+            if job == None:
+                break
+
+            # keep the worker alive, otherwise the pool would shrink with every failed poll
+            try:
+                job()
+            except:
+                sys.excepthook(*sys.exc_info())
+
+class CallbackScheduler:
+    """
+    Polls the getters of all enabled CallbackEmulators from a single thread
+    using a heap of deadlines. The getters are called by a small worker pool
+    per IP connection, so the number of threads depends on the number of
+    connections instead of the number of emulated callbacks. If a getter is
+    still running when its next deadline is reached then this poll is skipped
+    and the getter reports an overrun once it returns.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.heap = [] # (deadline, sequence, emulator, period_generation)
+        self.sequence = itertools.count()
+        self.pools = {} # by IP connection
+        self.pool_users = {} # by IP connection
+        self.emulators = set()
+        self.dispatcher = CallbackDispatcher()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def add(self, emulator):
+        with self.condition:
+            if emulator not in self.emulators:
+                self.emulators.add(emulator)
+
+                connection = emulator.connection
+                self.pool_users[connection] = self.pool_users.get(connection, 0) + 1
+
+            # like a dedicated thread, poll once immediately on every period change
+            heapq.heappush(self.heap, (time.monotonic(), next(self.sequence), emulator, emulator.period_generation))
+            self.condition.notify()
+
+    def remove(self, emulator):
+        with self.condition:
+            if emulator not in self.emulators:
+                return
+
+            self.emulators.discard(emulator)
+
+            # stale heap entries are skipped by the loop
+            connection = emulator.connection
+            self.pool_users[connection] -= 1
+
+            if self.pool_users[connection] == 0:
+                del self.pool_users[connection]
+
+                pool = self.pools.pop(connection, None)
+
+                if pool != None:
+                    pool.stop()
+
+    def get_stats(self):
+        with self.condition:
+            return {'emulators': len(self.emulators),
+                    'workers': sum(len(pool.threads) for pool in self.pools.values()),
+                    'overruns': sum(emulator.overrun_count for emulator in self.emulators)}
+
+    def loop(self):
+        while True:
+            with self.condition:
+                while len(self.heap) == 0 or self.heap[0][0] > time.monotonic():
+                    if len(self.heap) == 0:
+                        self.condition.wait()
+                    else:
+                        self.condition.wait(self.heap[0][0] - time.monotonic())
+
+                now = time.monotonic()
+                due = []
+
+                while len(self.heap) > 0 and self.heap[0][0] <= now:
+                    due.append(heapq.heappop(self.heap))
+
+                for deadline, _, emulator, period_generation in due:
+                    if emulator not in self.emulators or period_generation != emulator.period_generation:
+                        continue
+
+                    next_deadline = deadline + emulator.period
+
+                    if next_deadline < now:
+                        next_deadline = now + emulator.period # don't try to catch up
+
+                    heapq.heappush(self.heap, (next_deadline, next(self.sequence), emulator, period_generation))
+
+                    if emulator.busy:
+                        continue # the worker reports the overrun once the getter returns
+
+                    emulator.busy = True
+
+                    if emulator.connection not in self.pools:
+                        self.pools[emulator.connection] = CallbackWorkerPool(WORKERS_PER_CONNECTION)
+
+                    self.pools[emulator.connection].submit(emulator.poll)
+
 class CallbackEmulator(QObject):
     qtcb_result = pyqtSignal(object)
     qtcb_error = pyqtSignal(object)
@@ -36,7 +239,7 @@ class CallbackEmulator(QObject):
     def __init__(self, parent, function, arguments, result_callback, error_callback,
                  pass_arguments_to_result_callback=False, pass_exception_to_error_callback=False,
                  expand_arguments_tuple_for_callback=False, expand_result_tuple_for_callback=False,
-                 use_result_signal=True, debug_exception=False):
+                 use_result_signal=True, debug_exception=False, native=True):
         super().__init__(parent)
 
         if pass_arguments_to_result_callback:
@@ -52,9 +255,19 @@ class CallbackEmulator(QObject):
         self.expand_result_tuple_for_callback = expand_result_tuple_for_callback
         self.use_result_signal = use_result_signal
         self.debug_exception = debug_exception
-        self.thread = None
-        self.period_queue = None
+        self.period = 0 # seconds
+        self.period_generation = 0
         self.enable_ref = None
+        self.busy = False # True while the getter is called by a worker
+        self.overrun_count = 0
+
+        # getters of the same IP connection share a worker pool
+        self.connection = getattr(getattr(function, '__self__', None), 'ipcon', None)
+
+        if native:
+            self.native = self.find_native_callback()
+        else:
+            self.native = None
 
         if self.use_result_signal:
             self.qtcb_result.connect(self.cb_result)
@@ -68,25 +281,104 @@ class CallbackEmulator(QObject):
     def set_period(self, period): # milliseconds
         assert period >= 0, period
 
-        if self.thread == None:
-            if period > 0:
+        scheduler = get_callback_scheduler()
+
+        if period > 0:
+            if self.enable_ref == None:
                 self.enable_ref = [True]
 
-                self.period_queue = queue.Queue()
-                self.period_queue.put(period / 1000)
+            self.period = period / 1000
+            self.period_generation += 1
 
-                self.thread = threading.Thread(target=self.loop, args=(self.period_queue, self.enable_ref), daemon=True)
-                self.thread.start()
-        else:
-            if period != 0:
-                self.period_queue.put(period / 1000)
+            if self.native != None:
+                self.set_native_period(period)
             else:
-                self.enable_ref[0] = False
+                scheduler.add(self)
+        elif self.enable_ref != None:
+            self.enable_ref[0] = False
+            self.enable_ref = None
+
+            if self.native != None:
+                self.set_native_period(0)
+
+            scheduler.remove(self)
 
-                self.period_queue.put(None)
-                self.period_queue = None
+    # returns a NativeCallback if the device has a period callback that
+    # delivers the same values as the getter, otherwise None
+    def find_native_callback(self):
+        device = getattr(self.function, '__self__', None)
+        name = getattr(self.function, '__name__', '')
+
+        if self.arguments != None or device == None or not name.startswith('get_'):
+            return None
+
+        value_name = name[len('get_'):]
+        callback_id = getattr(device, 'CALLBACK_' + value_name.upper(), None)
+        configure = getattr(device, 'set_{0}_callback_configuration'.format(value_name), None)
+
+        if callback_id == None or configure == None or callback_id not in getattr(device, 'callback_formats', {}):
+            return None
+
+        # the callback has to be triggered with the period, independent of the value
+        configure_argument_count = len(inspect.signature(configure).parameters)
+
+        if configure_argument_count == 5: # period, value_has_to_change, option, min, max
+            configure_arguments = (False, 'x', 0, 0)
+        elif configure_argument_count == 2: # period, value_has_to_change
+            configure_arguments = (False,)
+        else:
+            return None
 
-                self.thread = None
+        # getters with multiple return values return a Get<Value> namedtuple
+        result_type = getattr(sys.modules.get(type(device).__module__), 'Get' + ''.join(part.capitalize() for part in value_name.split('_')), None)
+        value_count = len(device.callback_formats[callback_id][1].split(' '))
+
+        if result_type != None:
+            if len(getattr(result_type, '_fields', [])) != value_count:
+                return None
+        elif value_count != 1:
+            return None
+
+        return NativeCallback(device, callback_id, configure, configure_arguments, result_type)
+
+    def set_native_period(self, period): # milliseconds
+        enable_ref = self.enable_ref
+        native = self.native
+
+        if period > 0:
+            native.device.register_callback(native.callback_id, functools.partial(self.cb_native, enable_ref))
+
+            async_call(native.configure, (period,) + native.configure_arguments, None,
+                       functools.partial(self.cb_native_failed, native, enable_ref))
+        else:
+            native.device.register_callback(native.callback_id, None)
+
+            async_call(native.configure, (0,) + native.configure_arguments, None, None)
+
+    # called by the callback thread of the IP connection
+    def cb_native(self, enable_ref, *values):
+        if not enable_ref[0]:
+            return
+
+        if self.native != None and self.native.result_type != None:
+            result = self.native.result_type(*values)
+        else:
+            result = values[0]
+
+        if self.use_result_signal:
+            get_callback_scheduler().dispatcher.post(self, enable_ref, True, result)
+        else:
+            self.cb_result(result)
+
+    # the firmware doesn't support the callback configuration, fall back to polling
+    def cb_native_failed(self, native, enable_ref):
+        native.device.register_callback(native.callback_id, None)
+
+        if self.native is native:
+            self.native = None
+
+        if enable_ref is self.enable_ref and enable_ref[0]:
+            get_callback_scheduler().add(self)
 
     def cb_result(self, result):
         arguments = tuple()
@@ -108,23 +400,31 @@ class CallbackEmulator(QObject):
 
         self.result_callback(*arguments)
 
-    def loop(self, period_queue, enable_ref):
-        period = 0
-        monotonic_timestamp = time.monotonic()
+    def cb_error(self, exception):
+        if self.error_callback == None:
+            return
 
-        while enable_ref[0]:
-            elapsed = time.monotonic() - monotonic_timestamp
-            remaining = max(period - elapsed, 0)
+        if self.pass_exception_to_error_callback:
+            self.error_callback(exception)
+        else:
+            self.error_callback()
 
-            try:
-                period = period_queue.get(timeout=remaining)
-            except queue.Empty:
-                pass
+    def report_overrun(self, duration):
+        self.overrun_count += 1
 
-            monotonic_timestamp = time.monotonic()
+        if self.overrun_count == 1:
+            logging.warning('Emulated callback {0} took {1:.0f} ms, longer than its period of {2:.0f} ms'
+                            .format(getattr(self.function, '__qualname__', self.function), duration * 1000, self.period * 1000))
 
-            if period == None:
-                break
+    # called by a worker thread of the scheduler
+    def poll(self):
+        enable_ref = self.enable_ref
+
+        try:
+            if enable_ref == None or not enable_ref[0]:
+                return
+
+            monotonic_timestamp = time.monotonic()
 
             try:
                 if self.arguments == None:
@@ -137,32 +437,30 @@ class CallbackEmulator(QObject):
                 if self.debug_exception:
                     logging.exception('Error while getting callback result')
 
-                if not enable_ref[0]:
-                    break
+                if enable_ref[0] and self.error_callback != None:
+                    get_callback_scheduler().dispatcher.post(self, enable_ref, False, e)
+
+                return
+
+            duration = time.monotonic() - monotonic_timestamp
 
+            if duration > self.period:
+                self.report_overrun(duration)
+
+            if not enable_ref[0]:
+                return
+
+            if self.use_result_signal:
+                get_callback_scheduler().dispatcher.post(self, enable_ref, True, result)
+            else:
                 try:
-                    if self.pass_exception_to_error_callback:
-                        self.qtcb_error_with_exception.emit(e)
-                    else:
-                        self.qtcb_error.emit(e)
+                    self.cb_result(result)
                 except RuntimeError as e:
                     # FIXME: filtering by exception message is not so robust
                     if str(e) == 'wrapped C/C++ object of type CallbackEmulator has been deleted':
-                        break
+                        enable_ref[0] = False
+                        return
 
                     raise
-            else:
-                if not enable_ref[0]:
-                    break
-
-                if self.use_result_signal:
-                    try:
-                        self.qtcb_result.emit(result)
-                    except RuntimeError as e:
-                        # FIXME: filtering by exception message is not so robust
-                        if str(e) == 'wrapped C/C++ object of type CallbackEmulator has been deleted':
-                            break
-
-                        raise
-                else:
-                    self.cb_result(result)
+        finally:
+            self.busy = False
@@ -48,6 +48,9 @@ DEFAULT_USE_FUSION_GUI_STYLE = sys.platform == 'darwin'
 
 DEFAULT_AUTO_SEARCH_FOR_UPDATES = True
 
+# seconds a plugin tab has to be hidden before its widgets are torn down, 0 disables
+DEFAULT_PLUGIN_IDLE_TIME = 300
+
 def load_marker_file(name):
     try:
         # Don't warn if the file is missing, as it is expected when run from source.
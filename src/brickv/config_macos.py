@@ -107,6 +107,15 @@ def get_auto_search_for_updates():
 def set_auto_search_for_updates(value):
     set_plist_value('AutoSearchForUpdates', str(bool(value)).lower())
 
+def get_plugin_idle_time():
+    try:
+        return max(int(get_plist_value('PluginIdleTime', str(DEFAULT_PLUGIN_IDLE_TIME))), 0)
+    except ValueError:
+        return DEFAULT_PLUGIN_IDLE_TIME
+
+def set_plugin_idle_time(value):
+    set_plist_value('PluginIdleTime', str(int(value)))
+
 def legacy_get_host():
     return get_plist_value('Host', DEFAULT_HOST)
 
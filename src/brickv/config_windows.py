@@ -118,6 +118,17 @@ def get_auto_search_for_updates():
 def set_auto_search_for_updates(value):
     set_registry_value('AutoSearchForUpdates', winreg.REG_DWORD, int(bool(value)))
 
+def get_plugin_idle_time():
+    value = get_registry_value('PluginIdleTime', DEFAULT_PLUGIN_IDLE_TIME)
+
+    if isinstance(value, int) and value >= 0:
+        return value
+    else:
+        return DEFAULT_PLUGIN_IDLE_TIME
+
+def set_plugin_idle_time(value):
+    set_registry_value('PluginIdleTime', winreg.REG_DWORD, int(value))
+
 def legacy_get_host():
     return get_registry_value('Host', DEFAULT_HOST)
 
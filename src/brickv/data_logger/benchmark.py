@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+brickv (Brick Viewer)
+
+benchmark.py: Data logger throughput benchmark
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public
+License along with this program; if not, write to the
+Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+Boston, MA 02111-1307, USA.
+"""
+
+# Drives DataLogger, DeviceImpl, the LoggerTimers and the CSV writer job
+# against simulated devices, without a Brick Daemon:
+#
+#   cd src && python3 -m brickv.data_logger.benchmark --devices 10 --values 2 --interval 0.01 --find-max
+#
+# The simulated IP connection answers every getter with an all-zero response
+# of the correct length after an optional artificial latency, so the complete
+# binding code path (packing, validity check, unpacking) is exercised.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None # not available on Windows
+
+import brickv.data_logger.data_logger as data_logger_module
+from brickv.bindings.ip_connection import IPConnection, base58encode, unpack_payload
+from brickv.data_logger.configuration import ConfigValidator
+from brickv.data_logger.data_logger import DataLogger
+from brickv.data_logger.event_logger import ConsoleLogger, EventLogger
+from brickv.data_logger.loggable_devices import device_specs
+from brickv.data_logger.main import log_level_name_to_id
+from brickv.data_logger.utils import CSVWriter, DataLoggerMetrics
+
+MIN_INTERVAL = 0.001 # seconds, lower bound for --find-max
+SUSTAINABLE_RATIO = 0.95 # fraction of the expected rate that has to be reached
+
+class SimulatedIPConnection(IPConnection):
+    """
+    IPConnection that never opens a socket and answers all requests locally
+    """
+
+    getter_latency = 0.0 # seconds
+
+    def connect(self, host, port):
+        self.host = host
+        self.port = port
+
+    def disconnect(self):
+        pass
+
+    def send_request(self, device, function_id, data, form, length_ret, form_ret):
+        if SimulatedIPConnection.getter_latency > 0:
+            time.sleep(SimulatedIPConnection.getter_latency)
+
+        if function_id == 255: # <device>.get_identity
+            return (device.uid_string, '0', 'a', (1, 0, 0), (2, 0, 0), device.DEVICE_IDENTIFIER)
+
+        if len(form_ret) == 0:
+            return None
+
+        return unpack_payload(bytes(max(length_ret - 8, 0)), form_ret)
+
+class WriteLatencyRecorder:
+    """
+    Records the time from getter return to the CSV row being flushed to the file
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._original_write_data_row = None
+
+    def install(self):
+        recorder = self
+        original = CSVWriter.write_data_row
+
+        def write_data_row(csv_writer, csv_data):
+            result = original(csv_writer, csv_data)
+
+            if csv_data.unix_timestamp != None:
+                recorder.add(time.time() - csv_data.unix_timestamp)
+
+            return result
+
+        self._original_write_data_row = original
+        CSVWriter.write_data_row = write_data_row
+
+    def uninstall(self):
+        if self._original_write_data_row != None:
+            CSVWriter.write_data_row = self._original_write_data_row
+            self._original_write_data_row = None
+
+    def add(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def get_percentiles(self):
+        with self._lock:
+            return DataLoggerMetrics._percentiles(self._latencies)
+
+def get_rss():
+    """
+    Returns the current resident set size in bytes, or the peak if the
+    current one is not available, or None
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if resource == None:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        return maxrss # bytes on macOS
+    else:
+        return maxrss * 1024 # kilobytes elsewhere
+
+def get_worst_percentiles(percentiles_list):
+    worst = None
+
+    for percentiles in percentiles_list:
+        if percentiles != None and (worst == None or percentiles['p99'] > worst['p99']):
+            worst = percentiles
+
+    return worst
+
+def create_config(device_name, device_count, value_count, interval, csv_file_name):
+    device_spec = device_specs[device_name]
+    devices = []
+
+    for i in range(device_count):
+        device = {
+            'host': 'default',
+            'name': device_name,
+            'uid': base58encode(1000 + i),
+            'values': {},
+            'options': {}
+        }
+
+        # same structure as DeviceDialog.create_device_config
+        for k, value_spec in enumerate(device_spec['values']):
+            device['values'][value_spec['name']] = {'interval': interval if k < value_count else 0}
+
+            if value_spec['subvalues'] != None:
+                device['values'][value_spec['name']]['subvalues'] = {}
+
+                for subvalue_name in value_spec['subvalues']:
+                    device['values'][value_spec['name']]['subvalues'][subvalue_name] = True
+
+        if device_spec['options'] != None:
+            for option_spec in device_spec['options']:
+                device['options'][option_spec['name']] = {'value': option_spec['default']}
+
+        devices.append(device)
+
+    return {
+        'hosts': {'default': {'name': 'localhost', 'port': 4223, 'secret': None}},
+        'data': {'time_format': 'unix',
+                 'csv': {'enabled': True, 'file_name': csv_file_name}},
+        'debug': {'time_format': 'iso',
+                  'log': {'enabled': False, 'file_name': 'benchmark.log', 'level': 'info'}},
+        'devices': devices
+    }
+
+def run_stage(args, interval, csv_file_name):
+    """
+    Runs the data logger for args.duration seconds with the given interval
+    and returns the measured numbers as a dict
+    """
+    value_count = min(args.values, len(device_specs[args.device_name]['values']))
+    config = create_config(args.device_name, args.devices, value_count, interval, csv_file_name)
+
+    if not ConfigValidator(config).validate():
+        raise Exception('Generated config is invalid')
+
+    if os.path.exists(csv_file_name):
+        os.remove(csv_file_name)
+
+    recorder = WriteLatencyRecorder()
+    recorder.install()
+
+    original_ip_connection = data_logger_module.IPConnection
+    data_logger_module.IPConnection = SimulatedIPConnection
+
+    try:
+        data_logger = DataLogger(config, None)
+
+        cpu_start = time.process_time()
+        wall_start = time.monotonic()
+
+        data_logger.run()
+
+        time.sleep(args.duration)
+
+        wall_time = time.monotonic() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        rss = get_rss()
+        snapshot = data_logger.metrics.get_snapshot()
+        queue_depth = sum(stats['depth'] for stats in data_logger.get_queue_stats().values())
+        samples = sum(device['samples'] for device in snapshot['devices'].values())
+
+        data_logger.stop()
+    finally:
+        data_logger_module.IPConnection = original_ip_connection
+        recorder.uninstall()
+
+    expected_rate = args.devices * value_count / interval
+    achieved_rate = samples / wall_time
+
+    return {'interval': interval,
+            'expected_samples_per_second': round(expected_rate, 3),
+            'achieved_samples_per_second': round(achieved_rate, 3),
+            'queue_depth': queue_depth,
+            'sustainable': achieved_rate >= expected_rate * SUSTAINABLE_RATIO and \
+                           queue_depth <= expected_rate * (data_logger.job_sleep + 1),
+            'end_to_end_latency': recorder.get_percentiles(),
+            'getter_latency': get_worst_percentiles([device['getter_latency'] for device in snapshot['devices'].values()]),
+            'timer_lateness': snapshot['timer_lateness'],
+            'cpu_percent': round(cpu_time / wall_time * 100.0, 1),
+            'rss': rss}
+
+def format_percentiles(percentiles):
+    if percentiles == None:
+        return 'n/a'
+
+    return 'p50 {0:.3f} ms, p90 {1:.3f} ms, p99 {2:.3f} ms, max {3:.3f} ms' \
+           .format(percentiles['p50'], percentiles['p90'], percentiles['p99'], percentiles['max'])
+
+def print_stage(result):
+    if result['rss'] != None:
+        rss = '{0:.1f} MiB'.format(result['rss'] / (1024.0 * 1024.0))
+    else:
+        rss = 'n/a'
+
+    print('Interval {0} s: {1} of {2} samples/s ({3}), queue depth {4}'
+          .format(result['interval'], result['achieved_samples_per_second'], result['expected_samples_per_second'],
+                  'sustainable' if result['sustainable'] else 'NOT sustainable', result['queue_depth']))
+    print('  End-to-end latency: ' + format_percentiles(result['end_to_end_latency']))
+    print('  Getter latency:     ' + format_percentiles(result['getter_latency']))
+    print('  Timer lateness:     ' + format_percentiles(result['timer_lateness']))
+    print('  CPU {0} %, RSS {1}'.format(result['cpu_percent'], rss))
+
+def main():
+    parser = argparse.ArgumentParser(description='Tinkerforge Data Logger Benchmark')
+
+    parser.add_argument('--devices', type=int, default=10, help='number of simulated devices (default: 10)')
+    parser.add_argument('--values', type=int, default=1, help='number of logged values per device (default: 1)')
+    parser.add_argument('--interval', type=float, default=0.1, help='logging interval in seconds (default: 0.1)')
+    parser.add_argument('--duration', type=float, default=5.0, help='duration of each run in seconds (default: 5)')
+    parser.add_argument('--device-name', type=str, default='Temperature Bricklet 2.0',
+                        help='device to simulate (default: Temperature Bricklet 2.0)')
+    parser.add_argument('--getter-latency', type=float, default=0.0,
+                        help='artificial getter latency in seconds (default: 0)')
+    parser.add_argument('--find-max', action='store_true',
+                        help='halve the interval until the rate is not sustainable anymore')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--console-log-level', choices=['none', 'debug', 'info', 'warning', 'error', 'critical'],
+                        default='warning', help='change console log level (default: warning)')
+
+    args = parser.parse_args(sys.argv[1:])
+
+    if args.device_name not in device_specs:
+        parser.error('unknown device: ' + args.device_name)
+
+    if args.devices < 1 or args.values < 1 or args.interval <= 0 or args.duration <= 0:
+        parser.error('--devices, --values, --interval and --duration have to be positive')
+
+    if args.console_log_level != 'none':
+        EventLogger.add_logger(ConsoleLogger('ConsoleLogger', log_level_name_to_id(args.console_log_level)))
+
+    SimulatedIPConnection.getter_latency = args.getter_latency
+
+    csv_file_name = os.path.join(tempfile.mkdtemp(prefix='brick-logger-benchmark-'), 'benchmark.csv')
+    interval = args.interval
+    results = []
+
+    try:
+        while True:
+            result = run_stage(args, interval, csv_file_name)
+            results.append(result)
+
+            if not args.json:
+                print_stage(result)
+
+            if not args.find_max or not result['sustainable'] or interval / 2 < MIN_INTERVAL:
+                break
+
+            interval /= 2
+    finally:
+        if os.path.exists(csv_file_name):
+            os.remove(csv_file_name)
+
+        os.rmdir(os.path.dirname(csv_file_name))
+
+    sustainable = [result for result in results if result['sustainable']]
+
+    if len(sustainable) > 0:
+        max_rate = max(result['achieved_samples_per_second'] for result in sustainable)
+    else:
+        max_rate = None
+
+    if args.json:
+        print(json.dumps({'max_sustainable_samples_per_second': max_rate, 'runs': results}, indent=2))
+    elif args.find_max:
+        print('Maximum sustainable rate: {0} samples/s'.format(max_rate if max_rate != None else 'n/a'))
+
+if __name__ == '__main__':
+    main()
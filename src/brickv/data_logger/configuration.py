@@ -25,11 +25,13 @@ Boston, MA 02111-1307, USA.
 #### skip here for brick-logger ####
 
 import json
+import os
 
 if 'merged_data_logger_modules' not in globals():
     from brickv.bindings.ip_connection import base58decode
     from brickv.data_logger.event_logger import EventLogger
-    from brickv.data_logger.utils import DataLoggerException, Utilities
+    from brickv.data_logger.utils import DataLoggerException, Utilities, DataQueue, WindowAggregator, Deadband, \
+                                         LineProtocolWriter
     from brickv.data_logger.loggable_devices import device_specs
 else:
     from tinkerforge.ip_connection import base58decode
@@ -186,6 +188,8 @@ class ConfigValidator:
                 self._report_error('"data/time_format_strftime" is not a string')
 
         self._validate_data_csv()
+        self._validate_data_network()
+        self._validate_data_queue()
 
     def _validate_data_csv(self):
         try:
@@ -214,6 +218,199 @@ class ConfigValidator:
             elif len(file_name) == 0:
                 self._report_error('"data/csv/file_name" is empty')
 
+    def _validate_data_network(self):
+        # network (optional)
+        try:
+            network = self._config['data']['network']
+        except KeyError:
+            self._config['data']['network'] = {'enabled': False}
+            return
+
+        if not isinstance(network, dict):
+            self._report_error('"data/network" section is not a dict')
+            return
+
+        # enabled
+        try:
+            enabled = network['enabled']
+        except KeyError:
+            self._report_error('"data/network" section has no "enabled" member')
+            return
+        else:
+            if not isinstance(enabled, bool):
+                self._report_error('"data/network/enabled" is not an bool')
+                return
+
+        if not enabled:
+            return
+
+        # host
+        try:
+            host = network['host']
+        except KeyError:
+            self._report_error('"data/network" section has no "host" member')
+        else:
+            if not isinstance(host, str):
+                self._report_error('"data/network/host" is not a string')
+            elif len(host) == 0:
+                self._report_error('"data/network/host" is empty')
+
+        # port
+        try:
+            port = network['port']
+        except KeyError:
+            self._report_error('"data/network" section has no "port" member')
+        else:
+            if not isinstance(port, int):
+                self._report_error('"data/network/port" is not an int')
+            elif port < 1 or port > 65535:
+                self._report_error('"data/network/port" is out-of-range')
+
+        # protocol, transport and prefix (optional)
+        for key, choices, default in [('protocol', LineProtocolWriter.PROTOCOLS, LineProtocolWriter.PROTOCOL_INFLUXDB),
+                                      ('transport', LineProtocolWriter.TRANSPORTS, LineProtocolWriter.TRANSPORT_TCP),
+                                      ('prefix', None, 'tinkerforge')]:
+            try:
+                value = network[key]
+            except KeyError:
+                network[key] = default
+            else:
+                if not isinstance(value, str):
+                    self._report_error('"data/network/{0}" is not a string'.format(key))
+                elif choices != None and value not in choices:
+                    self._report_error('Invalid "data/network/{0}" value: {1}'.format(key, value))
+
+        # batch_size, flush_interval and spool_max_size (optional)
+        for key, default in [('batch_size', 100), ('flush_interval', 1.0), ('spool_max_size', 10 * 1024 * 1024)]:
+            try:
+                value = network[key]
+            except KeyError:
+                network[key] = default
+            else:
+                if not isinstance(value, int) and not isinstance(value, float):
+                    self._report_error('"data/network/{0}" is neiter an int nor a float'.format(key))
+                elif value < 0 or (key == 'batch_size' and value < 1) or (key == 'flush_interval' and value <= 0):
+                    self._report_error('"data/network/{0}" is out-of-range'.format(key))
+
+        # spool_file_name (optional)
+        try:
+            spool_file_name = network['spool_file_name']
+        except KeyError:
+            # spool next to the CSV file by default, so no rows get lost while
+            # the database is unreachable
+            csv_file_name = self._config['data'].get('csv', {}).get('file_name')
+
+            if isinstance(csv_file_name, str) and len(csv_file_name) > 0:
+                network['spool_file_name'] = os.path.splitext(csv_file_name)[0] + '.spool'
+            else:
+                network['spool_file_name'] = None
+                EventLogger.warning('"data/network/spool_file_name" is not set, data will be lost while the database is unreachable')
+        else:
+            if spool_file_name == None:
+                EventLogger.warning('"data/network/spool_file_name" is null, data will be lost while the database is unreachable')
+            elif not isinstance(spool_file_name, str):
+                self._report_error('"data/network/spool_file_name" is not an string')
+            elif len(spool_file_name) == 0:
+                self._report_error('"data/network/spool_file_name" is empty')
+
+    def _validate_data_queue(self):
+        # queue (optional)
+        try:
+            data_queue = self._config['data']['queue']
+        except KeyError:
+            self._config['data']['queue'] = {'size': DataQueue.DEFAULT_MAX_SIZE, 'policy': DataQueue.POLICY_BLOCK}
+            return
+
+        if not isinstance(data_queue, dict):
+            self._report_error('"data/queue" section is not a dict')
+            return
+
+        # size (optional)
+        try:
+            size = data_queue['size']
+        except KeyError:
+            data_queue['size'] = DataQueue.DEFAULT_MAX_SIZE
+        else:
+            if not isinstance(size, int):
+                self._report_error('"data/queue/size" is not an int')
+            elif size < 0:
+                self._report_error('"data/queue/size" is out-of-range')
+
+        # policy (optional)
+        try:
+            policy = data_queue['policy']
+        except KeyError:
+            data_queue['policy'] = DataQueue.POLICY_BLOCK
+        else:
+            if not isinstance(policy, str):
+                self._report_error('"data/queue/policy" is not a string')
+            elif policy not in DataQueue.POLICIES:
+                self._report_error('Invalid "data/queue/policy" value: {0}'.format(policy))
+
+    def _validate_aggregation(self, aggregation, value_name, uid):
+        if aggregation == None:
+            return
+
+        if not isinstance(aggregation, dict):
+            self._report_error('Aggregation of value "{0}" of device "{1}" is not a dict'.format(value_name, uid))
+            return
+
+        # window
+        try:
+            window = aggregation['window']
+        except KeyError:
+            self._report_error('Aggregation of value "{0}" of device "{1}" has no window'.format(value_name, uid))
+        else:
+            if not isinstance(window, int) and not isinstance(window, float):
+                self._report_error('Aggregation window of value "{0}" of device "{1}" is neiter an int nor a float'.format(value_name, uid))
+            elif window < 0:
+                self._report_error('Aggregation window of value "{0}" of device "{1}" is ouf-of-range'.format(value_name, uid))
+
+        # functions (optional)
+        try:
+            functions = aggregation['functions']
+        except KeyError:
+            aggregation['functions'] = list(WindowAggregator.FUNCTIONS)
+        else:
+            if not isinstance(functions, list):
+                self._report_error('Aggregation functions of value "{0}" of device "{1}" is not a list'.format(value_name, uid))
+            else:
+                for function in functions:
+                    if function not in WindowAggregator.FUNCTIONS:
+                        self._report_error('Aggregation function of value "{0}" of device "{1}" is unknown: {2}'
+                                           .format(value_name, uid, function))
+
+    def _validate_deadband(self, deadband, value_name, uid):
+        if deadband == None:
+            return
+
+        if not isinstance(deadband, dict):
+            self._report_error('Deadband of value "{0}" of device "{1}" is not a dict'.format(value_name, uid))
+            return
+
+        # mode (optional)
+        try:
+            mode = deadband['mode']
+        except KeyError:
+            deadband['mode'] = Deadband.MODE_ABSOLUTE
+        else:
+            if not isinstance(mode, str):
+                self._report_error('Deadband mode of value "{0}" of device "{1}" is not a string'.format(value_name, uid))
+            elif mode not in Deadband.MODES:
+                self._report_error('Deadband mode of value "{0}" of device "{1}" is invalid: {2}'.format(value_name, uid, mode))
+
+        # threshold and max_silence (optional)
+        for key in ['threshold', 'max_silence']:
+            try:
+                number = deadband[key]
+            except KeyError:
+                deadband[key] = 0
+            else:
+                if not isinstance(number, int) and not isinstance(number, float):
+                    self._report_error('Deadband {0} of value "{1}" of device "{2}" is neiter an int nor a float'.format(key, value_name, uid))
+                elif number < 0:
+                    self._report_error('Deadband {0} of value "{1}" of device "{2}" is ouf-of-range'.format(key, value_name, uid))
+
     def _validate_debug(self):
         try:
             debug = self._config['debug']
@@ -233,6 +430,7 @@ class ConfigValidator:
                 self._report_error('Invalid "debug/time_format" value: {0}'.format(time_format))
 
         self._validate_debug_log()
+        self._validate_debug_metrics()
 
     def _validate_debug_log(self):
         try:
@@ -272,6 +470,47 @@ class ConfigValidator:
             elif level not in ['debug', 'info', 'warning', 'error', 'critical']:
                 self._report_error('Invalid "debug/log/level" value: {0}'.format(level))
 
+    def _validate_debug_metrics(self):
+        # metrics (optional)
+        try:
+            metrics = self._config['debug']['metrics']
+        except KeyError:
+            self._config['debug']['metrics'] = {'enabled': False, 'host': '127.0.0.1', 'port': 4280}
+            return
+
+        if not isinstance(metrics, dict):
+            self._report_error('"debug/metrics" section is not a dict')
+            return
+
+        # enabled
+        try:
+            enabled = metrics['enabled']
+        except KeyError:
+            self._report_error('"debug/metrics" section has no "enabled" member')
+        else:
+            if not isinstance(enabled, bool):
+                self._report_error('"debug/metrics/enabled" is not an bool')
+
+        # host (optional)
+        try:
+            host = metrics['host']
+        except KeyError:
+            metrics['host'] = '127.0.0.1'
+        else:
+            if not isinstance(host, str):
+                self._report_error('"debug/metrics/host" is not a string')
+
+        # port (optional)
+        try:
+            port = metrics['port']
+        except KeyError:
+            metrics['port'] = 4280
+        else:
+            if not isinstance(port, int):
+                self._report_error('"debug/metrics/port" is not an int')
+            elif port < 1 or port > 65535:
+                self._report_error('"debug/metrics/port" is out-of-range')
+
     def _validate_devices(self):
         try:
             devices = self._config['devices']
@@ -367,6 +606,35 @@ class ConfigValidator:
                             elif interval < 0:
                                 self._report_error('Interval of value "{0}" of device "{1}" is ouf-of-range'.format(value_spec['name'], uid))
 
+                        # aggregation (optional)
+                        try:
+                            aggregation = value['aggregation']
+                        except KeyError:
+                            pass
+                        else:
+                            self._validate_aggregation(aggregation, value_spec['name'], uid)
+
+                        # group (optional)
+                        try:
+                            group = value['group']
+                        except KeyError:
+                            pass
+                        else:
+                            if group == None:
+                                pass
+                            elif not isinstance(group, str):
+                                self._report_error('Group of value "{0}" of device "{1}" is not a string'.format(value_spec['name'], uid))
+                            elif len(group) == 0:
+                                self._report_error('Group of value "{0}" of device "{1}" is empty'.format(value_spec['name'], uid))
+
+                        # deadband (optional)
+                        try:
+                            deadband = value['deadband']
+                        except KeyError:
+                            pass
+                        else:
+                            self._validate_deadband(deadband, value_spec['name'], uid)
+
                         # subvalues
                         if value_spec['subvalues'] != None:
                             try:
@@ -389,6 +657,51 @@ class ConfigValidator:
                                             self._report_error('Subvalue "{0}" of value "{1}" of device "{2}" is not a bool'
                                                                .format(subvalue_spec_name, value_spec['name'], uid))
 
+            # streams (optional)
+            try:
+                streams = device['streams']
+            except KeyError:
+                pass
+            else:
+                if not isinstance(streams, dict):
+                    self._report_error('"streams" of device "{0}" is not a dict'.format(uid))
+                else:
+                    stream_specs = {stream_spec['name']: stream_spec for stream_spec in device_spec.get('streams', [])}
+
+                    for stream_name, stream in streams.items():
+                        try:
+                            stream_spec = stream_specs[stream_name]
+                        except KeyError:
+                            self._report_error('Stream "{0}" of device "{1}" is unknown'.format(stream_name, uid))
+                            continue
+
+                        if not isinstance(stream, dict):
+                            self._report_error('Stream "{0}" of device "{1}" is not a dict'.format(stream_name, uid))
+                            continue
+
+                        # file_name
+                        try:
+                            file_name = stream['file_name']
+                        except KeyError:
+                            self._report_error('Stream "{0}" of device "{1}" has no file_name'.format(stream_name, uid))
+                        else:
+                            if not isinstance(file_name, str):
+                                self._report_error('File name of stream "{0}" of device "{1}" is not a string'.format(stream_name, uid))
+                            elif len(file_name) == 0:
+                                self._report_error('File name of stream "{0}" of device "{1}" is empty'.format(stream_name, uid))
+
+                        # interval (only for streams without callback)
+                        if stream_spec['callback_id'] == None:
+                            try:
+                                interval = stream['interval']
+                            except KeyError:
+                                self._report_error('Stream "{0}" of device "{1}" has no interval'.format(stream_name, uid))
+                            else:
+                                if not isinstance(interval, int) and not isinstance(interval, float):
+                                    self._report_error('Interval of stream "{0}" of device "{1}" is neiter an int nor a float'.format(stream_name, uid))
+                                elif interval <= 0:
+                                    self._report_error('Interval of stream "{0}" of device "{1}" is out-of-range'.format(stream_name, uid))
+
             # options
             if device_spec['options'] != None:
                 try:
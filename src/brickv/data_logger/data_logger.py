@@ -31,9 +31,10 @@ import time
 if 'merged_data_logger_modules' not in globals():
     from brickv.bindings.ip_connection import IPConnection, base58decode
     from brickv.data_logger.event_logger import EventLogger
-    from brickv.data_logger.job import CSVWriterJob#, GuiDataJob
-    from brickv.data_logger.loggable_devices import DeviceImpl
-    from brickv.data_logger.utils import DataLoggerException
+    from brickv.data_logger.job import CSVWriterJob, NetworkWriterJob#, GuiDataJob
+    from brickv.data_logger.loggable_devices import DeviceImpl, SamplingGroup
+    from brickv.data_logger.utils import DataLoggerException, DataQueue, LoggerTimer, DataLoggerMetrics, MetricsServer
+    from brickv.data_logger.configuration import LogSpaceCounter
 else:
     from tinkerforge.ip_connection import IPConnection, base58decode
 
@@ -43,6 +44,10 @@ class DataLogger(threading.Thread):
     the actual instance of a logging process
     """
 
+    # seconds to collect enumerate callbacks before applying options, a stack
+    # (re)connecting to brickd sends one enumerate callback per device
+    ENUMERATE_BATCH_DELAY = 0.1
+
     # constructor and other functions
     def __init__(self, config, gui_job):
         super().__init__()
@@ -53,8 +58,14 @@ class DataLogger(threading.Thread):
         self.job_exit_flag = False  # flag for stopping the thread
         self.job_sleep = 1  # TODO: Enahncement -> use condition objects
         self.timers = []
+        self.sampling_groups = {}
         self._gui_job = gui_job
         self.data_queue = {}  # universal data_queue hash map
+        self.data_queue_size = DataQueue.DEFAULT_MAX_SIZE # 0 means unbounded
+        self.data_queue_policy = DataQueue.POLICY_BLOCK
+        self.data_queue_warning_timestamp = None
+        self.metrics = DataLoggerMetrics()
+        self.metrics_server = None
         self.host = config['hosts']['default']['name']
         self.port = config['hosts']['default']['port']
         self.secret = config['hosts']['default']['secret']
@@ -67,6 +78,10 @@ class DataLogger(threading.Thread):
                 self.secret = None
 
         self.loggable_devices = []
+        self.enumerated_uids = set()
+        self.enumerated_uids_lock = threading.Lock()
+        self.enumerated_uids_timer = None
+        self.enumerated_uids_stopped = False
         self.ipcon = IPConnection()
 
         self.ipcon.register_callback(IPConnection.CALLBACK_CONNECTED, self.cb_connected)
@@ -85,9 +100,13 @@ class DataLogger(threading.Thread):
         self._config = config
         self.csv_file_name = 'logger_data_{0}.csv'.format(int(time.time()))
         self.csv_enabled = True
+        self.network = None
         self.stopped = False
 
     def cb_connected(self, connect_reason):
+        if connect_reason == IPConnection.CONNECT_REASON_AUTO_RECONNECT:
+            self.metrics.add_reconnect()
+
         if self.secret != None:
             try:
                 self.secret.encode('ascii')
@@ -129,11 +148,44 @@ class DataLogger(threading.Thread):
                      device_identifier, enumeration_type):
         if enumeration_type in [IPConnection.ENUMERATION_TYPE_AVAILABLE,
                                 IPConnection.ENUMERATION_TYPE_CONNECTED]:
-            self.apply_options()
+            with self.enumerated_uids_lock:
+                if self.enumerated_uids_stopped:
+                    return
+
+                self.enumerated_uids.add(uid)
+
+                if self.enumerated_uids_timer == None:
+                    self.start_enumerated_uids_timer()
+
+    # has to be called with enumerated_uids_lock held
+    def start_enumerated_uids_timer(self):
+        self.enumerated_uids_timer = threading.Timer(DataLogger.ENUMERATE_BATCH_DELAY, self.apply_enumerated_options)
+        self.enumerated_uids_timer.daemon = True
+        self.enumerated_uids_timer.start()
+
+    def apply_enumerated_options(self):
+        with self.enumerated_uids_lock:
+            if self.enumerated_uids_stopped:
+                return
+
+            uids = self.enumerated_uids
+            self.enumerated_uids = set()
+
+        # the timer stays set while applying, so stop() can wait for this to
+        # finish before disconnecting
+        self.apply_options(uids)
+
+        with self.enumerated_uids_lock:
+            self.enumerated_uids_timer = None
 
-    def apply_options(self):
+            if not self.enumerated_uids_stopped and len(self.enumerated_uids) > 0:
+                self.start_enumerated_uids_timer()
+
+    # only apply the options of the devices with the given UIDs, if given
+    def apply_options(self, uids=None):
         for loggable_device in self.loggable_devices:
-            loggable_device.apply_options()
+            if uids == None or loggable_device.device_uid in uids:
+                loggable_device.apply_options()
 
     def process_data_csv_section(self):
         """
@@ -147,6 +199,112 @@ class DataLogger(threading.Thread):
         if self.csv_enabled:
             EventLogger.info("Logging data to CSV file: " + str(self.csv_file_name))
 
+    def process_data_network_section(self):
+        """
+        Information out of the data/network section will be consumed here
+        """
+        network = self._config['data'].get('network')
+
+        if network == None or not network['enabled']:
+            self.network = None
+            return
+
+        self.network = network
+
+        EventLogger.info("Sending data via {0} to {1}:{2} using {3} protocol".format(network['transport'].upper(), network['host'],
+                                                                                     network['port'], network['protocol']))
+
+    def process_debug_metrics_section(self):
+        """
+        Information out of the debug/metrics section will be consumed here
+        """
+        metrics = self._config['debug'].get('metrics')
+
+        if metrics == None or not metrics['enabled']:
+            return
+
+        try:
+            self.metrics_server = MetricsServer(metrics['host'], metrics['port'], self.get_metrics)
+        except Exception as e:
+            EventLogger.warning("Could not start metrics endpoint on {0}:{1}: {2}".format(metrics['host'], metrics['port'], e))
+            return
+
+        self.metrics_server.start()
+
+        EventLogger.info("Reporting metrics on http://{0}:{1}/metrics".format(metrics['host'], metrics['port']))
+
+    def get_metrics(self):
+        """
+        Returns the metrics of the logging process, including queue depths and job throughput
+        """
+        snapshot = self.metrics.get_snapshot()
+        uptime = max(snapshot['uptime'], 0.001)
+
+        snapshot['queues'] = self.get_queue_stats()
+        snapshot['jobs'] = {}
+
+        for job in self.jobs:
+            stats = job.get_stats()
+
+            if 'rows' in stats:
+                stats['rows_per_second'] = round(stats['rows'] / uptime, 3)
+                stats['bytes_per_second'] = round(stats['bytes'] / uptime, 3)
+
+            snapshot['jobs'][job.name] = stats
+
+        snapshot['streams'] = {}
+
+        for loggable_device in self.loggable_devices:
+            for stream_name, stats in loggable_device.get_stream_stats().items():
+                stats['samples_per_second'] = round(stats['samples'] / uptime, 3)
+                snapshot['streams'][loggable_device.device_uid + '/' + stream_name] = stats
+
+        return snapshot
+
+    def process_data_queue_section(self):
+        """
+        Information out of the data/queue section will be consumed here
+        """
+        data_queue = self._config['data'].get('queue', {})
+
+        self.data_queue_size = data_queue.get('size', DataQueue.DEFAULT_MAX_SIZE)
+        self.data_queue_policy = data_queue.get('policy', DataQueue.POLICY_BLOCK)
+
+        if self.data_queue_size > 0:
+            EventLogger.info("Limiting data queues to {0} items with policy: {1}".format(self.data_queue_size, self.data_queue_policy))
+
+    def get_sampling_group(self, name, interval):
+        """
+        Returns the sampling group with the given name and creates it and its timer
+        if it does not exist yet
+        """
+        sampling_group = self.sampling_groups.get(name)
+
+        if sampling_group == None:
+            sampling_group = SamplingGroup(name, interval, self)
+
+            self.sampling_groups[name] = sampling_group
+            self.timers.append(LoggerTimer(interval, "_tick", name, sampling_group, self.metrics))
+
+            EventLogger.debug('Created sampling group "{0}" with interval {1}'.format(name, interval))
+        elif sampling_group.interval != interval:
+            EventLogger.warning('Sampling group "{0}" uses interval {1}, ignoring different interval {2}'
+                                .format(name, sampling_group.interval, interval))
+
+        return sampling_group
+
+    def create_data_queue(self):
+        """
+        Creates a new data queue for a job according to the data/queue section
+        """
+        return DataQueue(self.data_queue_size, self.data_queue_policy)
+
+    def get_queue_stats(self):
+        """
+        Returns the stats of all registered data queues by job name
+        """
+        return {name: q.get_stats() for name, q in list(self.data_queue.items())}
+
     def initialize_loggable_devices(self):
         """
         This function creates the actual objects for each device out of the configuration
@@ -177,6 +335,13 @@ class DataLogger(threading.Thread):
 
             self.loggable_devices.append(loggable_device)
 
+        log_space_counter = LogSpaceCounter(1, 0)
+
+        for loggable_device in self.loggable_devices:
+            log_space_counter.add_lines_per_second(loggable_device.get_lines_per_second())
+
+        self.metrics.expected_samples_per_second = log_space_counter.lines_per_second
+
         self.apply_options()
 
     def run(self):
@@ -185,6 +350,9 @@ class DataLogger(threading.Thread):
         """
         self.stopped = False
         self.process_data_csv_section()
+        self.process_data_network_section()
+        self.process_data_queue_section()
+        self.process_debug_metrics_section()
 
         self.initialize_loggable_devices()
 
@@ -193,6 +361,8 @@ class DataLogger(threading.Thread):
         # look which thread should be working
         if self.csv_enabled:
             self.jobs.append(CSVWriterJob(name="CSV-Writer", datalogger=self))
+        if self.network != None:
+            self.jobs.append(NetworkWriterJob(name="Network-Writer", datalogger=self))
         if self._gui_job is not None:
             self._gui_job.set_datalogger(self)
             self.jobs.append(self._gui_job)
@@ -223,6 +393,26 @@ class DataLogger(threading.Thread):
             t.stop_and_join()
         EventLogger.debug("Get-Timers[" + str(len(self.timers)) + "] stopped.")
 
+        for sampling_group in self.sampling_groups.values():
+            sampling_group.stop()
+
+        with self.enumerated_uids_lock:
+            self.enumerated_uids_stopped = True
+            enumerated_uids_timer = self.enumerated_uids_timer
+            self.enumerated_uids_timer = None
+
+        if enumerated_uids_timer != None:
+            enumerated_uids_timer.cancel()
+            enumerated_uids_timer.join()
+
+        # write pending aggregation windows before the jobs drain their queues
+        for loggable_device in self.loggable_devices:
+            loggable_device.flush()
+
+        # streams bypass the jobs and write their files directly
+        for loggable_device in self.loggable_devices:
+            loggable_device.stop_streams()
+
         # set THREAD_EXIT_FLAG for all work threads
         for job in self.jobs:
             job.stop()
@@ -231,6 +421,9 @@ class DataLogger(threading.Thread):
             job.join()
         EventLogger.debug("Jobs[" + str(len(self.jobs)) + "] stopped.")
 
+        for loggable_device in self.loggable_devices:
+            loggable_device.stop_callbacks()
+
         try:
             self.ipcon.disconnect()
         except:
@@ -238,6 +431,10 @@ class DataLogger(threading.Thread):
 
         EventLogger.info("Connection closed successfully.")
 
+        if self.metrics_server != None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
         self.stopped = True
 
     def add_to_queue(self, csv):
@@ -246,5 +443,19 @@ class DataLogger(threading.Thread):
 
         csv --
         """
-        for q in self.data_queue.values():
-            q.put(csv)
+        dropped = False
+
+        self.metrics.add_sample(csv.uid)
+
+        for q in list(self.data_queue.values()):
+            if not q.put(csv):
+                dropped = True
+
+        if dropped:
+            now = time.monotonic()
+
+            # report drops at most every 10 seconds to avoid flooding the event log
+            if self.data_queue_warning_timestamp == None or now - self.data_queue_warning_timestamp >= 10:
+                self.data_queue_warning_timestamp = now
+                stats = ', '.join('{0}: {1} dropped'.format(name, s['dropped']) for name, s in self.get_queue_stats().items())
+                EventLogger.warning("Data queue full, dropping data with policy {0} ({1})".format(self.data_queue_policy, stats))
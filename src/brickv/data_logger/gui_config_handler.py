@@ -22,6 +22,7 @@ Free Software Foundation, Inc., 59 Temple Place - Suite 330,
 Boston, MA 02111-1307, USA.
 """
 
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QComboBox, QSpinBox, QCheckBox
 
 from brickv.data_logger.event_logger import EventLogger, GUILogger
@@ -66,7 +67,10 @@ class GuiConfigHandler:
         data = {'time_format': setup_dialog.combo_data_time_format.itemData(setup_dialog.combo_data_time_format.currentIndex()),
                 'time_format_strftime': setup_dialog.edit_data_time_format_strftime.text(),
                 'csv': {'enabled': setup_dialog.check_data_to_csv_file.isChecked(),
-                        'file_name': setup_dialog.edit_csv_file_name.text()}}
+                        'file_name': setup_dialog.edit_csv_file_name.text()},
+                'network': setup_dialog.data_network_config,
+                'queue': {'size': setup_dialog.spin_queue_size.value(),
+                          'policy': setup_dialog.combo_queue_policy.itemData(setup_dialog.combo_queue_policy.currentIndex())}}
 
         return data
 
@@ -78,7 +82,8 @@ class GuiConfigHandler:
         debug = {'time_format': setup_dialog.combo_debug_time_format.itemData(setup_dialog.combo_debug_time_format.currentIndex()),
                  'log': {'enabled': setup_dialog.check_debug_to_log_file.isChecked(),
                          'file_name': setup_dialog.edit_log_file_name.text(),
-                         'level': setup_dialog.combo_log_level.itemData(setup_dialog.combo_log_level.currentIndex())}}
+                         'level': setup_dialog.combo_log_level.itemData(setup_dialog.combo_log_level.currentIndex())},
+                 'metrics': setup_dialog.debug_metrics_config}
 
         return debug
 
@@ -95,6 +100,11 @@ class GuiConfigHandler:
                 'values': {}
             }
 
+            streams = name_item.data(Qt.UserRole)
+
+            if streams != None:
+                device['streams'] = streams
+
             for child_row in range(name_item.rowCount()):
                 child_item = name_item.child(child_row, 0)
 
@@ -104,6 +114,11 @@ class GuiConfigHandler:
                         value_interval_item = child_item.child(value_row, 1)
 
                         device['values'][value_name_item.text()] = {'interval': setup_dialog.tree_devices.indexWidget(value_interval_item.index()).get_interval()}
+                        extra_settings = value_name_item.data(Qt.UserRole)
+
+                        if extra_settings != None:
+                            device['values'][value_name_item.text()].update(extra_settings)
+
                         subvalues = {}
 
                         for subvalue_row in range(value_name_item.rowCount()):
@@ -35,7 +35,7 @@ import time
 if 'merged_data_logger_modules' not in globals():
     from PyQt5.QtCore import pyqtSignal, QObject
     from brickv.data_logger.event_logger import EventLogger
-    from brickv.data_logger.utils import CSVWriter
+    from brickv.data_logger.utils import CSVWriter, LineProtocolWriter
 
 class AbstractJob(threading.Thread):
     def __init__(self, name, target, datalogger=None):
@@ -47,11 +47,17 @@ class AbstractJob(threading.Thread):
         self._job_name = "[Job:" + self.name + "]"
 
         if self._datalogger is not None:
-            self._datalogger.data_queue[self.name] = queue.Queue()
+            self._datalogger.data_queue[self.name] = self._datalogger.create_data_queue()
 
     def stop(self):
         self._exit_flag = True
 
+    def get_stats(self):
+        """
+        Returns the throughput numbers of the job as a dict
+        """
+        return {}
+
     def _job(self):
         # check for datalogger object
         if self._datalogger is None:
@@ -67,7 +73,14 @@ class AbstractJob(threading.Thread):
     # Needs to be called when you end the job!
     def _remove_from_data_queue(self):
         try:
-            self._datalogger.data_queue.pop(self.name)
+            data_queue = self._datalogger.data_queue.pop(self.name)
+            data_queue.close()
+            stats = data_queue.get_stats()
+
+            if stats['dropped'] > 0:
+                EventLogger.warning(self._job_name + " Queued " + str(stats['queued']) + " and dropped " + str(stats['dropped']) + " items")
+            else:
+                EventLogger.debug(self._job_name + " Queued " + str(stats['queued']) + " items")
         except KeyError as key_err:
             EventLogger.warning("Job:" + self.name + " was not in the DataQueue! -> " + str(key_err))
 
@@ -81,6 +94,15 @@ class CSVWriterJob(AbstractJob):
         target = self._job
         super().__init__(datalogger=datalogger, name=name, target=target)
 
+        self._csv_writer = None
+
+    def get_stats(self):
+        if self._csv_writer == None:
+            return {}
+
+        return {'rows': self._csv_writer.written_rows,
+                'bytes': self._csv_writer.written_bytes}
+
     def _job(self):
         try:
             # check for datalogger object
@@ -89,6 +111,7 @@ class CSVWriterJob(AbstractJob):
 
             EventLogger.debug(self._job_name + " Started")
             csv_writer = CSVWriter(self._datalogger.csv_file_name)
+            self._csv_writer = csv_writer
 
             while True:
                 if not self._datalogger.data_queue[self.name].empty():
@@ -115,6 +138,97 @@ class CSVWriterJob(AbstractJob):
             EventLogger.critical(self._job_name + " " + str(e))
             self.stop()
 
+            # nobody empties the queue anymore, don't let the producers block on it
+            self._remove_from_data_queue()
+
+
+
+class NetworkWriterJob(AbstractJob):
+    """
+    This class enables the data logger to push logged data in batches to a time series database
+    """
+
+    def __init__(self, datalogger=None, name="NetworkWriterJob"):
+        target = self._job
+        super().__init__(datalogger=datalogger, name=name, target=target)
+
+        self._writer = None
+
+    def get_stats(self):
+        if self._writer == None:
+            return {}
+
+        return {'rows': self._writer.sent_lines,
+                'bytes': self._writer.sent_bytes,
+                'spooled_rows': self._writer.spooled_lines,
+                'dropped_rows': self._writer.dropped_lines,
+                'connects': self._writer.connect_count}
+
+    def _job(self):
+        try:
+            # check for datalogger object
+            if AbstractJob._job(self):
+                return
+
+            EventLogger.debug(self._job_name + " Started")
+
+            network = self._datalogger.network
+            writer = LineProtocolWriter(network['host'], network['port'],
+                                        protocol=network['protocol'],
+                                        transport=network['transport'],
+                                        prefix=network['prefix'],
+                                        spool_file_path=network['spool_file_name'],
+                                        max_spool_file_size=network['spool_max_size'])
+            self._writer = writer
+            batch_size = network['batch_size']
+            flush_interval = network['flush_interval']
+            data_queue = self._datalogger.data_queue[self.name]
+            lines = []
+            flush_timestamp = time.monotonic()
+
+            while True:
+                # without pending lines there is no flush deadline to wait for
+                if len(lines) > 0:
+                    timeout = min(max(flush_interval - (time.monotonic() - flush_timestamp), 0), self._datalogger.job_sleep)
+                else:
+                    timeout = self._datalogger.job_sleep
+
+                try:
+                    csv_data = data_queue.get(timeout=timeout)
+                except queue.Empty:
+                    pass
+                else:
+                    line = writer.format_line(csv_data)
+
+                    if line != None:
+                        lines.append(line)
+
+                if len(lines) >= batch_size or (len(lines) > 0 and time.monotonic() - flush_timestamp >= flush_interval):
+                    writer.write_lines(lines)
+                    lines = []
+                    flush_timestamp = time.monotonic()
+                elif len(lines) == 0:
+                    flush_timestamp = time.monotonic()
+
+                if self._exit_flag and data_queue.empty():
+                    if len(lines) > 0:
+                        writer.write_lines(lines)
+
+                    writer.close()
+
+                    EventLogger.debug(self._job_name + " Sent " + str(writer.sent_lines) + " lines (" + str(writer.sent_bytes) + " bytes), spooled " +
+                                      str(writer.spooled_lines) + " lines and dropped " + str(writer.dropped_lines) + " lines")
+                    EventLogger.debug(self._job_name + " Finished")
+
+                    self._remove_from_data_queue()
+                    break
+
+        except Exception as e:
+            EventLogger.critical(self._job_name + " " + str(e))
+            self.stop()
+
+            # nobody empties the queue anymore, don't let the producers block on it
+            self._remove_from_data_queue()
 
 if 'merged_data_logger_modules' not in globals():
     class GuiDataJob(AbstractJob, QObject):
@@ -122,7 +236,9 @@ if 'merged_data_logger_modules' not in globals():
         This class enables the data logger to log to the Gui
         """
         from brickv.data_logger.utils import LoggerTimer, CSVData
-        signalNewData = pyqtSignal(CSVData)
+        signalNewData = pyqtSignal(list)
+
+        MAX_BATCH_SIZE = 1000 # rows, the data table doesn't show more than this anyway
 
         def __init__(self, datalogger=None, name="GuiDataJob"):
             target = self._job
@@ -131,7 +247,7 @@ if 'merged_data_logger_modules' not in globals():
 
         def set_datalogger(self, datalogger):
             self._datalogger = datalogger
-            self._datalogger.data_queue[self.name] = queue.Queue()
+            self._datalogger.data_queue[self.name] = self._datalogger.create_data_queue()
 
         def _job(self):
             try:
@@ -142,9 +258,15 @@ if 'merged_data_logger_modules' not in globals():
                 EventLogger.debug(self._job_name + " Started")
 
                 while True:
-                    if not self._datalogger.data_queue[self.name].empty():
-                        csv_data = self._get_data_from_queue()
-                        self.signalNewData.emit(csv_data)
+                    # emit what arrived since the last tick as one batch, but bounded,
+                    # so the sleep and exit checks are reached under sustained input
+                    csv_data_list = []
+
+                    while len(csv_data_list) < GuiDataJob.MAX_BATCH_SIZE and not self._datalogger.data_queue[self.name].empty():
+                        csv_data_list.append(self._get_data_from_queue())
+
+                    if len(csv_data_list) > 0:
+                        self.signalNewData.emit(csv_data_list)
 
                     if not self._exit_flag and self._datalogger.data_queue[self.name].empty():
                         time.sleep(self._datalogger.job_sleep)
@@ -156,3 +278,5 @@ if 'merged_data_logger_modules' not in globals():
             except Exception as e:
                 EventLogger.critical(self._job_name + " -.- " + str(e))
                 self.stop()
+
+                self._remove_from_data_queue()
@@ -26,17 +26,15 @@ Boston, MA 02111-1307, USA.
 #### skip here for brick-logger ####
 
 import time
+import functools
+import concurrent.futures
 from collections import namedtuple
 from queue import Queue, Empty
 
 if 'merged_data_logger_modules' not in globals():
     from brickv.data_logger.event_logger import EventLogger
-    from brickv.data_logger.utils import LoggerTimer, CSVData, \
-                                         timestamp_to_de, timestamp_to_us, \
-                                         timestamp_to_iso, timestamp_to_unix, \
-                                         timestamp_to_de_msec, timestamp_to_us_msec, \
-                                         timestamp_to_iso_msec, timestamp_to_unix_msec, \
-                                         timestamp_to_strftime
+    from brickv.data_logger.utils import LoggerTimer, CSVData, WindowAggregator, Deadband, StreamWriter, \
+                                         timestamp_to_format
 
     # Bricks
     try:
@@ -1688,6 +1686,16 @@ if BrickletAccelerometerV2_found:
                            ('8g', BrickletAccelerometerV2.FULL_SCALE_8G)],
                 'default': '2g'
             }
+        ],
+        'streams': [
+            {
+                'name': 'Continuous Acceleration',
+                'callback_id': BrickletAccelerometerV2.CALLBACK_CONTINUOUS_ACCELERATION_16_BIT,
+                'getter': None,
+                'enabler': lambda device, enable: device.set_continuous_acceleration_configuration(enable, enable, enable, BrickletAccelerometerV2.RESOLUTION_16BIT),
+                'format': 'h',
+                'channels': ['X', 'Y', 'Z']
+            }
         ]
     }
 if BrickletAirQuality_found:
@@ -1706,21 +1714,27 @@ if BrickletAirQuality_found:
                 'getter': lambda device: device.get_temperature(),
                 'subvalues': None,
                 'unit': '°C/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletAirQuality.CALLBACK_TEMPERATURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_temperature_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Humidity',
                 'getter': lambda device: device.get_humidity(),
                 'subvalues': None,
                 'unit': '%RH/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletAirQuality.CALLBACK_HUMIDITY,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_humidity_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Air Pressure',
                 'getter': lambda device: device.get_air_pressure(),
                 'subvalues': None,
                 'unit': 'hPa/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletAirQuality.CALLBACK_AIR_PRESSURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_air_pressure_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -1814,7 +1828,9 @@ if BrickletAmbientLightV3_found:
                 'getter': lambda device: device.get_illuminance(),
                 'subvalues': None,
                 'unit': 'lx/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletAmbientLightV3.CALLBACK_ILLUMINANCE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_illuminance_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             }
         ],
         'options_setter': lambda device, illuminance_range, integration_time: device.set_configuration(illuminance_range, integration_time),
@@ -1928,7 +1944,9 @@ if BrickletAnalogInV3_found:
                 'getter': lambda device: device.get_voltage(),
                 'subvalues': None,
                 'unit': 'mV',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletAnalogInV3.CALLBACK_VOLTAGE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_voltage_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -2054,21 +2072,27 @@ if BrickletBarometerV2_found:
                 'getter': lambda device: device.get_air_pressure(),
                 'subvalues': None,
                 'unit': 'hPa/1000',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletBarometerV2.CALLBACK_AIR_PRESSURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_air_pressure_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Altitude',
                 'getter': lambda device: device.get_altitude(),
                 'subvalues': None,
                 'unit': 'mm',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletBarometerV2.CALLBACK_ALTITUDE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_altitude_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Temperature',
                 'getter': lambda device: device.get_temperature(),
                 'subvalues': None,
                 'unit': '°C/100',
-                'advanced': True
+                'advanced': True,
+                'callback_id': BrickletBarometerV2.CALLBACK_TEMPERATURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_temperature_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -2213,21 +2237,27 @@ if BrickletCO2V2_found:
                 'getter': lambda device: device.get_co2_concentration(),
                 'subvalues': None,
                 'unit': 'ppm',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletCO2V2.CALLBACK_CO2_CONCENTRATION,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_co2_concentration_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Temperature',
                 'getter': lambda device: device.get_temperature(),
                 'subvalues': None,
                 'unit': '°C/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletCO2V2.CALLBACK_TEMPERATURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_temperature_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Humidity',
                 'getter': lambda device: device.get_humidity(),
                 'subvalues': None,
                 'unit': '%RH/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletCO2V2.CALLBACK_HUMIDITY,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_humidity_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'All Values',
@@ -2634,7 +2664,17 @@ if BrickletEnergyMonitor_found:
             }
         ],
         'options_setter': None,
-        'options': None
+        'options': None,
+        'streams': [
+            {
+                'name': 'Waveform',
+                'callback_id': None,
+                'getter': lambda device: device.get_waveform(),
+                'enabler': None,
+                'format': 'h',
+                'channels': ['Voltage', 'Current']
+            }
+        ]
     }
 if BrickletGPS_found:
     device_specs[BrickletGPS.DEVICE_DISPLAY_NAME] = {
@@ -2896,14 +2936,18 @@ if BrickletHumidityV2_found:
                 'getter': lambda device: device.get_humidity(),
                 'subvalues': None,
                 'unit': '%RH/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletHumidityV2.CALLBACK_HUMIDITY,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_humidity_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Temperature',
                 'getter': lambda device: device.get_temperature(),
                 'subvalues': None,
                 'unit': '°C/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletHumidityV2.CALLBACK_TEMPERATURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_temperature_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -3168,7 +3212,10 @@ if BrickletIndustrialDigitalIn4V2_found:
                 'getter': lambda device: device.get_value(),
                 'subvalues': ['Channel0', 'Channel1', 'Channel2', 'Channel3'],
                 'unit': [None, None, None, None],
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletIndustrialDigitalIn4V2.CALLBACK_ALL_VALUE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_all_value_callback_configuration(period, value_has_to_change),
+                'callback_converter': lambda changed, value: value
             },
             {
                 'name': 'Edge Count (Channel0)',
@@ -5721,6 +5768,16 @@ if BrickletSoundPressureLevel_found:
                            ('ITU R 468', BrickletSoundPressureLevel.WEIGHTING_ITU_R_468)],
                 'default': 'A'
             }
+        ],
+        'streams': [
+            {
+                'name': 'Spectrum',
+                'callback_id': BrickletSoundPressureLevel.CALLBACK_SPECTRUM,
+                'getter': None,
+                'enabler': lambda device, enable: device.set_spectrum_callback_configuration(1 if enable else 0),
+                'format': 'H',
+                'channels': ['Spectrum']
+            }
         ]
     }
 if BrickletTemperature_found:
@@ -5755,7 +5812,9 @@ if BrickletTemperatureV2_found:
                 'getter': lambda device: device.get_temperature(),
                 'subvalues': None,
                 'unit': '°C/100',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletTemperatureV2.CALLBACK_TEMPERATURE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_temperature_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -5781,7 +5840,18 @@ if BrickletThermalImaging_found:
             }
         ],
         'options_setter': None,
-        'options': None
+        'options': None,
+        'streams': [
+            {
+                'name': 'Temperature Image',
+                'callback_id': BrickletThermalImaging.CALLBACK_TEMPERATURE_IMAGE,
+                'getter': None,
+                'enabler': lambda device, enable: device.set_image_transfer_config(BrickletThermalImaging.IMAGE_TRANSFER_CALLBACK_TEMPERATURE_IMAGE if enable else \
+                                                                                   BrickletThermalImaging.IMAGE_TRANSFER_MANUAL_TEMPERATURE_IMAGE),
+                'format': 'H',
+                'channels': ['Temperature']
+            }
+        ]
     }
 if BrickletThermocouple_found:
     device_specs[BrickletThermocouple.DEVICE_DISPLAY_NAME] = {
@@ -6150,21 +6220,27 @@ if BrickletVoltageCurrentV2_found:
                 'getter': lambda device: device.get_voltage(),
                 'subvalues': None,
                 'unit': 'mV',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletVoltageCurrentV2.CALLBACK_VOLTAGE,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_voltage_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Current',
                 'getter': lambda device: device.get_current(),
                 'subvalues': None,
                 'unit': 'mA',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletVoltageCurrentV2.CALLBACK_CURRENT,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_current_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Power',
                 'getter': lambda device: device.get_power(),
                 'subvalues': None,
                 'unit': 'mW',
-                'advanced': False
+                'advanced': False,
+                'callback_id': BrickletVoltageCurrentV2.CALLBACK_POWER,
+                'callback_configurer': lambda device, period, value_has_to_change: device.set_power_callback_configuration(period, value_has_to_change, 'x', 0, 0)
             },
             {
                 'name': 'Chip Temperature',
@@ -7150,6 +7226,8 @@ class DeviceImpl(AbstractDevice):
     A SimpleDevice is every device, which only has funtion with one return value.
     """
 
+    AGGREGATION_CHECK_INTERVAL = 1 # seconds, how often expired aggregation windows are written
+
     def __init__(self, data, datalogger):
         super().__init__(data, datalogger)
 
@@ -7161,15 +7239,81 @@ class DeviceImpl(AbstractDevice):
 
         self.__name__ = "devices:" + str(self.device_name)
 
+        self.aggregators = {}
+
+        for value_name, value in self.data['values'].items():
+            aggregation = value.get('aggregation')
+
+            if aggregation != None and aggregation.get('window', 0) > 0:
+                self.aggregators[value_name] = WindowAggregator(aggregation['window'],
+                                                                self._format_timestamp,
+                                                                aggregation.get('functions'))
+
+        self.deadbands = {}
+        self.callback_var_names = set() # values that use value-has-to-change callbacks if possible
+        self.active_callback_var_names = set() # values whose callbacks are currently configured
+
+        for value_spec in self.device_spec['values']:
+            value = self.data['values'].get(value_spec['name'])
+
+            if value == None:
+                continue
+
+            deadband = value.get('deadband')
+
+            if deadband == None:
+                continue
+
+            self.deadbands[value_spec['name']] = Deadband(deadband.get('mode', Deadband.MODE_ABSOLUTE),
+                                                          deadband.get('threshold', 0),
+                                                          deadband.get('max_silence', 0))
+
+            if value_spec.get('callback_id') != None and value['interval'] > 0 and value.get('group') == None:
+                self.callback_var_names.add(value_spec['name'])
+                self.device.register_callback(value_spec['callback_id'], functools.partial(self._callback, value_spec['name']))
+
+        self.stream_writers = {} # stream name -> StreamWriter
+        self.active_stream_names = set() # callback streams that are currently enabled
+
+        for stream_spec in self.device_spec.get('streams', []):
+            stream = self.data.get('streams', {}).get(stream_spec['name'])
+
+            if stream == None:
+                continue
+
+            self.stream_writers[stream_spec['name']] = StreamWriter(stream['file_name'],
+                                                                    stream_spec['format'],
+                                                                    len(stream_spec['channels']))
+
+            if stream_spec['callback_id'] != None:
+                self.device.register_callback(stream_spec['callback_id'], functools.partial(self._stream_callback, stream_spec['name']))
+
     def start_timer(self):
         AbstractDevice.start_timer(self)
 
         for value in self.data['values']:
             interval = self.data['values'][value]['interval']
+            group_name = self.data['values'][value].get('group')
             func_name = "_timer"
             var_name = value
 
-            self.datalogger.timers.append(LoggerTimer(interval, func_name, var_name, self))
+            if group_name != None and interval > 0:
+                self.datalogger.get_sampling_group(group_name, interval).add_value(self, var_name)
+            else:
+                self.datalogger.timers.append(LoggerTimer(interval, func_name, var_name, self, self.datalogger.metrics))
+
+        for stream_name, stream_writer in self.stream_writers.items():
+            stream_writer.start()
+
+            if self._get_stream_spec(stream_name)['getter'] != None:
+                interval = self.data['streams'][stream_name]['interval']
+
+                self.datalogger.timers.append(LoggerTimer(interval, "_stream_timer", stream_name, self, self.datalogger.metrics))
+
+        if len(self.aggregators) > 0:
+            interval = min([DeviceImpl.AGGREGATION_CHECK_INTERVAL] + [aggregator.window for aggregator in self.aggregators.values()])
+
+            self.datalogger.timers.append(LoggerTimer(interval, "_aggregation_timer", None, self, self.datalogger.metrics))
 
     def apply_options(self):
         options_setter = self.device_spec['options_setter']
@@ -7200,60 +7344,269 @@ class DeviceImpl(AbstractDevice):
                 EventLogger.warning('Could not apply options for "{0}" with UID "{1}": {2}'
                                     .format(self.device_name, self.device_uid, e))
 
+        self.apply_callback_configurations()
+        self.apply_stream_configurations()
+
+    def apply_callback_configurations(self):
+        """
+        Configures value-has-to-change callbacks for all values with a deadband
+        that support them. Values whose callback cannot be configured, e.g. due
+        to old firmware, fall back to polling.
+        """
+        for value_spec in self.device_spec['values']:
+            var_name = value_spec['name']
+
+            if var_name not in self.callback_var_names:
+                continue
+
+            period = max(int(round(self.data['values'][var_name]['interval'] * 1000)), 1)
+
+            try:
+                value_spec['callback_configurer'](self.device, period, True)
+            except Exception as e:
+                if var_name in self.active_callback_var_names:
+                    self.active_callback_var_names.discard(var_name)
+
+                EventLogger.warning('Could not configure callback for value "{0}" of "{1}" with UID "{2}", polling instead: {3}'
+                                    .format(var_name, self.device_name, self.device_uid, e))
+            else:
+                self.active_callback_var_names.add(var_name)
+
+    def apply_stream_configurations(self):
+        """
+        Enables the callbacks of all configured callback streams.
+        """
+        for stream_name in self.stream_writers:
+            stream_spec = self._get_stream_spec(stream_name)
+
+            if stream_spec['enabler'] == None:
+                continue
+
+            try:
+                stream_spec['enabler'](self.device, True)
+            except Exception as e:
+                self.active_stream_names.discard(stream_name)
+
+                EventLogger.warning('Could not enable stream "{0}" of "{1}" with UID "{2}": {3}'
+                                    .format(stream_name, self.device_name, self.device_uid, e))
+            else:
+                self.active_stream_names.add(stream_name)
+
+    def stop_streams(self):
+        """
+        Disables all stream callbacks and closes the stream files of this device.
+        """
+        for stream_name, stream_writer in self.stream_writers.items():
+            if stream_name in self.active_stream_names:
+                self.active_stream_names.discard(stream_name)
+
+                try:
+                    self._get_stream_spec(stream_name)['enabler'](self.device, False)
+                except:
+                    pass
+
+            stream_writer.close()
+
+    def get_stream_stats(self):
+        return {stream_name: stream_writer.get_stats() for stream_name, stream_writer in self.stream_writers.items()}
+
+    def stop_callbacks(self):
+        """
+        Disables all value-has-to-change callbacks configured by this device.
+        """
+        for value_spec in self.device_spec['values']:
+            if value_spec['name'] not in self.active_callback_var_names:
+                continue
+
+            self.active_callback_var_names.discard(value_spec['name'])
+
+            try:
+                value_spec['callback_configurer'](self.device, 0, False)
+            except:
+                pass
+
+    def get_lines_per_second(self):
+        """
+        Returns the number of lines per second this device is expected to log,
+        ignoring deadbands.
+        """
+        lines_per_second = 0.0
+
+        for value_spec in self.device_spec['values']:
+            value = self.data['values'].get(value_spec['name'])
+
+            if value == None or value['interval'] <= 0:
+                continue
+
+            if value_spec['subvalues'] == None:
+                lines = 1
+            else:
+                lines = len([subvalue for subvalue in value.get('subvalues', {}).values() if subvalue])
+
+            aggregator = self.aggregators.get(value_spec['name'])
+
+            if aggregator != None:
+                lines_per_second += lines * len(aggregator.functions) / aggregator.window
+            else:
+                lines_per_second += lines / value['interval']
+
+        return lines_per_second
+
+    def flush(self):
+        """
+        Writes the statistics of all pending aggregation windows.
+        """
+        for aggregator in self.aggregators.values():
+            for csv_data in aggregator.flush():
+                self.datalogger.add_to_queue(csv_data)
+
+    def _aggregation_timer(self, _var_name):
+        """
+        This function is used by the LoggerTimer to write aggregation windows
+        that ended without new data arriving.
+        """
+        now = time.time()
+
+        for aggregator in self.aggregators.values():
+            for csv_data in aggregator.flush_expired(now):
+                self.datalogger.add_to_queue(csv_data)
+
+    def _format_timestamp(self, now):
+        return timestamp_to_format(now,
+                                   self.datalogger._config['data']['time_format'],
+                                   self.datalogger._config['data']['time_format_strftime'])
+
+    def _add_to_queue(self, var_name, now, csv_data):
+        """
+        Passes logged data through the deadband and the aggregator of the value,
+        if any, to the data logger.
+        """
+        deadband = self.deadbands.get(var_name)
+
+        if deadband != None and not deadband.check(csv_data.var_name, csv_data.raw_data):
+            return
+
+        csv_data.unix_timestamp = now
+
+        aggregator = self.aggregators.get(var_name)
+
+        if aggregator == None:
+            self.datalogger.add_to_queue(csv_data)
+        else:
+            for aggregated_csv_data in aggregator.add(now, csv_data):
+                self.datalogger.add_to_queue(aggregated_csv_data)
+
+    def _get_stream_spec(self, stream_name):
+        for candidate in self.device_spec.get('streams', []):
+            if candidate['name'] == stream_name:
+                return candidate
+
+        return None
+
+    def _stream_callback(self, stream_name, samples):
+        """
+        This function is called by the stream callbacks and passes the samples
+        directly to the stream file.
+        """
+        if stream_name not in self.active_stream_names:
+            return
+
+        # this runs in the callback thread of the IP connection, an exception
+        # would end it and stop all other callbacks as well
+        try:
+            self.stream_writers[stream_name].put(time.time(), samples)
+        except Exception as e:
+            EventLogger.warning('Could not write stream "{0}" of "{1}" with UID "{2}": {3}'
+                                .format(stream_name, self.device_name, self.device_uid, e))
+
+    def _stream_timer(self, stream_name):
+        """
+        This function is used by the LoggerTimer to poll streams without a callback.
+        """
+        now = time.time()
+        request_timestamp = time.monotonic()
+
+        try:
+            samples = self._get_stream_spec(stream_name)['getter'](self.device)
+        except Exception as e:
+            EventLogger.warning('Could not read stream "{0}" of "{1}" with UID "{2}": {3}'
+                                .format(stream_name, self.device_name, self.device_uid, e))
+            return
+        finally:
+            self.datalogger.metrics.add_getter_latency(self.device_uid, time.monotonic() - request_timestamp)
+
+        self.stream_writers[stream_name].put(now, samples)
+
+    def _get_value_spec(self, var_name):
+        for candidate in self.device_spec['values']:
+            if candidate['name'] == var_name:
+                return candidate
+
+        return None
+
     def _timer(self, var_name):
         """
         This function is used by the LoggerTimer to get the variable values from the brickd.
         In SimpleDevices the get-functions only return one value.
         """
 
-        value_spec = None
+        value_spec = self._get_value_spec(var_name)
 
-        for candidate in self.device_spec['values']:
-            if candidate['name'] == var_name:
-                value_spec = candidate
-                break
+        # changes are reported by the callback, only poll for the heartbeat
+        if var_name in self.active_callback_var_names:
+            deadband = self.deadbands[var_name]
+
+            if deadband.max_silence == 0 or deadband.get_silence() < deadband.max_silence:
+                return
 
         getter = value_spec['getter']
-        subvalue_names = value_spec['subvalues']
-        unit = value_spec['unit']
         now = time.time()
-        time_format = self.datalogger._config['data']['time_format']
-        time_format_strftime = self.datalogger._config['data']['time_format_strftime']
-
-        if time_format == 'de':
-            timestamp = timestamp_to_de(now)
-        elif time_format == 'de-msec':
-            timestamp = timestamp_to_de_msec(now)
-        elif time_format == 'us':
-            timestamp = timestamp_to_us(now)
-        elif time_format == 'us-msec':
-            timestamp = timestamp_to_us_msec(now)
-        elif time_format == 'iso':
-            timestamp = timestamp_to_iso(now)
-        elif time_format == 'iso-msec':
-            timestamp = timestamp_to_iso_msec(now)
-        elif time_format == 'unix':
-            timestamp = timestamp_to_unix(now)
-        elif time_format == 'unix-msec':
-            timestamp = timestamp_to_unix_msec(now)
-        elif time_format == 'strftime':
-            timestamp = timestamp_to_strftime(now, time_format_strftime)
-        else:
-            timestamp = timestamp_to_unix(now)
+        request_timestamp = time.monotonic()
 
         try:
             value = getter(self.device)
         except Exception as e:
-            value = self._exception_msg(self.device_name + "-" + var_name, e)
-            self.datalogger.add_to_queue(CSVData(timestamp,
-                                                 self.device_name,
-                                                 self.device_uid,
-                                                 var_name,
-                                                 value,
-                                                 ''))
-            # log_exception(timestamp, value_name, e)
+            self._log_exception(var_name, now, e)
+            return
+        finally:
+            self.datalogger.metrics.add_getter_latency(self.device_uid, time.monotonic() - request_timestamp)
+
+        self._log_value(var_name, value_spec, now, value)
+
+    def _log_exception(self, var_name, now, e):
+        value = self._exception_msg(self.device_name + "-" + var_name, e)
+        self._add_to_queue(var_name, now, CSVData(self._format_timestamp(now),
+                                                  self.device_name,
+                                                  self.device_uid,
+                                                  var_name,
+                                                  value,
+                                                  ''))
+
+    def _callback(self, var_name, *args):
+        """
+        This function is called by the value-has-to-change callbacks and logs the
+        reported value the same way as a polled value.
+        """
+        if var_name not in self.active_callback_var_names:
             return
 
+        value_spec = self._get_value_spec(var_name)
+        converter = value_spec.get('callback_converter')
+
+        if converter != None:
+            value = converter(*args)
+        elif len(args) == 1:
+            value = args[0]
+        else:
+            value = args
+
+        self._log_value(var_name, value_spec, time.time(), value)
+
+    def _log_value(self, var_name, value_spec, now, value):
+        subvalue_names = value_spec['subvalues']
+        unit = value_spec['unit']
+        timestamp = self._format_timestamp(now)
+
         if not isinstance(value, dict):
             value = {None: value}
 
@@ -7270,12 +7623,12 @@ class DeviceImpl(AbstractDevice):
                     else:
                         keyed_var_name = var_name
 
-                    self.datalogger.add_to_queue(CSVData(timestamp,
-                                                         self.device_name,
-                                                         self.device_uid,
-                                                         keyed_var_name,
-                                                         keyed_value,
-                                                         unit_str))
+                    self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                              self.device_name,
+                                                              self.device_uid,
+                                                              keyed_var_name,
+                                                              keyed_value,
+                                                              unit_str))
             else:
                 subvalue_bool = self.data['values'][var_name]['subvalues']
 
@@ -7294,20 +7647,20 @@ class DeviceImpl(AbstractDevice):
                                     else:
                                         unit_str = unit[i]
 
-                                    self.datalogger.add_to_queue(CSVData(timestamp,
-                                                                         self.device_name,
-                                                                         self.device_uid,
-                                                                         keyed_var_name + "-" + subvalue_names[i],
-                                                                         keyed_value[i],
-                                                                         unit_str))
+                                    self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                                              self.device_name,
+                                                                              self.device_uid,
+                                                                              keyed_var_name + "-" + subvalue_names[i],
+                                                                              keyed_value[i],
+                                                                              unit_str))
                             except Exception as e:
                                 err_value = self._exception_msg(self.device_name + "-" + keyed_var_name, e)
-                                self.datalogger.add_to_queue(CSVData(timestamp,
-                                                                     self.device_name,
-                                                                     self.device_uid,
-                                                                     keyed_var_name + "-" + subvalue_names[i],
-                                                                     err_value,
-                                                                     ''))
+                                self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                                          self.device_name,
+                                                                          self.device_uid,
+                                                                          keyed_var_name + "-" + subvalue_names[i],
+                                                                          err_value,
+                                                                          ''))
                                 return
                         else:
                             for k in range(len(subvalue_names[i])):
@@ -7318,27 +7671,126 @@ class DeviceImpl(AbstractDevice):
                                         else:
                                             unit_str = unit[i][k]
 
-                                        self.datalogger.add_to_queue(CSVData(timestamp,
-                                                                             self.device_name,
-                                                                             self.device_uid,
-                                                                             keyed_var_name + "-" + subvalue_names[i][k],
-                                                                             keyed_value[i][k],
-                                                                             unit_str))
+                                        self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                                                  self.device_name,
+                                                                                  self.device_uid,
+                                                                                  keyed_var_name + "-" + subvalue_names[i][k],
+                                                                                  keyed_value[i][k],
+                                                                                  unit_str))
                                 except Exception as e:
                                     err_value = self._exception_msg(str(self.device_name) + "-" + keyed_var_name, e)
-                                    self.datalogger.add_to_queue(CSVData(timestamp,
-                                                                         self.device_name,
-                                                                         self.device_uid,
-                                                                         keyed_var_name + "-" + subvalue_names[i][k],
-                                                                         err_value,
-                                                                         ''))
+                                    self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                                              self.device_name,
+                                                                              self.device_uid,
+                                                                              keyed_var_name + "-" + subvalue_names[i][k],
+                                                                              err_value,
+                                                                              ''))
                                     return
 
         except Exception as e:
             err_value = self._exception_msg(self.device_name + "-" + var_name, e)
-            self.datalogger.add_to_queue(CSVData(timestamp,
-                                                 self.device_name,
-                                                 self.device_uid,
-                                                 var_name,
-                                                 err_value,
-                                                 ''))
+            self._add_to_queue(var_name, now, CSVData(timestamp,
+                                                      self.device_name,
+                                                      self.device_uid,
+                                                      var_name,
+                                                      err_value,
+                                                      ''))
+
+
+#---------------------------------------------------------------------------
+#                               SamplingGroup
+#---------------------------------------------------------------------------
+
+class SamplingGroup:
+    """
+    A SamplingGroup polls values of several devices in one timer tick. The
+    getters of different devices are called concurrently, so their requests
+    are in flight at the same time instead of one after the other. All values
+    of a tick get the same acquisition timestamp and the spread between the
+    first request and the last response is logged as an extra value.
+    """
+
+    MAX_WORKERS = 16
+
+    def __init__(self, name, interval, datalogger):
+        self.name = name
+        self.interval = interval
+        self.datalogger = datalogger
+        self.lanes = {} # DeviceImpl -> [var_name, ...], the values of one device are polled in order
+        self.executor = None
+        self.tick_count = 0
+        self.max_spread = 0.0
+
+    def add_value(self, loggable_device, var_name):
+        self.lanes.setdefault(loggable_device, []).append(var_name)
+
+    def stop(self):
+        if self.executor != None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        if self.tick_count > 0:
+            EventLogger.debug('Sampling group "{0}" polled {1} times with a maximum spread of {2:.3f} ms'
+                              .format(self.name, self.tick_count, self.max_spread * 1000.0))
+
+    def _poll_lane(self, loggable_device, var_names):
+        results = []
+
+        for var_name in var_names:
+            value_spec = loggable_device._get_value_spec(var_name)
+            request_timestamp = time.monotonic()
+
+            try:
+                value = value_spec['getter'](loggable_device.device)
+            except Exception as e:
+                results.append((var_name, value_spec, e, True))
+            else:
+                results.append((var_name, value_spec, value, False))
+
+            self.datalogger.metrics.add_getter_latency(loggable_device.device_uid, time.monotonic() - request_timestamp)
+
+        return results, time.monotonic()
+
+    def _tick(self, group_name):
+        """
+        This function is used by the LoggerTimer to poll all values of the group.
+        """
+        if self.executor == None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(len(self.lanes), SamplingGroup.MAX_WORKERS),
+                                                                  thread_name_prefix='SamplingGroup-' + self.name)
+
+        now = time.time()
+        first_request = time.monotonic()
+        futures = []
+
+        for loggable_device, var_names in self.lanes.items():
+            futures.append((loggable_device, self.executor.submit(self._poll_lane, loggable_device, var_names)))
+
+        last_response = first_request
+        lane_results = []
+
+        for loggable_device, future in futures:
+            results, response_timestamp = future.result()
+            last_response = max(last_response, response_timestamp)
+            lane_results.append((loggable_device, results))
+
+        spread = last_response - first_request
+        self.tick_count += 1
+        self.max_spread = max(self.max_spread, spread)
+
+        for loggable_device, results in lane_results:
+            for var_name, value_spec, value, failed in results:
+                if failed:
+                    loggable_device._log_exception(var_name, now, value)
+                else:
+                    loggable_device._log_value(var_name, value_spec, now, value)
+
+        self.datalogger.add_to_queue(CSVData(timestamp_to_format(now,
+                                                                 self.datalogger._config['data']['time_format'],
+                                                                 self.datalogger._config['data']['time_format_strftime']),
+                                             'Sampling Group',
+                                             self.name,
+                                             'Spread',
+                                             round(spread * 1000.0, 3),
+                                             'ms',
+                                             now))
@@ -28,7 +28,7 @@ import functools
 import logging
 from datetime import datetime
 
-from PyQt5.QtCore import Qt, QRegExp, QVariant, QModelIndex, QAbstractTableModel
+from PyQt5.QtCore import Qt, QRegExp, QVariant, QModelIndex, QAbstractTableModel, QTimer
 from PyQt5.QtWidgets import QDialog, QMessageBox, QLineEdit, QSpinBox, QCheckBox, QComboBox, \
                         QHBoxLayout, QWidget
 from PyQt5.QtGui import QPalette, QStandardItemModel, QStandardItem, QRegExpValidator, QIcon, QColor, QTextCursor
@@ -84,47 +84,79 @@ class IntervalWidget(QWidget):
             return self.spinbox.value() / 1000.0
 
 class DataModel(QAbstractTableModel):
+    """
+    Fixed-capacity ring buffer of the most recent rows. New rows are added
+    in batches, once the buffer is full the oldest rows are overwritten.
+    """
+
+    CAPACITY = 1000
+
     def __init__(self, parent):
         super().__init__(parent)
 
-        self.row_data = []
+        self.row_data = [None] * DataModel.CAPACITY
+        self.row_start = 0 # index of the oldest row in row_data
+        self.row_count = 0
         self.next_row_header = 1
-        self.row_header = []
         self.column_header = ['Time', 'Name', 'UID', 'Var', 'Raw', 'Unit']
 
-    def appendRow(self, row_data):
-        self.beginInsertRows(QModelIndex(), len(self.row_data) + 1, len(self.row_data) + 1)
-
-        self.row_data.append(row_data)
-        self.row_header.append(str(self.next_row_header))
+    def appendRows(self, rows):
+        if len(rows) == 0:
+            return
 
-        self.next_row_header += 1
+        if len(rows) > DataModel.CAPACITY:
+            self.next_row_header += len(rows) - DataModel.CAPACITY
+            rows = rows[-DataModel.CAPACITY:]
 
-        self.endInsertRows()
+        free = DataModel.CAPACITY - self.row_count
 
-    def removeRow(self, index):
-        if index < 0 or index >= len(self.row_data):
+        if len(rows) <= free:
+            self.beginInsertRows(QModelIndex(), self.row_count, self.row_count + len(rows) - 1)
+            self._store_rows(rows)
+            self.endInsertRows()
             return
 
-        self.beginRemoveRows(QModelIndex(), index, index)
+        if free > 0:
+            self.beginInsertRows(QModelIndex(), self.row_count, DataModel.CAPACITY - 1)
+            self._store_rows(rows[:free])
+            self.endInsertRows()
 
-        self.row_data.pop(index)
-        self.row_header.pop(index)
+            rows = rows[free:]
 
-        self.endRemoveRows()
+        # the buffer is full, so the row count stays the same and every
+        # visible row moves up. report this as one change of all rows
+        self._store_rows(rows)
+
+        self.dataChanged.emit(self.index(0, 0), self.index(DataModel.CAPACITY - 1, len(self.column_header) - 1))
+        self.headerDataChanged.emit(Qt.Vertical, 0, DataModel.CAPACITY - 1)
+
+    def _store_rows(self, rows):
+        for row in rows:
+            if self.row_count < DataModel.CAPACITY:
+                self.row_data[(self.row_start + self.row_count) % DataModel.CAPACITY] = row
+                self.row_count += 1
+            else:
+                self.row_data[self.row_start] = row
+                self.row_start = (self.row_start + 1) % DataModel.CAPACITY
+
+            self.next_row_header += 1
 
     def clear(self):
-        if len(self.row_data) == 0:
+        if self.row_count == 0:
             return
 
-        self.beginRemoveRows(QModelIndex(), 0, len(self.row_data) - 1)
+        self.beginRemoveRows(QModelIndex(), 0, self.row_count - 1)
 
-        self.row_data = []
+        self.row_data = [None] * DataModel.CAPACITY
+        self.row_start = 0
+        self.row_count = 0
         self.next_row_header = 1
-        self.row_header = []
 
         self.endRemoveRows()
 
+    def _get_row(self, row_index):
+        return self.row_data[(self.row_start + row_index) % DataModel.CAPACITY]
+
     # override QAbstractItemModel.data
     def data(self, index, role=Qt.DisplayRole):
         if role != Qt.DisplayRole:
@@ -135,15 +167,16 @@ class DataModel(QAbstractTableModel):
 
         row_index = index.row()
 
-        if row_index < 0 or row_index >= len(self.row_data):
+        if row_index < 0 or row_index >= self.row_count:
             return QVariant()
 
+        row = self._get_row(row_index)
         column_index = index.column()
 
-        if column_index < 0 or column_index >= len(self.row_data[row_index]):
+        if column_index < 0 or column_index >= len(row):
             return QVariant()
 
-        return QVariant(self.row_data[row_index][column_index])
+        return QVariant(row[column_index])
 
     # override QAbstractTableModel.headerData
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -156,10 +189,10 @@ class DataModel(QAbstractTableModel):
 
             return QVariant(self.column_header[section])
         elif orientation == Qt.Vertical:
-            if section < 0 or section >= len(self.row_header):
+            if section < 0 or section >= self.row_count:
                 return QVariant()
 
-            return QVariant(self.row_header[section])
+            return QVariant(str(self.next_row_header - self.row_count + section))
         else:
             return QVariant()
 
@@ -168,7 +201,7 @@ class DataModel(QAbstractTableModel):
         if parent.isValid():
             return 0
 
-        return len(self.row_data)
+        return self.row_count
 
     # override QAbstractTableModel.columnCount
     def columnCount(self, parent=QModelIndex()):
@@ -194,6 +227,8 @@ class SetupDialog(QDialog, Ui_SetupDialog):
         self.tab_debug_warning = False
         self.device_dialog = None
         self.last_host_index = -1
+        self.data_network_config = {'enabled': False} # no widgets yet, keep the loaded section
+        self.debug_metrics_config = {'enabled': False, 'host': '127.0.0.1', 'port': 4280} # no widgets yet, keep the loaded section
 
         self.setupUi(self)
 
@@ -251,6 +286,17 @@ class SetupDialog(QDialog, Ui_SetupDialog):
         self.combo_debug_time_format.addItem(utils.timestamp_to_iso(self.example_timestamp) + ' (ISO 8601)', 'iso')
         self.combo_debug_time_format.addItem(utils.timestamp_to_unix(self.example_timestamp) + ' (Unix)', 'unix')
 
+        self.combo_queue_policy.addItem('Block (Delay Timers)', utils.DataQueue.POLICY_BLOCK)
+        self.combo_queue_policy.addItem('Drop Oldest Data', utils.DataQueue.POLICY_DROP_OLDEST)
+        self.combo_queue_policy.addItem('Drop Newest Data', utils.DataQueue.POLICY_DROP_NEWEST)
+        self.combo_queue_policy.setCurrentIndex(0) # block
+
+        self.spin_queue_size.setValue(utils.DataQueue.DEFAULT_MAX_SIZE)
+
+        self.queue_stats_timer = QTimer(self)
+        self.queue_stats_timer.setInterval(1000)
+        self.queue_stats_timer.timeout.connect(self.update_queue_stats)
+
         self.combo_log_level.addItem('Debug', 'debug')
         self.combo_log_level.addItem('Info', 'info')
         self.combo_log_level.addItem('Warning', 'warning')
@@ -346,7 +392,7 @@ class SetupDialog(QDialog, Ui_SetupDialog):
 
             self._gui_job = GuiDataJob(name="GuiData-Writer")
 
-            self._gui_job.signalNewData.connect(self.table_add_row)
+            self._gui_job.signalNewData.connect(self.table_add_rows)
 
             self.data_logger_thread = main.main(None, GuiConfigHandler.create_config(self), self._gui_job, None, None, None)
 
@@ -357,15 +403,19 @@ class SetupDialog(QDialog, Ui_SetupDialog):
                 self.tab_setup.setEnabled(False)
                 self.tab_widget.setCurrentIndex(self.tab_widget.indexOf(self.tab_data))
                 self.tab_reset_warning()
+                self.queue_stats_timer.start()
 
     def _reset_stop(self):
+        self.update_queue_stats()
+        self.queue_stats_timer.stop()
+
         self.tab_devices.setEnabled(True)
         self.tab_setup.setEnabled(True)
         self.btn_start_logging.setText("Start Logging")
         self.btn_start_logging.setIcon(QIcon(load_pixmap('data_logger/start-icon.png')))
 
 
-        self._gui_job.signalNewData.disconnect(self.table_add_row)
+        self._gui_job.signalNewData.disconnect(self.table_add_rows)
         self.data_logger_thread = None
         self._gui_job = None
 
@@ -562,9 +612,13 @@ class SetupDialog(QDialog, Ui_SetupDialog):
         self.edit_data_time_format_strftime.setText(config['data']['time_format_strftime'])
         self.check_data_to_csv_file.setChecked(config['data']['csv']['enabled'])
         self.edit_csv_file_name.setText(config['data']['csv']['file_name'])
+        self.data_network_config = config['data']['network']
+        self.spin_queue_size.setValue(config['data']['queue']['size'])
+        self.combo_queue_policy.setCurrentIndex(max(self.combo_queue_policy.findData(config['data']['queue']['policy']), 0))
 
         self.combo_debug_time_format.setCurrentIndex(max(self.combo_debug_time_format.findData(config['debug']['time_format']), 0))
         self.check_debug_to_log_file.setChecked(config['debug']['log']['enabled'])
+        self.debug_metrics_config = config['debug']['metrics']
         self.edit_log_file_name.setText(config['debug']['log']['file_name'])
         self.combo_log_level.setCurrentIndex(max(self.combo_debug_time_format.findData(config['debug']['log']['level']), 0))
 
@@ -601,6 +655,9 @@ class SetupDialog(QDialog, Ui_SetupDialog):
 
         self.tree_devices.setIndexWidget(uid_item.index(), edit_uid)
 
+        if 'streams' in device: # no widgets yet, keep the loaded streams
+            name_item.setData(device['streams'], Qt.UserRole)
+
         value_specs = device_specs[device['name']]['values']
         parent_item = QStandardItem('Values')
 
@@ -614,6 +671,15 @@ class SetupDialog(QDialog, Ui_SetupDialog):
 
             parent_item.appendRow([value_name_item, value_interval_item])
 
+            # keep settings that have no widget (e.g. aggregation) to write them back into the config
+            extra_settings = {}
+
+            for key, setting in device['values'][value_spec['name']].items():
+                if key not in ['interval', 'subvalues']:
+                    extra_settings[key] = setting
+
+            value_name_item.setData(extra_settings, Qt.UserRole)
+
             spinbox_interval = IntervalWidget()
             spinbox_interval.set_interval(device['values'][value_spec['name']]['interval'])
 
@@ -690,20 +756,37 @@ class SetupDialog(QDialog, Ui_SetupDialog):
             self.tab_set(self.tab_widget.indexOf(self.tab_debug), QColor(255, 0, 0),
                          get_resources_path("warning-icon-16.png"))
 
-    def table_add_row(self, csv_data):
+    def update_queue_stats(self):
+        """
+            Shows the fill level and drop count of the GUI and CSV data queues.
+        """
+        if self.data_logger_thread is None:
+            return
+
+        texts = []
+
+        for name, stats in sorted(self.data_logger_thread.get_queue_stats().items()):
+            if stats['max_size'] > 0:
+                text = '{0}: {1}/{2} queued'.format(name, stats['depth'], stats['max_size'])
+            else:
+                text = '{0}: {1} queued'.format(name, stats['depth'])
+
+            if stats['dropped'] > 0:
+                text += ', <font color="red">{0} dropped</font>'.format(stats['dropped'])
+
+            texts.append(text)
+
+        if len(texts) > 0:
+            self.label_queue_stats.setText('; '.join(texts))
+
+    def table_add_rows(self, csv_data_list):
         """
             SIGNAL function:
-            Adds new CSV Data into the Table.
+            Adds a batch of new CSV Data into the Table.
         """
-        row_count = self.model_data.rowCount()
-
-        while row_count >= 1000:
-            self.model_data.removeRow(0)
-            row_count = self.model_data.rowCount()
-
-        self.model_data.appendRow([csv_data.timestamp,
-                                   csv_data.name,
-                                   csv_data.uid,
-                                   csv_data.var_name,
-                                   str(csv_data.raw_data),
-                                   csv_data.var_unit])
+        self.model_data.appendRows([(csv_data.timestamp,
+                                     csv_data.name,
+                                     csv_data.uid,
+                                     csv_data.var_name,
+                                     str(csv_data.raw_data),
+                                     csv_data.var_unit) for csv_data in csv_data_list])
@@ -24,9 +24,14 @@ Boston, MA 02111-1307, USA.
 
 #### skip here for brick-logger ####
 
+import collections
 import csv  # CSV_Writer
+import http.server # MetricsServer
+import json # MetricsServer
 from datetime import datetime  # CSV_Data
 import os  # CSV_Writer
+import socket # LineProtocolWriter
+import struct # StreamWriter
 from shutil import copyfile
 import sys  # CSV_Writer
 import threading
@@ -94,6 +99,28 @@ def timestamp_to_strftime(timestamp, time_format):
     except Exception as e:
         return 'Error: ' + str(e).replace('\n', ' ')
 
+def timestamp_to_format(timestamp, time_format, time_format_strftime):
+    if time_format == 'de':
+        return timestamp_to_de(timestamp)
+    elif time_format == 'de-msec':
+        return timestamp_to_de_msec(timestamp)
+    elif time_format == 'us':
+        return timestamp_to_us(timestamp)
+    elif time_format == 'us-msec':
+        return timestamp_to_us_msec(timestamp)
+    elif time_format == 'iso':
+        return timestamp_to_iso(timestamp)
+    elif time_format == 'iso-msec':
+        return timestamp_to_iso_msec(timestamp)
+    elif time_format == 'unix':
+        return timestamp_to_unix(timestamp)
+    elif time_format == 'unix-msec':
+        return timestamp_to_unix_msec(timestamp)
+    elif time_format == 'strftime':
+        return timestamp_to_strftime(timestamp, time_format_strftime)
+    else:
+        return timestamp_to_unix(timestamp)
+
 class DataLoggerException(Exception):
     # Error Codes
     DL_MISSING_ARGUMENT = -1  # Missing Arguments in Config File
@@ -120,16 +147,18 @@ class CSVData:
     This class is used as a temporary save spot for all csv relevant data.
     """
 
-    def __init__(self, timestamp, name, uid, var_name, raw_data, var_unit):
+    def __init__(self, timestamp, name, uid, var_name, raw_data, var_unit, unix_timestamp=None):
         """
-        timestamp -- time data was
-        name      -- display name of Brick(let)
-        uid       -- UID of Brick(let)
-        var_name  -- name of logged value
-        raw_data  -- logged value
-        var_unit  -- unit of logged value
+        timestamp      -- time data was
+        name           -- display name of Brick(let)
+        uid            -- UID of Brick(let)
+        var_name       -- name of logged value
+        raw_data       -- logged value
+        var_unit       -- unit of logged value
+        unix_timestamp -- time data was as Unix timestamp, if known
         """
         self.timestamp = timestamp # datatime object
+        self.unix_timestamp = unix_timestamp
         self.name = name
         self.uid = uid
         self.var_name = var_name
@@ -157,10 +186,11 @@ class CSVData:
 class LoggerTimer:
     """This class provides a timer with a repeat functionality based on a interval"""
 
-    def __init__(self, interval, func_name, var_name, device):
+    def __init__(self, interval, func_name, var_name, device, metrics=None):
         """
         interval -- the repeat interval in seconds
         func -- the function which will be called
+        metrics -- DataLoggerMetrics object to report the timer lateness to
         """
         if interval < 0:
             interval = 0
@@ -169,6 +199,7 @@ class LoggerTimer:
         self._func_name = func_name
         self._var_name = var_name
         self._device = device
+        self._metrics = metrics
         self._enable_ref = None
         self._stop_queue = None
         self._thread = None
@@ -187,7 +218,12 @@ class LoggerTimer:
             else:
                 break
 
-            monotonic_timestamp = time.monotonic()
+            now = time.monotonic()
+
+            if self._metrics != None:
+                self._metrics.add_timer_lateness(now - monotonic_timestamp - self._interval)
+
+            monotonic_timestamp = now
 
             if not enable_ref[0]:
                 break
@@ -221,6 +257,512 @@ class LoggerTimer:
         self._stop_queue = None
         self._thread = None
 
+'''
+/*---------------------------------------------------------------------------
+                                DataLoggerMetrics
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class DataLoggerMetrics:
+    """
+    This class collects performance numbers of a running data logger, such as
+    samples per second per device, getter latencies and timer lateness.
+    """
+
+    RESERVOIR_SIZE = 1000 # number of latency samples kept for the percentiles
+    RATE_WINDOW = 10 # seconds
+
+    def __init__(self):
+        self.start_timestamp = time.monotonic()
+        self.reconnect_count = 0
+        self.expected_samples_per_second = 0.0
+
+        self._lock = threading.Lock()
+        self._sample_counts = {} # uid -> total number of samples
+        self._sample_buckets = {} # uid -> deque of [second, count]
+        self._getter_latencies = {} # uid -> deque of seconds
+        self._timer_lateness = collections.deque(maxlen=DataLoggerMetrics.RESERVOIR_SIZE)
+        self._timer_lateness_max = 0.0
+
+    def add_sample(self, uid):
+        second = int(time.monotonic())
+
+        with self._lock:
+            self._sample_counts[uid] = self._sample_counts.get(uid, 0) + 1
+
+            buckets = self._sample_buckets.get(uid)
+
+            if buckets == None:
+                buckets = collections.deque(maxlen=DataLoggerMetrics.RATE_WINDOW + 1)
+                self._sample_buckets[uid] = buckets
+
+            if len(buckets) > 0 and buckets[-1][0] == second:
+                buckets[-1][1] += 1
+            else:
+                buckets.append([second, 1])
+
+    def add_getter_latency(self, uid, latency):
+        with self._lock:
+            latencies = self._getter_latencies.get(uid)
+
+            if latencies == None:
+                latencies = collections.deque(maxlen=DataLoggerMetrics.RESERVOIR_SIZE)
+                self._getter_latencies[uid] = latencies
+
+            latencies.append(latency)
+
+    def add_timer_lateness(self, lateness):
+        lateness = max(lateness, 0.0)
+
+        with self._lock:
+            self._timer_lateness.append(lateness)
+            self._timer_lateness_max = max(self._timer_lateness_max, lateness)
+
+    def add_reconnect(self):
+        with self._lock:
+            self.reconnect_count += 1
+
+    def _percentiles(values):
+        if len(values) == 0:
+            return None
+
+        values = sorted(values)
+        result = {}
+
+        for name, fraction in [('p50', 0.5), ('p90', 0.9), ('p99', 0.99)]:
+            result[name] = round(values[min(int(fraction * len(values)), len(values) - 1)] * 1000.0, 3)
+
+        result['max'] = round(values[-1] * 1000.0, 3)
+
+        return result
+
+    _percentiles = staticmethod(_percentiles)
+
+    def get_snapshot(self):
+        """
+        Returns all collected numbers as a dict. Times are in milliseconds.
+        """
+        now = time.monotonic()
+        current_second = int(now)
+        devices = {}
+
+        with self._lock:
+            for uid, count in self._sample_counts.items():
+                # only count complete seconds of the rate window
+                recent = sum(bucket[1] for bucket in self._sample_buckets[uid]
+                             if current_second - DataLoggerMetrics.RATE_WINDOW <= bucket[0] < current_second)
+                window = min(DataLoggerMetrics.RATE_WINDOW, max(current_second - int(self.start_timestamp), 1))
+
+                devices[uid] = {'samples': count,
+                                'samples_per_second': round(recent / window, 3),
+                                'getter_latency': DataLoggerMetrics._percentiles(self._getter_latencies.get(uid, []))}
+
+            for uid, latencies in self._getter_latencies.items():
+                if uid not in devices:
+                    devices[uid] = {'samples': 0,
+                                    'samples_per_second': 0.0,
+                                    'getter_latency': DataLoggerMetrics._percentiles(latencies)}
+
+            timer_lateness = DataLoggerMetrics._percentiles(self._timer_lateness)
+
+            if timer_lateness != None:
+                timer_lateness['max_total'] = round(self._timer_lateness_max * 1000.0, 3)
+
+            return {'uptime': round(now - self.start_timestamp, 3),
+                    'expected_samples_per_second': round(self.expected_samples_per_second, 3),
+                    'samples_per_second': round(sum(device['samples_per_second'] for device in devices.values()), 3),
+                    'devices': devices,
+                    'timer_lateness': timer_lateness,
+                    'reconnects': self.reconnect_count}
+
+'''
+/*---------------------------------------------------------------------------
+                                MetricsServer
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class MetricsServer:
+    """
+    This class provides a local HTTP endpoint that reports the metrics of a
+    data logger as JSON on GET /metrics.
+    """
+
+    def __init__(self, host, port, get_metrics):
+        """
+        host        -- the address to listen on, should be a local address
+        port        -- the TCP port to listen on
+        get_metrics -- function that returns the metrics as a dict
+        """
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ['/', '/metrics']:
+                    self.send_error(404)
+                    return
+
+                try:
+                    body = json.dumps(get_metrics(), sort_keys=True, indent=2).encode('utf-8')
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # avoid writing every request to stderr
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(5)
+
+'''
+/*---------------------------------------------------------------------------
+                                DataQueue
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class DataQueue:
+    """
+    This class provides a bounded queue between the loggable devices and a job.
+    If the queue is full the configured policy decides what happens to the
+    new data: block the producer, drop the oldest queued data or drop the
+    new data. After the job consuming the queue ended, the queue is closed and
+    drops all new data, so producers never block on a queue nobody empties.
+    """
+
+    POLICY_BLOCK = 'block'
+    POLICY_DROP_OLDEST = 'drop-oldest'
+    POLICY_DROP_NEWEST = 'drop-newest'
+
+    POLICIES = [POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST]
+
+    DEFAULT_MAX_SIZE = 10000
+    BLOCK_CHECK_INTERVAL = 0.5 # seconds, how often a blocked producer checks if the queue got closed
+
+    def __init__(self, max_size=0, policy=POLICY_BLOCK):
+        """
+        max_size -- the maximum number of queued items, 0 means unbounded
+        policy   -- one of DataQueue.POLICIES
+        """
+        if max_size < 0:
+            max_size = 0
+
+        if policy not in DataQueue.POLICIES:
+            policy = DataQueue.POLICY_BLOCK
+
+        self.max_size = max_size
+        self.policy = policy
+        self.queued_count = 0 # total number of items accepted by the queue
+        self.dropped_count = 0 # total number of items dropped by the policy
+        self.closed = False
+
+        self._queue = queue.Queue(max_size)
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        """
+        Adds an item according to the policy.
+        Return:
+            True  - Item was queued
+            False - Item or an older item was dropped
+        """
+        if self.policy == DataQueue.POLICY_BLOCK:
+            while not self.closed:
+                try:
+                    self._queue.put(item, timeout=DataQueue.BLOCK_CHECK_INTERVAL)
+                except queue.Full:
+                    continue
+
+                with self._lock:
+                    self.queued_count += 1
+
+                return True
+
+        if self.closed:
+            with self._lock:
+                self.dropped_count += 1
+
+            return False
+
+        dropped = False
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                pass
+
+            if self.policy == DataQueue.POLICY_DROP_NEWEST:
+                with self._lock:
+                    self.dropped_count += 1
+
+                return False
+
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                continue
+
+            dropped = True
+
+            with self._lock:
+                self.dropped_count += 1
+
+        with self._lock:
+            self.queued_count += 1
+
+        return not dropped
+
+    def get(self, block=True, timeout=None):
+        return self._queue.get(block, timeout)
+
+    def close(self):
+        """
+        Drops all new data from now on and releases blocked producers.
+        """
+        self.closed = True
+
+    def empty(self):
+        return self._queue.empty()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def get_stats(self):
+        """
+        Returns a dict with the current depth and the total queued and dropped counts.
+        """
+        with self._lock:
+            return {'depth': self._queue.qsize(),
+                    'max_size': self.max_size,
+                    'policy': self.policy,
+                    'queued': self.queued_count,
+                    'dropped': self.dropped_count}
+
+'''
+/*---------------------------------------------------------------------------
+                                WindowAggregator
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class WindowAggregator:
+    """
+    This class reduces the logged data of one value to statistics over tumbling
+    windows. Windows are aligned to multiples of the window length, so a
+    60 second window always starts at a full minute. Non-numeric data such as
+    error messages is passed through unchanged.
+    """
+
+    FUNCTIONS = ['min', 'max', 'mean', 'last', 'count']
+
+    def __init__(self, window, timestamp_formatter, functions=None):
+        """
+        window              -- the window length in seconds
+        timestamp_formatter -- function that converts a Unix timestamp into the CSV time format
+        functions           -- list of statistics to output, all of FUNCTIONS by default
+        """
+        if functions == None or len(functions) == 0:
+            functions = WindowAggregator.FUNCTIONS
+
+        self.window = window
+        self.functions = [function for function in WindowAggregator.FUNCTIONS if function in functions]
+        self._timestamp_formatter = timestamp_formatter
+        self.window_start = None
+        self._stats = {} # var_name -> [name, uid, unit, min, max, sum, last, count]
+        self._lock = threading.Lock()
+
+    def add(self, now, csv_data):
+        """
+        Adds logged data. Returns a list of CSVData that is ready to be written,
+        containing the statistics of the previous window if this data started
+        a new window.
+        """
+        result = []
+        raw_data = csv_data.raw_data
+
+        with self._lock:
+            window_start = now - (now % self.window)
+
+            if self.window_start != None and window_start != self.window_start:
+                result += self._flush()
+
+            self.window_start = window_start
+
+            if not isinstance(raw_data, (int, float)):
+                result.append(csv_data)
+                return result
+
+            stats = self._stats.get(csv_data.var_name)
+
+            if stats == None:
+                self._stats[csv_data.var_name] = [csv_data.name, csv_data.uid, csv_data.var_unit,
+                                                  raw_data, raw_data, raw_data, raw_data, 1]
+            else:
+                if raw_data < stats[3]:
+                    stats[3] = raw_data
+
+                if raw_data > stats[4]:
+                    stats[4] = raw_data
+
+                stats[5] += raw_data
+                stats[6] = raw_data
+                stats[7] += 1
+
+        return result
+
+    def flush(self):
+        """
+        Returns the statistics of the current window as a list of CSVData and
+        starts a new window.
+        """
+        with self._lock:
+            return self._flush()
+
+    def flush_expired(self, now):
+        """
+        Returns the statistics of the current window as a list of CSVData if
+        the window ended before now. Otherwise a window would stay open until
+        the next data arrives, which can take long for deadband or callback
+        driven values.
+        """
+        with self._lock:
+            if self.window_start == None or now < self.window_start + self.window:
+                return []
+
+            return self._flush()
+
+    def _flush(self):
+        if self.window_start == None:
+            return []
+
+        timestamp = self._timestamp_formatter(self.window_start + self.window)
+        result = []
+
+        for var_name, stats in self._stats.items():
+            name, uid, unit, minimum, maximum, total, last, count = stats
+
+            for function in self.functions:
+                if function == 'min':
+                    value = minimum
+                elif function == 'max':
+                    value = maximum
+                elif function == 'mean':
+                    value = total / count
+                elif function == 'last':
+                    value = last
+                else:
+                    value = count
+
+                result.append(CSVData(timestamp,
+                                      name,
+                                      uid,
+                                      var_name + ' (' + function.capitalize() + ')',
+                                      value,
+                                      unit if function != 'count' else '',
+                                      self.window_start + self.window))
+
+        self.window_start = None
+        self._stats = {}
+
+        return result
+
+'''
+/*---------------------------------------------------------------------------
+                                Deadband
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class Deadband:
+    """
+    This class suppresses logged data of one value that did not change by more
+    than a threshold since it was last written. If the value was not written
+    for max_silence seconds it is written anyway as a heartbeat.
+    """
+
+    MODE_ABSOLUTE = 'absolute'
+    MODE_RELATIVE = 'relative'
+
+    MODES = [MODE_ABSOLUTE, MODE_RELATIVE]
+
+    def __init__(self, mode, threshold, max_silence=0):
+        """
+        mode        -- one of Deadband.MODES
+        threshold   -- the absolute difference or the relative difference (0.01 = 1%)
+                       that has to be exceeded, 0 means any change
+        max_silence -- the maximum time in seconds without writing the value, 0 means no heartbeat
+        """
+        if threshold < 0:
+            threshold = 0
+
+        if max_silence < 0:
+            max_silence = 0
+
+        self.mode = mode
+        self.threshold = threshold
+        self.max_silence = max_silence
+
+        self._last = {} # var_name -> [raw_data, monotonic timestamp]
+        self._lock = threading.Lock()
+
+    def check(self, var_name, raw_data):
+        """
+        Returns True if the logged data has to be written, False otherwise.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            last = self._last.get(var_name)
+
+            if last == None or self._changed(last[0], raw_data) or \
+               (self.max_silence > 0 and now - last[1] >= self.max_silence):
+                self._last[var_name] = [raw_data, now]
+                return True
+
+        return False
+
+    def get_silence(self):
+        """
+        Returns the time in seconds since the least recently written data was written.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if len(self._last) == 0:
+                return float('inf')
+
+            return now - min(last[1] for last in self._last.values())
+
+    def _changed(self, last_raw_data, raw_data):
+        if not isinstance(raw_data, (int, float)) or not isinstance(last_raw_data, (int, float)):
+            return raw_data != last_raw_data
+
+        difference = abs(raw_data - last_raw_data)
+
+        if self.mode == Deadband.MODE_RELATIVE:
+            if last_raw_data == 0:
+                return difference > 0
+
+            return difference > self.threshold * abs(last_raw_data)
+
+        return difference > self.threshold
+
 """
 /*---------------------------------------------------------------------------
                                 Utilities
@@ -334,6 +876,9 @@ class CSVWriter:
         self._raw_file = None
         self._csv_file = None
 
+        self.written_rows = 0
+        self.written_bytes = 0
+
         if max_file_size < 0:
             max_file_size = 0
         self._file_size = max_file_size
@@ -396,9 +941,14 @@ class CSVWriter:
         if self._raw_file is None or self._csv_file is None:
             return False
 
+        position = self._raw_file.tell()
+
         self._csv_file.writerow([csv_data.timestamp] + [csv_data.name] + [csv_data.uid] + [csv_data.var_name] + [str(csv_data.raw_data)] + [csv_data.var_unit])
         self._raw_file.flush()
 
+        self.written_rows += 1
+        self.written_bytes += self._raw_file.tell() - position
+
         if self._file_size > 0:
             self._rolling_file()
 
@@ -488,3 +1038,404 @@ class CSVWriter:
             EventLogger.debug("Rolling Files... copied original File into File(1)")
         os.remove(self._file_path)
         self._open_file_A()
+
+'''
+/*---------------------------------------------------------------------------
+                                LineProtocolWriter
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class LineProtocolWriter:
+    """
+    This class provides the formatting and sending functions, which are used by the NetworkWriterJob class to push
+    logged data to a time series database in InfluxDB line protocol or Graphite plaintext protocol. Lines that cannot
+    be sent are appended to a spool file and are sent first once the connection is back.
+    """
+
+    PROTOCOL_INFLUXDB = 'influxdb'
+    PROTOCOL_GRAPHITE = 'graphite'
+
+    PROTOCOLS = [PROTOCOL_INFLUXDB, PROTOCOL_GRAPHITE]
+
+    TRANSPORT_TCP = 'tcp'
+    TRANSPORT_UDP = 'udp'
+
+    TRANSPORTS = [TRANSPORT_TCP, TRANSPORT_UDP]
+
+    RECONNECT_INTERVAL = 5 # seconds
+    MAX_DATAGRAM_SIZE = 1400 # bytes, to stay below a typical MTU
+
+    def __init__(self, host, port, protocol=PROTOCOL_INFLUXDB, transport=TRANSPORT_TCP,
+                 prefix='tinkerforge', spool_file_path=None, max_spool_file_size=0):
+        """
+        host                -- host name of the time series database
+        port                -- port of the time series database
+        protocol            -- one of LineProtocolWriter.PROTOCOLS
+        transport           -- one of LineProtocolWriter.TRANSPORTS
+        prefix              -- InfluxDB measurement name or Graphite path prefix
+        spool_file_path     -- path to the spool file, None disables spooling
+        max_spool_file_size -- maximum size of the spool file in bytes, 0 means unlimited
+        """
+        self._host = host
+        self._port = port
+        self._protocol = protocol
+        self._transport = transport
+        self._prefix = prefix
+        self._spool_file_path = spool_file_path
+        self._max_spool_file_size = max(max_spool_file_size, 0)
+        self._socket = None
+        self._last_connect_attempt = None
+
+        self.connect_count = 0
+        self.sent_lines = 0
+        self.sent_bytes = 0
+        self.spooled_lines = 0
+        self.dropped_lines = 0
+
+    def format_line(self, csv_data):
+        """
+        Returns the logged data as one line in the configured protocol or None,
+        if it cannot be represented, e.g. error messages in Graphite.
+        """
+        if csv_data.unix_timestamp != None:
+            timestamp = csv_data.unix_timestamp
+        else:
+            timestamp = time.time()
+
+        raw_data = csv_data.raw_data
+
+        if self._protocol == LineProtocolWriter.PROTOCOL_GRAPHITE:
+            if isinstance(raw_data, bool):
+                raw_data = int(raw_data)
+            elif not isinstance(raw_data, (int, float)):
+                return None
+
+            path = '.'.join(LineProtocolWriter._graphite_escape(part) for part in [self._prefix, csv_data.uid, csv_data.var_name] if len(str(part)) > 0)
+
+            return '{0} {1} {2}\n'.format(path, raw_data, int(timestamp))
+
+        if isinstance(raw_data, bool):
+            field_value = 'true' if raw_data else 'false'
+        elif isinstance(raw_data, int):
+            field_value = str(raw_data) + 'i'
+        elif isinstance(raw_data, float):
+            field_value = repr(raw_data)
+        else:
+            field_value = '"' + str(raw_data).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+        tags = [('name', csv_data.name), ('uid', csv_data.uid), ('unit', csv_data.var_unit)]
+        tag_set = ''.join(',' + key + '=' + LineProtocolWriter._influxdb_escape(value) for key, value in tags if value != None and len(str(value)) > 0)
+
+        return '{0}{1} {2}={3} {4}\n'.format(LineProtocolWriter._influxdb_escape(self._prefix, measurement=True),
+                                              tag_set,
+                                              LineProtocolWriter._influxdb_escape(csv_data.var_name),
+                                              field_value,
+                                              int(round(timestamp * 1000000000)))
+
+    def _influxdb_escape(value, measurement=False):
+        value = str(value).replace('\\', '\\\\').replace(',', '\\,').replace(' ', '\\ ')
+
+        if not measurement:
+            value = value.replace('=', '\\=')
+
+        return value
+
+    _influxdb_escape = staticmethod(_influxdb_escape)
+
+    def _graphite_escape(value):
+        return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(value))
+
+    _graphite_escape = staticmethod(_graphite_escape)
+
+    def write_lines(self, lines):
+        """
+        Sends the lines, preceded by the spooled lines. Lines that cannot be sent
+        are spooled.
+        Return:
+            True  - Lines were sent
+            False - Lines were spooled or dropped
+        """
+        if not self._connect():
+            self._spool(lines)
+            return False
+
+        spooled_lines = self._read_spool()
+
+        try:
+            self._send(spooled_lines + lines)
+        except OSError as e:
+            EventLogger.warning("Could not send data to " + self._host + ":" + str(self._port) + ": " + str(e))
+            self.close()
+
+            # the spooled lines are still in the spool file, only append the new
+            # lines, so only those are dropped if the spool file is full
+            self._spool(lines)
+            return False
+
+        if len(spooled_lines) > 0:
+            EventLogger.info("Sent " + str(len(spooled_lines)) + " spooled lines to " + self._host + ":" + str(self._port))
+            self._truncate_spool()
+
+        return True
+
+    def close(self):
+        if self._socket == None:
+            return
+
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+
+        self._socket = None
+
+    def _connect(self):
+        if self._socket != None:
+            return True
+
+        now = time.monotonic()
+
+        if self._last_connect_attempt != None and now - self._last_connect_attempt < LineProtocolWriter.RECONNECT_INTERVAL:
+            return False
+
+        self._last_connect_attempt = now
+
+        try:
+            if self._transport == LineProtocolWriter.TRANSPORT_UDP:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._socket.connect((self._host, self._port))
+            else:
+                self._socket = socket.create_connection((self._host, self._port), timeout=5)
+        except OSError as e:
+            EventLogger.warning("Could not connect to " + self._host + ":" + str(self._port) + ": " + str(e))
+            self._socket = None
+            return False
+
+        self.connect_count += 1
+
+        EventLogger.info("Connected to " + self._transport.upper() + " " + self._host + ":" + str(self._port))
+
+        return True
+
+    def _send(self, lines):
+        if len(lines) == 0:
+            return
+
+        if self._transport == LineProtocolWriter.TRANSPORT_UDP:
+            datagram = b''
+
+            for line in lines:
+                encoded = line.encode('utf-8')
+
+                if len(datagram) + len(encoded) > LineProtocolWriter.MAX_DATAGRAM_SIZE and len(datagram) > 0:
+                    self._socket.send(datagram)
+                    self.sent_bytes += len(datagram)
+                    datagram = b''
+
+                datagram += encoded
+
+            if len(datagram) > 0:
+                self._socket.send(datagram)
+                self.sent_bytes += len(datagram)
+        else:
+            data = ''.join(lines).encode('utf-8')
+
+            self._socket.sendall(data)
+            self.sent_bytes += len(data)
+
+        self.sent_lines += len(lines)
+
+    def _spool(self, lines):
+        if self._spool_file_path == None:
+            self.dropped_lines += len(lines)
+            return
+
+        data = ''.join(lines)
+
+        try:
+            size = os.path.getsize(self._spool_file_path) if os.path.exists(self._spool_file_path) else 0
+
+            if self._max_spool_file_size > 0 and size + len(data.encode('utf-8')) > self._max_spool_file_size:
+                EventLogger.warning("Spool file " + self._spool_file_path + " is full, dropping " + str(len(lines)) + " lines")
+                self.dropped_lines += len(lines)
+                return
+
+            with open(self._spool_file_path, 'a', encoding='utf-8') as f:
+                f.write(data)
+        except OSError as e:
+            EventLogger.warning("Could not write spool file " + self._spool_file_path + ": " + str(e))
+            self.dropped_lines += len(lines)
+            return
+
+        self.spooled_lines += len(lines)
+
+    def _read_spool(self):
+        if self._spool_file_path == None or not os.path.exists(self._spool_file_path):
+            return []
+
+        try:
+            with open(self._spool_file_path, 'r', encoding='utf-8') as f:
+                return f.readlines()
+        except OSError as e:
+            EventLogger.warning("Could not read spool file " + self._spool_file_path + ": " + str(e))
+            return []
+
+    def _truncate_spool(self):
+        try:
+            os.remove(self._spool_file_path)
+        except OSError as e:
+            EventLogger.warning("Could not remove spool file " + self._spool_file_path + ": " + str(e))
+
+'''
+/*---------------------------------------------------------------------------
+                                StreamWriter
+ ---------------------------------------------------------------------------*/
+ '''
+
+
+class StreamWriter:
+    """
+    This class writes packets of a continuous high-rate stream as packed binary
+    records to a file, bypassing the CSV pipeline. Writing happens in its own
+    thread, so the callback thread of the IP connection is never blocked by disk
+    I/O. If the writer cannot keep up, packets are dropped, but their samples are
+    still counted, so every gap is visible in the file. Packets that got lost
+    before reaching the writer (the high-level callback reports None if the
+    stream went out of sync) are counted with the size of the previous packet.
+
+    File layout (little-endian):
+        header: magic b'TFSTREAM', uint8 version, char sample format, uint8 channel count
+        record: uint64 index of the first sample, float64 Unix timestamp of arrival,
+                uint32 sample count, followed by the samples in the sample format
+    """
+
+    MAGIC = b'TFSTREAM'
+    VERSION = 1
+    HEADER_FORMAT = '<8sBcB'
+    RECORD_FORMAT = '<QdI'
+
+    MAX_QUEUE_SIZE = 1000 # packets
+    FLUSH_INTERVAL = 1 # seconds
+
+    def __init__(self, file_path, sample_format, channel_count=1):
+        """
+        file_path     -- path to the binary file, new records are appended
+        sample_format -- struct format character of a single sample, e.g. 'h'
+        channel_count -- number of interleaved channels per sample frame
+        """
+        self._file_path = file_path
+        self._sample_format = sample_format
+        self._channel_count = channel_count
+        self._queue = queue.Queue(maxsize=StreamWriter.MAX_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.sample_index = 0 # index of the next sample, including dropped ones
+        self.last_count = 0 # samples in the previous packet, to estimate lost packets
+        self.written_packets = 0
+        self.written_samples = 0
+        self.written_bytes = 0
+        self.dropped_packets = 0
+        self.dropped_samples = 0
+
+    def start(self):
+        if self._thread != None:
+            return
+
+        self._file = open(self._file_path, 'ab')
+
+        if self._file.tell() == 0:
+            self._file.write(struct.pack(StreamWriter.HEADER_FORMAT, StreamWriter.MAGIC, StreamWriter.VERSION,
+                                         self._sample_format.encode('ascii'), self._channel_count))
+
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def put(self, timestamp, samples):
+        """
+        Packs a packet of samples and hands it to the writer thread. Returns
+        False if the packet had to be dropped or samples is None, which marks
+        a lost packet.
+        """
+        if samples == None:
+            with self._lock:
+                self.sample_index += self.last_count
+                self.dropped_packets += 1
+                self.dropped_samples += self.last_count
+
+            return False
+
+        count = len(samples)
+
+        with self._lock:
+            self.last_count = count
+            first_sample_index = self.sample_index
+            self.sample_index += count
+
+        record = struct.pack(StreamWriter.RECORD_FORMAT, first_sample_index, timestamp, count) + \
+                 struct.pack('<{0}{1}'.format(count, self._sample_format), *samples)
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped_packets += 1
+                self.dropped_samples += count
+
+            return False
+
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            return {'samples': self.written_samples,
+                    'bytes': self.written_bytes,
+                    'dropped_samples': self.dropped_samples}
+
+    def close(self):
+        if self._thread == None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        if self.dropped_packets > 0:
+            EventLogger.warning("Stream file " + self._file_path + ": dropped " + str(self.dropped_packets) +
+                                " packets (" + str(self.dropped_samples) + " samples)")
+
+    def _loop(self):
+        flush_timestamp = time.monotonic()
+        failed = False
+
+        while True:
+            try:
+                record = self._queue.get(timeout=StreamWriter.FLUSH_INTERVAL)
+            except queue.Empty:
+                record = b''
+
+            if record == None:
+                break
+
+            if failed: # keep draining the queue so put() and close() never block
+                continue
+
+            if len(record) > 0:
+                try:
+                    self._file.write(record)
+                except OSError as e:
+                    EventLogger.critical("Could not write stream file " + self._file_path + ": " + str(e))
+                    failed = True
+                    continue
+
+                with self._lock:
+                    self.written_packets += 1
+                    self.written_samples += struct.unpack_from(StreamWriter.RECORD_FORMAT, record)[2]
+                    self.written_bytes += len(record)
+
+            if time.monotonic() - flush_timestamp >= StreamWriter.FLUSH_INTERVAL:
+                self._file.flush()
+                flush_timestamp = time.monotonic()
+
+        self._file.close()
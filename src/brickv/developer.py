@@ -28,12 +28,13 @@ import threading
 import time
 from datetime import datetime
 
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import pyqtSignal, QTimer
 from PyQt5.QtWidgets import QDialog, QMessageBox
 
 from brickv.ui_developer import Ui_Developer
 from brickv.utils import get_modeless_dialog_flags, get_home_path, get_save_file_name
 from brickv.samba import get_serial_ports
+from brickv.async_call import async_get_stats
 
 class DeveloperWindow(QDialog, Ui_Developer):
     gc_stats_changed = pyqtSignal(int, int)
@@ -55,6 +56,11 @@ class DeveloperWindow(QDialog, Ui_Developer):
 
         self.button_force_gc.clicked.connect(self.force_gc)
 
+        # Async Calls
+        self.async_stats_timer = QTimer(self)
+        self.async_stats_timer.timeout.connect(self.update_async_stats)
+        self.async_stats_timer.start(1000)
+
         # ESP32 (Ethernet) Brick
         gc.callbacks.append(self.gc_callback)
 
@@ -102,6 +108,19 @@ class DeveloperWindow(QDialog, Ui_Developer):
         self.label_gc_collected.setText(str(self.gc_collected))
         self.label_gc_uncollectable.setText(str(self.gc_uncollectable))
 
+    def update_async_stats(self):
+        if not self.isVisible():
+            return
+
+        stats = async_get_stats()
+
+        self.label_async_handled.setText(str(stats['handled']))
+        self.label_async_wakeups.setText(str(stats['wakeups']))
+        self.label_async_backlog.setText(str(stats['backlog']))
+        self.label_async_backlog_peak.setText(str(stats['backlog_peak']))
+        self.label_async_pending.setText(str(stats['pending']))
+        self.label_async_coalesced.setText(str(stats['coalesced']))
+
     def refresh_serial_ports(self):
         self.combo_serial_port.clear()
         self.combo_serial_port.setEnabled(False)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+brickv (Brick Viewer)
+
+devicestreemodel.py: Incrementally updated model for device tree views
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public
+License along with this program; if not, write to the
+Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+Boston, MA 02111-1307, USA.
+"""
+
+from collections import namedtuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+
+# key has to be unique between siblings, the UID for devices. background and
+# foreground are QBrushes for the whole row, user_data is stored as Qt.UserRole
+# in the first column. expanded only applies to rows that get inserted
+DevicesTreeRow = namedtuple('DevicesTreeRow', 'key texts background foreground user_data expanded children',
+                            defaults=(None, None, None, True, ()))
+
+class DevicesTreeModel(QStandardItemModel):
+    """
+    QStandardItemModel that is updated from a list of DevicesTreeRows by
+    inserting, removing and changing only the rows and items that differ.
+    Unchanged items are kept, so the view keeps its selection, expansion
+    and sort state.
+    """
+
+    KEY_ROLE = Qt.UserRole + 1
+
+    def __init__(self, labels, parent=None):
+        super().__init__(parent)
+
+        self.labels = []
+
+        self.set_labels(labels)
+
+    def set_labels(self, labels):
+        if labels == self.labels:
+            return
+
+        self.labels = list(labels)
+
+        # drop additional columns, e.g. 'Update' if there are no updates anymore
+        if self.columnCount() > len(self.labels):
+            self.setColumnCount(len(self.labels))
+
+        self.setHorizontalHeaderLabels(self.labels)
+
+    # returns the inserted QStandardItems of the first column together with
+    # the requested expansion state, the view has to apply it
+    def update_rows(self, rows):
+        inserted = []
+
+        self.update_children(self.invisibleRootItem(), rows, inserted)
+
+        return inserted
+
+    def update_children(self, parent, rows, inserted):
+        keys = set(row.key for row in rows)
+        existing = {}
+
+        for i in reversed(range(parent.rowCount())):
+            key = parent.child(i, 0).data(DevicesTreeModel.KEY_ROLE)
+
+            if key not in keys or key in existing:
+                parent.removeRow(i)
+            else:
+                existing[key] = True
+
+        items = {}
+
+        for i in range(parent.rowCount()):
+            item = parent.child(i, 0)
+            items[item.data(DevicesTreeModel.KEY_ROLE)] = i
+
+        for row in rows:
+            i = items.get(row.key)
+
+            if i == None:
+                item = self.create_row(parent, row)
+
+                inserted.append((item, row.expanded))
+            else:
+                self.update_row(parent, i, row)
+
+                item = parent.child(i, 0)
+
+            self.update_children(item, row.children, inserted)
+
+    def create_item(self, text, background, foreground):
+        item = QStandardItem(text)
+
+        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+        item.setData(background, Qt.BackgroundRole)
+        item.setData(foreground, Qt.ForegroundRole)
+
+        return item
+
+    def create_row(self, parent, row):
+        items = [self.create_item(text, row.background, row.foreground) for text in row.texts]
+
+        items[0].setData(row.key, DevicesTreeModel.KEY_ROLE)
+        items[0].setData(row.user_data, Qt.UserRole)
+
+        parent.appendRow(items)
+
+        return items[0]
+
+    def update_row(self, parent, i, row):
+        column_count = max(len(row.texts), self.columnCount())
+
+        for column in range(column_count):
+            item = parent.child(i, column)
+
+            if column < len(row.texts):
+                text = row.texts[column]
+                background = row.background
+                foreground = row.foreground
+            else:
+                text = ''
+                background = None
+                foreground = None
+
+            if item == None:
+                if column >= len(row.texts):
+                    continue
+
+                parent.setChild(i, column, self.create_item(text, background, foreground))
+                continue
+
+            # only touch changed roles, each change triggers a dataChanged signal
+            if item.text() != text:
+                item.setText(text)
+
+            if item.data(Qt.BackgroundRole) != background:
+                item.setData(background, Qt.BackgroundRole)
+
+            if item.data(Qt.ForegroundRole) != foreground:
+                item.setData(foreground, Qt.ForegroundRole)
+
+        if parent.child(i, 0).data(Qt.UserRole) != row.user_data:
+            parent.child(i, 0).setData(row.user_data, Qt.UserRole)
@@ -38,7 +38,7 @@ from threading import Thread
 from pkg_resources import parse_version
 
 from PyQt5.QtCore import Qt, pyqtSignal, QStandardPaths
-from PyQt5.QtGui import QColor, QStandardItemModel, QStandardItem, QBrush, QFontMetrics
+from PyQt5.QtGui import QColor, QBrush, QFontMetrics
 from PyQt5.QtWidgets import QApplication, QDialog, QMessageBox, QProgressDialog, QProgressBar, QPlainTextEdit, QVBoxLayout, QPushButton
 
 from brickv import config
@@ -56,6 +56,7 @@ from brickv.infos import BrickREDInfo, DeviceInfo, inventory
 from brickv.firmware_fetch import ERROR_DOWNLOAD
 from brickv.utils import get_main_window, get_save_file_name
 from brickv.devicesproxymodel import DevicesProxyModel
+from brickv.devicestreemodel import DevicesTreeModel, DevicesTreeRow
 from brickv.urlopen import urlopen
 from brickv.esptool import main as esptool_main, \
                            print_callback_ref as esptool_print_callback_ref, \
@@ -229,8 +230,8 @@ class FlashingWindow(QDialog, Ui_Flashing):
         self.button_extension_firmware_save.clicked.connect(self.extension_firmware_save_clicked)
         self.button_extension_firmware_browse.clicked.connect(self.extension_firmware_browse_clicked)
 
-        inventory.info_changed.connect(self.update_bricks)
-        inventory.info_changed.connect(self.update_extensions)
+        inventory.infos_changed.connect(self.update_bricks)
+        inventory.infos_changed.connect(self.update_extensions)
 
         self.label_update_tool.hide()
         self.label_no_update_connection.hide()
@@ -258,7 +259,7 @@ class FlashingWindow(QDialog, Ui_Flashing):
 
         self.update_tree_view_model_labels = ['Name', 'UID', 'Position', 'Installed', 'Latest']
 
-        self.update_tree_view_model = QStandardItemModel(self)
+        self.update_tree_view_model = DevicesTreeModel(self.update_tree_view_model_labels, self)
 
         self.update_tree_view_proxy_model = DevicesProxyModel(self)
         self.update_tree_view_proxy_model.setSourceModel(self.update_tree_view_model)
@@ -267,6 +268,11 @@ class FlashingWindow(QDialog, Ui_Flashing):
         self.update_tree_view.header().setSortIndicator(2, Qt.AscendingOrder)
         self.update_tree_view.activated.connect(self.update_tree_view_clicked)
         self.update_tree_view.setExpandsOnDoubleClick(False)
+        self.update_tree_view.setColumnWidth(0, 280)
+        self.update_tree_view.setColumnWidth(1, 70)
+        self.update_tree_view.setColumnWidth(2, 90)
+        self.update_tree_view.setColumnWidth(3, 105)
+        self.update_tree_view.setColumnWidth(4, 105)
 
         self.update_button_refresh.clicked.connect(self.refresh_updates_clicked)
         self.update_button_bricklets.clicked.connect(self.auto_update_bricklets_clicked)
@@ -1960,15 +1966,9 @@ class FlashingWindow(QDialog, Ui_Flashing):
             self.fw_fetch_progress_bar.cancel()
             self.fw_fetch_progress_bar = None
 
-        sis = self.update_tree_view.header().sortIndicatorSection()
-        sio = self.update_tree_view.header().sortIndicatorOrder()
-
-        self.update_tree_view_model.clear()
-        self.update_tree_view_model.setHorizontalHeaderLabels(self.update_tree_view_model_labels)
-
         is_update = False
 
-        def get_row(info, ignore_update=False):
+        def get_row(info, key, ignore_update=False):
             nonlocal is_update
             inst_replacement = '0.0.0'
             unknown_replacement = 'Unknown'
@@ -1979,11 +1979,11 @@ class FlashingWindow(QDialog, Ui_Flashing):
                 inst_replacement = ""
                 unknown_replacement = ''
 
-            row = [QStandardItem(info.name),
-                   QStandardItem(info.uid if hasattr(info, 'uid') else ''),
-                   QStandardItem(info.position.title() if hasattr(info, 'position') else ''),
-                   QStandardItem(get_version_string(info.firmware_version_installed, replace_unknown=inst_replacement)),
-                   QStandardItem(get_version_string(info.firmware_version_latest, replace_unknown=unknown_replacement))]
+            texts = [info.name,
+                     info.uid if hasattr(info, 'uid') else '',
+                     info.position.title() if hasattr(info, 'position') else '',
+                     get_version_string(info.firmware_version_installed, replace_unknown=inst_replacement),
+                     get_version_string(info.firmware_version_latest, replace_unknown=unknown_replacement)]
 
             color, update = get_color_for_device(info)
             if ignore_update:
@@ -1992,44 +1992,28 @@ class FlashingWindow(QDialog, Ui_Flashing):
             if update and info.kind != "extension":
                 is_update = True
 
-            for item in row:
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                item.setData(color, Qt.BackgroundRole)
+            return DevicesTreeRow(key, texts, background=color)
 
-            return row
+        def get_device_row(info):
+            row = get_row(info, info.uid)
 
-        def recurse_on_device(info, insertion_point):
-            row = get_row(info)
-            insertion_point.appendRow(row)
+            return row._replace(children=get_children_rows(info))
 
-            for child in info.connections_values():
-                recurse_on_device(child, row[0])
+        def get_children_rows(info):
+            children = [get_device_row(child) for child in info.connections_values()]
 
             if info.can_have_extension:
                 for extension in info.extensions.values():
                     if extension is None:
                         continue
-                    ext_row = get_row(extension)
+                    ext_row = get_row(extension, extension.position)
                     if extension.url_part != 'wifi_v2':
-                        for item in ext_row:
-                            item.setData(QBrush(QColor(0x80, 0x80, 0x80)), Qt.ForegroundRole)
-                    row[0].appendRow(ext_row)
+                        ext_row = ext_row._replace(foreground=QBrush(QColor(0x80, 0x80, 0x80)))
+                    children.append(ext_row)
 
-        def recurse_on_chilren(info, row):
-            for child in info.connections_values():
-                recurse_on_device(child, row[0])
+            return children
 
-            if info.can_have_extension:
-                for extension in info.extensions.values():
-                    if extension is None:
-                        continue
-                    ext_row = get_row(extension)
-                    if extension.url_part != 'wifi_v2':
-                        for item in ext_row:
-                            item.setData(QBrush(QColor(0x80, 0x80, 0x80)), Qt.ForegroundRole)
-                    row[0].appendRow(ext_row)
-
-        to_collapse = []
+        rows = []
 
         for info in inventory.get_infos():
             if isinstance(info, DeviceInfo):
@@ -2044,68 +2028,54 @@ class FlashingWindow(QDialog, Ui_Flashing):
                 else:
                     replace_unknown = None
 
-                parent = [QStandardItem(info.name),
-                          QStandardItem(info.uid),
-                          QStandardItem(info.position.title()),
-                          QStandardItem(get_version_string(info.firmware_version_installed, replace_unknown=replace_unknown, is_red_brick=is_red_brick)),
-                          QStandardItem(get_version_string(info.firmware_version_latest, replace_unknown="Unknown", is_red_brick=is_red_brick))]
+                texts = [info.name,
+                         info.uid,
+                         info.position.title(),
+                         get_version_string(info.firmware_version_installed, replace_unknown=replace_unknown, is_red_brick=is_red_brick),
+                         get_version_string(info.firmware_version_latest, replace_unknown="Unknown", is_red_brick=is_red_brick)]
 
                 color, update = get_color_for_device(info)
 
                 if update and (info.kind == 'bricklet' or info.kind == 'tng'):
                     is_update = True
 
-                for item in parent:
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    item.setData(color, Qt.BackgroundRole)
-
-                parent[0].setData(info.uid, Qt.UserRole)
-                self.update_tree_view_model.appendRow(parent)
-
-                recurse_on_chilren(info, parent)
+                children = get_children_rows(info)
 
                 if is_red_brick:
                     # Cache is_update state and restore after handling bindings. They should not enable the update all bindings button.
                     old_is_update = is_update
 
-                    brickv_row = get_row(info.brickv_info, ignore_update=info.firmware_version_installed < (1, 14, 0))
+                    brickv_row = get_row(info.brickv_info, 'red:brickv', ignore_update=info.firmware_version_installed < (1, 14, 0))
 
                     is_update = False
 
                     # Use cached latest fw, as the one in info.brickv_info is not updated when still querying
-                    row_color = brickv_row[4].data(Qt.BackgroundRole)
                     brickv_version = self.tool_infos['brickv'].firmware_version_latest if 'brickv' in self.tool_infos else (0, 0, 0)
-                    brickv_row[4] = QStandardItem(get_version_string(brickv_version, replace_unknown="Unknown"))
-                    brickv_row[4].setData(row_color, Qt.BackgroundRole)
-                    parent[0].appendRow(brickv_row)
+                    brickv_row.texts[4] = get_version_string(brickv_version, replace_unknown="Unknown")
+                    children.append(brickv_row)
 
                     installed_bindings_string = 'Querying...' if len(info.bindings_infos) == 0 else ''
-                    binding_row = [QStandardItem('Bindings'), QStandardItem(''), QStandardItem(''), QStandardItem(installed_bindings_string), QStandardItem('')]
-
-                    for binding in info.bindings_infos:
-                        child = get_row(binding)
-                        binding_row[0].appendRow(child)
-
-                    for item in binding_row:
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                        if is_update:
-                            item.setData(QBrush(QColor(255, 160, 55)), Qt.BackgroundRole)
-
-                    parent[0].appendRow(binding_row)
+                    binding_children = [get_row(binding, 'binding:' + binding.name) for binding in info.bindings_infos]
 
-                    index = self.update_tree_view_proxy_model.mapFromSource(binding_row[0].index())
+                    if is_update:
+                        binding_color = QBrush(QColor(255, 160, 55))
+                    else:
+                        binding_color = None
 
-                    to_collapse.append(index)
+                    # the bindings are collapsed when the row gets inserted
+                    children.append(DevicesTreeRow('red:bindings', ['Bindings', '', '', installed_bindings_string, ''],
+                                                   background=binding_color, expanded=False, children=binding_children))
 
                     # Restore cached is_update state, see above.
                     is_update = old_is_update
 
+                rows.append(DevicesTreeRow(info.uid, texts, background=color, user_data=info.uid, children=children))
             elif info.kind == 'tool' and 'Brick Viewer' in info.name:
-                parent = [QStandardItem(info.name),
-                          QStandardItem(''),
-                          QStandardItem(''),
-                          QStandardItem(get_version_string(info.firmware_version_installed)),
-                          QStandardItem(get_version_string(info.firmware_version_latest, replace_unknown="Unknown"))]
+                texts = [info.name,
+                         '',
+                         '',
+                         get_version_string(info.firmware_version_installed),
+                         get_version_string(info.firmware_version_latest, replace_unknown="Unknown")]
 
                 color, update = get_color_for_device(info)
 
@@ -2114,29 +2084,17 @@ class FlashingWindow(QDialog, Ui_Flashing):
                 else:
                     self.label_update_tool.hide()
 
-                for item in parent:
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    item.setData(color, Qt.BackgroundRole)
-
-                self.update_tree_view_model.appendRow(parent)
+                rows.append(DevicesTreeRow('tool:' + info.name, texts, background=color))
 
-        # Disable collapse animation temporarily, as it would be visible when the user opens the flashing window.
+        # only the inserted rows get expanded, existing rows keep their state.
+        # Disable expand animation temporarily, as it would be visible when the user opens the flashing window.
         self.update_tree_view.setAnimated(False)
-        self.update_tree_view.expandAll()
 
-        for model_idx in to_collapse:
-            self.update_tree_view.collapse(model_idx)
+        for item, expanded in self.update_tree_view_model.update_rows(rows):
+            self.update_tree_view.setExpanded(self.update_tree_view_proxy_model.mapFromSource(item.index()), expanded)
 
         self.update_tree_view.setAnimated(True)
 
-        self.update_tree_view.setColumnWidth(0, 280)
-        self.update_tree_view.setColumnWidth(1, 70)
-        self.update_tree_view.setColumnWidth(2, 90)
-        self.update_tree_view.setColumnWidth(3, 105)
-        self.update_tree_view.setColumnWidth(4, 105)
-        self.update_tree_view.setSortingEnabled(True)
-        self.update_tree_view.header().setSortIndicator(sis, sio)
-
         if is_update and self.ipcon_available:
             self.update_button_bricklets.setEnabled(True)
         else:
@@ -24,6 +24,7 @@ Boston, MA 02111-1307, USA.
 import os
 import time
 import csv
+import functools
 from datetime import datetime
 
 from PyQt5.QtCore import Qt, QTimer, QModelIndex
@@ -67,7 +68,7 @@ class HealthMonitorWindow(QDialog, Ui_HealthMonitor):
         self.delayed_refresh_tree_view_timer.timeout.connect(self.delayed_refresh_tree_view)
         self.delayed_refresh_tree_view_timer.setInterval(100)
 
-        inventory.info_changed.connect(lambda: self.delayed_refresh_tree_view_timer.start())
+        inventory.infos_changed.connect(lambda: self.delayed_refresh_tree_view_timer.start())
 
         self.update_metric_values_timer = QTimer(self)
         self.update_metric_values_timer.timeout.connect(lambda: self.update_metric_values())
@@ -268,36 +269,61 @@ class HealthMonitorWindow(QDialog, Ui_HealthMonitor):
 
         self.update_item_text(uid, item, metric_name, self.metric_errors[uid])
 
-    def update_metric_values(self, parent=None):
+    def update_metric_values(self):
         if not self.isVisible():
             return
 
         self.update_metric_values_timer.stop()
 
-        if parent == None:
-            parent = self.tree_view_model.invisibleRootItem()
+        calls = []
 
-        def make_async_call(info, uid, index):
-            async_call(info.plugin.get_health_metric_values, None,
-                       lambda metric_values: self.get_health_metric_values_async(uid, index, metric_values),
-                       lambda: self.get_health_metric_values_error(uid, index))
+        def collect_calls(parent):
+            for r in range(parent.rowCount()):
+                child = parent.child(r, 0)
+                uid = parent.child(r, 1).text()
+                info = inventory.get_info(uid)
 
-        # FIXME: avoid getter burst!
-        for r in range(parent.rowCount()):
-            child = parent.child(r, 0)
-            index = child.index()
-            uid = parent.child(r, 1).text()
-            info = inventory.get_info(uid)
+                if info == None:
+                    # FIXME: unknown UID, remove row or mark it as broken?
+                    continue
 
-            if info == None:
-                # FIXME: unknown UID, remove row or mark it as broken?
-                continue
+                calls.append((info, uid, child.index()))
+
+                collect_calls(child)
 
-            make_async_call(info, uid, index)
+        collect_calls(self.tree_view_model.invisibleRootItem())
+
+        if len(calls) == 0:
+            self.update_metric_values_timer.start()
+            return
 
-            self.update_metric_values(parent=child)
+        # the calls are executed in the async lanes of their devices, so their
+        # results can arrive in any order. restart the timer after the last one
+        pending = [len(calls)]
 
-        async_call(lambda: None, None, self.update_metric_values_timer.start, None)
+        def call_done():
+            pending[0] -= 1
+
+            if pending[0] == 0:
+                self.update_metric_values_timer.start()
+
+        def cb_success(uid, index, metric_values):
+            try:
+                self.get_health_metric_values_async(uid, index, metric_values)
+            finally:
+                call_done()
+
+        def cb_error(uid, index):
+            try:
+                self.get_health_metric_values_error(uid, index)
+            finally:
+                call_done()
+
+        # FIXME: avoid getter burst!
+        for info, uid, index in calls:
+            async_call(info.plugin.get_health_metric_values, None,
+                       functools.partial(cb_success, uid, index),
+                       functools.partial(cb_error, uid, index))
 
     def collect_metric_values(self, parent=None, indent=''):
         if parent == None:
@@ -22,8 +22,10 @@ Free Software Foundation, Inc., 59 Temple Place - Suite 330,
 Boston, MA 02111-1307, USA.
 """
 
+import bisect
 from collections import namedtuple
 
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
 
 from brickv import config
@@ -42,6 +44,7 @@ LatestFirmwares = namedtuple('LatestFirmwares', ['tool_infos', 'firmware_infos',
 
 class AbstractInfo:
     changed = False
+    _inventory = None # set while the info is part of an Inventory
     kind = 'abstract'
     url_part = ''
     error = ''
@@ -78,6 +81,9 @@ class AbstractInfo:
         if old_value != value:
             object.__setattr__(self, 'changed', True)
 
+            if self._inventory is not None and name in Inventory.INDEXED_ATTRIBUTES:
+                self._inventory.reindex_info(self, name, old_value)
+
     def mark_as_changed(self):
         object.__setattr__(self, 'changed', True)
 
@@ -353,7 +359,24 @@ url_part: {3}
            self.firmware_version_latest, self.url_part)
 
 class Inventory:
+    # attributes that the indexes depend on, changing them updates the indexes
+    INDEXED_ATTRIBUTES = ('name', 'connected_uid')
+
+    # names of the sorted indexes an info is part of, by kind
+    KIND_INDEXES = {
+        'brick': ('all', 'device', 'brick'),
+        'bricklet': ('all', 'device', 'bricklet'),
+        'tng': ('all', 'device', 'bricklet')
+    }
+
     def __init__(self):
+        self._infos = {}
+        self._sorted_names = {} # by index name, sorted list of names, for bisect
+        self._sorted_infos = {} # by index name, infos in the same order as _sorted_names
+        self._children = {} # by connected UID, DeviceInfos in insertion order
+        self._changed_uids = set()
+        self._sync_pending = False
+
         brickd_info = ToolInfo()
         brickd_info.name = 'Brick Daemon'
 
@@ -361,25 +384,88 @@ class Inventory:
         brickv_info.name = 'Brick Viewer'
         brickv_info.firmware_version_installed = tuple(map(int, config.BRICKV_VERSION.split('.')))
 
-        self._infos = {UID_BRICKD: brickd_info, UID_BRICKV: brickv_info}
+        for uid, info in [(UID_BRICKD, brickd_info), (UID_BRICKV, brickv_info)]:
+            self._infos[uid] = info
+            self._index_info(info)
 
         self._latest_fws = LatestFirmwares({}, {}, {}, {}, {}, {})
 
-        self.info_changed = QApplication.instance().info_changed_signal
+        # emitted once per burst of changes with the set of changed UIDs
+        self.infos_changed = QApplication.instance().infos_changed_signal
+
+    def _index_info(self, info):
+        object.__setattr__(info, '_inventory', self)
+
+        for index in Inventory.KIND_INDEXES.get(info.kind, ('all',)):
+            names = self._sorted_names.setdefault(index, [])
+            i = bisect.bisect_right(names, info.name) # equal names keep insertion order
+
+            names.insert(i, info.name)
+            self._sorted_infos.setdefault(index, []).insert(i, info)
+
+        if isinstance(info, DeviceInfo):
+            self._children.setdefault(info.connected_uid, []).append(info)
+
+    def _unindex_info(self, info, name=None, connected_uid=None):
+        if name == None:
+            name = info.name
+
+        if connected_uid == None and isinstance(info, DeviceInfo):
+            connected_uid = info.connected_uid
+
+        for index in Inventory.KIND_INDEXES.get(info.kind, ('all',)):
+            names = self._sorted_names[index]
+            infos = self._sorted_infos[index]
+            i = bisect.bisect_left(names, name)
+
+            while infos[i] is not info:
+                i += 1
+
+            del names[i]
+            del infos[i]
+
+        if isinstance(info, DeviceInfo):
+            children = self._children[connected_uid]
+
+            children.remove(info)
+
+            if len(children) == 0:
+                del self._children[connected_uid]
+
+        object.__setattr__(info, '_inventory', None)
+
+    # called by AbstractInfo if one of the INDEXED_ATTRIBUTES changed
+    def reindex_info(self, info, name, old_value):
+        if name == 'name':
+            self._unindex_info(info, name=old_value)
+        else:
+            self._unindex_info(info, connected_uid=old_value)
+
+        self._index_info(info)
 
     def add_info(self, info):
+        old_info = self._infos.get(info.uid)
+
+        if old_info is not None:
+            self._unindex_info(old_info)
+
         self._infos[info.uid] = info
-        self.info_changed.emit(info.uid)
+        self._index_info(info)
+        self._changed_uids.add(info.uid)
+        self.sync()
 
     def remove_info(self, uid):
         info = self._infos.pop(uid)
+        self._unindex_info(info)
+
         if isinstance(info, DeviceInfo):
             if info.reverse_connection is not None:
                 info.reverse_connection.connections_remove_value(info)
             for connection in info.connections_values():
                 connection.reverse_connection = None
 
-        self.info_changed.emit(uid)
+        self._changed_uids.add(uid)
+        self.sync()
 
     def get_info(self, uid):
         try:
@@ -387,28 +473,44 @@ class Inventory:
         except KeyError:
             return None
 
+    # all get_*_infos functions return a new list sorted by name, so the
+    # inventory can be changed while iterating it
     def get_infos(self):
-        return sorted(self._infos.values(), key=lambda x: x.name)
+        return list(self._sorted_infos.get('all', []))
 
     def get_device_infos(self):
-        return sorted([info for info in self._infos.values() if info.kind == 'brick' or info.kind == 'bricklet' or info.kind == 'tng'], key=lambda x: x.name)
+        return list(self._sorted_infos.get('device', []))
 
     def get_brick_infos(self):
-        return sorted([info for info in self._infos.values() if info.kind == 'brick'], key=lambda x: x.name)
+        return list(self._sorted_infos.get('brick', []))
 
     def get_bricklet_infos(self):
-        return sorted([info for info in self._infos.values() if info.kind == 'bricklet' or info.kind == 'tng'], key=lambda x: x.name)
+        return list(self._sorted_infos.get('bricklet', []))
 
     def get_extension_infos(self):
         extension_infos = []
 
-        for brick_info in self.get_brick_infos():
+        for brick_info in self._sorted_infos.get('brick', []):
             if brick_info.can_have_extension:
                 extension_infos += list(filter(lambda value: value != None, brick_info.extensions.values()))
 
         return sorted(extension_infos, key=lambda x: x.name)
 
+    # returns the DeviceInfos that report the given UID as their connected UID
+    def get_children_infos(self, uid):
+        return list(self._children.get(uid, []))
+
+    # changes are collected and infos_changed is emitted once after control
+    # returned to the event loop, instead of once per changed info
     def sync(self):
+        if not self._sync_pending:
+            self._sync_pending = True
+
+            QTimer.singleShot(0, self.sync_now)
+
+    def sync_now(self):
+        self._sync_pending = False
+
         for info in self._infos.values():
             if isinstance(info, BrickWithExtensions):
                 for extension_info in info.extensions.values():
@@ -420,7 +522,15 @@ class Inventory:
                 info.changed = False
 
                 if hasattr(info, 'uid'):
-                    self.info_changed.emit(info.uid)
+                    self._changed_uids.add(info.uid)
+
+        if len(self._changed_uids) == 0:
+            return
+
+        uids = self._changed_uids
+        self._changed_uids = set()
+
+        self.infos_changed.emit(uids)
 
     def get_latest_fw(self, info):
         if isinstance(info, BrickREDInfo):
@@ -231,7 +231,7 @@ class ExceptionReporter:
 
 class BrickViewer(QApplication):
     object_creator_signal = pyqtSignal(object)
-    info_changed_signal = pyqtSignal(str) # uid
+    infos_changed_signal = pyqtSignal(object) # set of uids
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -82,7 +82,9 @@ excludes = ['wx', 'gtk+', '_gtkagg', 'gtk', 'gdk', 'gtk2', 'gtk3', 'cairo', 'way
 patterns = ['qt5qml', 'qt5quick', 'qt5network', 'qt5dbus', 'qt5svg', 'qt5websockets',
             'qtqml', 'qtquick', 'qtnetwork', 'qwebp',
             'qjpeg', 'qminimal', 'qoffscreen', 'qwebgl']
-hiddenimports = []
+# the plugin modules are imported on demand by the PluginManager
+from brickv.plugin_system.plugins import device_modules
+hiddenimports = sorted(set(device_modules.values()))
 datas = [('../drivers', 'drivers')]
 
 a = Analysis(['main.py'], pathex=utils.pathex, excludes=excludes, hiddenimports=hiddenimports, datas=datas)
@@ -30,16 +30,17 @@ import gc
 import functools
 
 from PyQt5.QtCore import pyqtSignal, Qt, QTimer, QEvent, QThread
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QCursor, QIcon, \
+from PyQt5.QtGui import QCursor, QIcon, \
                         QBrush, QColor, QKeySequence
 from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, \
                             QPushButton, QHBoxLayout, QVBoxLayout, \
                             QLabel, QFrame, QSpacerItem, QSizePolicy, \
                             QToolButton, QLineEdit, QMenu, QTabBar, \
-                            QCheckBox, QComboBox, QShortcut
+                            QCheckBox, QComboBox, QShortcut, QWidget
 
 from brickv.ui_mainwindow import Ui_MainWindow
 from brickv.plugin_system.plugin_manager import PluginManager
+from brickv.plugin_system.headless_plugin import HeadlessPlugin
 from brickv.bindings.ip_connection import IPConnection
 from brickv.flashing import FlashingWindow
 from brickv.advanced import AdvancedWindow
@@ -64,6 +65,10 @@ from brickv.plugin_system.comcu_bootloader import COMCUBootloader
 from brickv.load_pixmap import load_pixmap
 from brickv.firmware_fetch import LatestFWVersionFetcher
 from brickv.devicesproxymodel import DevicesProxyModel
+from brickv.devicestreemodel import DevicesTreeModel, DevicesTreeRow
+
+PLUGIN_IDLE_CHECK_INTERVAL = 5000 # milliseconds
+ENUMERATE_BATCH_INTERVAL = 50 # milliseconds
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     qtcb_enumerate = pyqtSignal(str, str, str, type((0,)), type((0,)), int, int)
@@ -99,14 +104,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.delayed_update_tree_view_timer.setInterval(100)
 
         self.tree_view_model_labels = ['Name', 'UID', 'Position', 'FW Version']
-        self.tree_view_model = QStandardItemModel(self)
+        self.tree_view_model = DevicesTreeModel(self.tree_view_model_labels, self)
         self.tree_view_proxy_model = DevicesProxyModel(self)
         self.tree_view_proxy_model.setSourceModel(self.tree_view_model)
         self.tree_view.setModel(self.tree_view_proxy_model)
         self.tree_view.activated.connect(self.item_activated)
         self.set_tree_view_defaults()
 
-        inventory.info_changed.connect(lambda: self.delayed_update_tree_view_timer.start())
+        inventory.infos_changed.connect(lambda: self.delayed_update_tree_view_timer.start())
 
         self.tab_widget.removeTab(1) # remove dummy tab
         self.tab_widget.setUsesScrollButtons(True) # force scroll buttons
@@ -124,6 +129,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         self.disconnect_times = []
 
+        # a stack (re)connecting to brickd sends one enumerate callback per
+        # device, collect them and apply them together once per device
+        self.enumerate_batch = {} # by UID, (disconnected_before, connected_seen, enumerate arguments)
+        self.enumerate_batch_timer = QTimer(self)
+        self.enumerate_batch_timer.timeout.connect(self.apply_enumerate_batch)
+        self.enumerate_batch_timer.setSingleShot(True)
+        self.enumerate_batch_timer.setInterval(ENUMERATE_BATCH_INTERVAL)
+
         self.qtcb_enumerate.connect(self.cb_enumerate)
         self.qtcb_connected.connect(self.cb_connected)
         self.qtcb_disconnected.connect(self.cb_disconnected)
@@ -146,6 +159,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.delayed_refresh_updates_timer = QTimer(self)
         self.delayed_refresh_updates_timer.timeout.connect(self.delayed_refresh_updates)
         self.delayed_refresh_updates_timer.setInterval(100)
+        self.plugin_idle_time = config.get_plugin_idle_time()
+        self.plugin_stop_times = {} # by UID
+        self.plugin_idle_timer = QTimer(self)
+        self.plugin_idle_timer.timeout.connect(self.tear_down_idle_plugins)
+        self.plugin_idle_timer.setInterval(PLUGIN_IDLE_CHECK_INTERVAL)
+
+        if self.plugin_idle_time > 0:
+            self.plugin_idle_timer.start()
+
         self.reset_view()
 
         self.fw_version_fetcher = LatestFWVersionFetcher()
@@ -366,6 +388,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.current_device_info.plugin.stop_plugin()
 
             if new_device_info != None:
+                self.construct_plugin(new_device_info)
                 new_device_info.plugin.start_plugin()
 
         self.current_device_info = new_device_info
@@ -424,13 +447,17 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         plugin = device_info.plugin
         device_info.plugin = None
 
-        if plugin != None:
+        if plugin != None and not plugin.headless:
             plugin.hide()
             plugin.setParent(None)
 
+        self.plugin_stop_times.pop(uid, None)
+
         inventory.remove_info(uid)
 
     def reset_view(self):
+        self.enumerate_batch_timer.stop()
+        self.enumerate_batch = {}
         self.tab_widget.setCurrentIndex(0)
         self.remove_all_device_infos()
         self.update_tree_view()
@@ -598,8 +625,22 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                                          self.ipcon.get_connection_state() == IPConnection.CONNECTION_STATE_PENDING and \
                                          self.tab_widget.setTabEnabled(tab_index, False),
                                          'main_window_disable_tab_if_connection_pending')
+        tab_window.add_callback_pre_untab(lambda tab_window, tab_index: self.construct_plugin(device_info),
+                                          'main_window_construct_plugin')
+        tab_window.content = None
+        tab_window.button_update = None
+
+        QVBoxLayout(tab_window).setContentsMargins(0, 0, 0, 0)
+
+        # a headless plugin gets its tab content when it is constructed
+        if not device_info.plugin.headless:
+            self.create_tab_content(tab_window, device_info, ipcon)
+
+        return tab_window
 
-        layout = QVBoxLayout(tab_window)
+    def create_tab_content(self, tab_window, device_info, ipcon):
+        content = QWidget()
+        layout = QVBoxLayout(content)
         info_bars = [QHBoxLayout(), QHBoxLayout()]
 
         # uid
@@ -769,7 +810,69 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         layout.addWidget(device_info.plugin, 1)
 
-        return tab_window
+        tab_window.layout().addWidget(content)
+        tab_window.content = content
+
+    def remove_tab_content(self, tab_window):
+        content = tab_window.content
+        tab_window.content = None
+        tab_window.button_update = None
+
+        if content != None:
+            content.hide()
+            content.setParent(None)
+
+    # replaces the HeadlessPlugin of the device with the actual plugin and
+    # fills its tab. does nothing if the plugin is already constructed
+    def construct_plugin(self, device_info):
+        headless_plugin = device_info.plugin
+
+        if headless_plugin == None or not headless_plugin.headless:
+            return
+
+        self.plugin_manager.create_plugin_instance(device_info.device_identifier, self.ipcon, device_info)
+        headless_plugin.destroy_plugin()
+
+        self.create_tab_content(device_info.tab_window, device_info, self.ipcon)
+        device_info.plugin.device_info_changed(device_info.uid)
+
+    # destroys the widgets of the plugin and puts a HeadlessPlugin in its
+    # place that keeps the device object
+    def tear_down_plugin(self, device_info):
+        plugin = device_info.plugin
+
+        plugin.stop_plugin()
+        plugin.destroy_plugin()
+
+        HeadlessPlugin(type(plugin), plugin.device_class, self.ipcon, device_info, plugin.device, plugin.error_count)
+
+        # detach the plugin before the content goes away, dropping the content
+        # deletes its child widgets, including the plugin
+        plugin.hide()
+        plugin.setParent(None)
+
+        self.remove_tab_content(device_info.tab_window)
+
+    def tear_down_idle_plugins(self):
+        now = time.monotonic()
+
+        for device_info in inventory.get_device_infos():
+            plugin = device_info.plugin
+
+            if plugin == None or plugin.headless or not plugin.lazy_construction:
+                continue
+
+            # the plugin of the current or a detached tab is running
+            if plugin.plugin_state != plugin.PLUGIN_STATE_STOPPED or device_info == self.current_device_info or \
+               not device_info.tab_window.tabbed:
+                self.plugin_stop_times.pop(device_info.uid, None)
+                continue
+
+            stop_time = self.plugin_stop_times.setdefault(device_info.uid, now)
+
+            if now - stop_time >= self.plugin_idle_time:
+                del self.plugin_stop_times[device_info.uid]
+                self.tear_down_plugin(device_info)
 
     def tab_move(self, event):
         # visualize rearranging of tabs (if allowed by tab_widget)
@@ -818,6 +921,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if device_info == None:
             return
 
+        self.construct_plugin(device_info)
+
         index = self.tab_for_uid(uid)
         tab_window = device_info.tab_window
 
@@ -848,6 +953,53 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             # ignore enumerate callbacks that arrived after the connection got closed
             return
 
+        # only the last enumerate callback of a device is applied. if the device
+        # got disconnected in between it has to be removed before that. if it
+        # got restarted (CONNECTED) since then, a following AVAILABLE is applied
+        # as CONNECTED, so the plugin is still paused and resumed
+        disconnected_before = False
+        connected_seen = False
+        previous = self.enumerate_batch.get(uid)
+
+        if previous != None:
+            previous_enumeration_type = previous[2][-1]
+            disconnected_before = previous[0] or previous_enumeration_type == IPConnection.ENUMERATION_TYPE_DISCONNECTED
+
+            if previous_enumeration_type != IPConnection.ENUMERATION_TYPE_DISCONNECTED:
+                connected_seen = previous[1] or previous_enumeration_type == IPConnection.ENUMERATION_TYPE_CONNECTED
+
+        self.enumerate_batch[uid] = (disconnected_before, connected_seen, (uid, connected_uid, position,
+                                                                           hardware_version, firmware_version,
+                                                                           device_identifier, enumeration_type))
+
+        if not self.enumerate_batch_timer.isActive():
+            self.enumerate_batch_timer.start()
+
+    def apply_enumerate_batch(self):
+        enumerate_batch = self.enumerate_batch
+        self.enumerate_batch = {}
+
+        if self.ipcon.get_connection_state() != IPConnection.CONNECTION_STATE_CONNECTED:
+            return
+
+        # avoid repainting the tab bar for every added or removed tab
+        self.tab_widget.setUpdatesEnabled(False)
+
+        try:
+            for disconnected_before, connected_seen, args in enumerate_batch.values():
+                if disconnected_before and args[-1] != IPConnection.ENUMERATION_TYPE_DISCONNECTED:
+                    self.remove_device_tab(args[0])
+
+                if connected_seen and args[-1] == IPConnection.ENUMERATION_TYPE_AVAILABLE:
+                    args = args[:-1] + (IPConnection.ENUMERATION_TYPE_CONNECTED,)
+
+                self.apply_enumerate(*args)
+        finally:
+            self.tab_widget.setUpdatesEnabled(True)
+
+    def apply_enumerate(self, uid, connected_uid, position,
+                        hardware_version, firmware_version,
+                        device_identifier, enumeration_type):
         if enumeration_type in [IPConnection.ENUMERATION_TYPE_AVAILABLE,
                                 IPConnection.ENUMERATION_TYPE_CONNECTED]:
             device_info = inventory.get_info(uid)
@@ -925,27 +1077,30 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             device_info.device_identifier = device_identifier
             device_info.enumeration_type = enumeration_type
 
-            # Update connections and reverse_connection with new device
-            for info in inventory.get_device_infos():
-                if info == device_info:
-                    continue
+            def add_to_connections(info_to_add, connected_info):
+                hotplug = connected_info.connections_add_item((info_to_add.position, info_to_add))
+                info_to_add.reverse_connection = connected_info
 
-                def add_to_connections(info_to_add, connected_info):
-                    hotplug = connected_info.connections_add_item((info_to_add.position, info_to_add))
-                    info_to_add.reverse_connection = connected_info
+                # '0' is the port where other stacks connected by RS485 extensions are connected. Multiple connections are allowed here.
+                if hotplug and info_to_add.position != '0':
+                    self.show_status("Hot plugging is not supported! Please reset Brick with UID {} and reconnect Brick Viewer.".format(connected_info.uid), message_id='mainwindow_hotplug')
 
-                    # '0' is the port where other stacks connected by RS485 extensions are connected. Multiple connections are allowed here.
-                    if hotplug and info_to_add.position != '0':
-                        self.show_status("Hot plugging is not supported! Please reset Brick with UID {} and reconnect Brick Viewer.".format(connected_info.uid), message_id='mainwindow_hotplug')
+            # Update connections and reverse_connection with new device. Look up
+            # the parent and the children directly instead of scanning all infos
+            info = inventory.get_info(device_info.connected_uid) if device_info.connected_uid != '' else None
 
-                if info.uid != '' and info.uid == device_info.connected_uid:
-                    if device_info in info.connections_values(): # device was already connected, but to another port
-                        info.connections_remove_value(device_info)
+            if isinstance(info, DeviceInfo) and info != device_info:
+                if device_info in info.connections_values(): # device was already connected, but to another port
+                    info.connections_remove_value(device_info)
 
-                    if device_info not in info.connections_get(device_info.position):
-                        add_to_connections(device_info, info)
+                if device_info not in info.connections_get(device_info.position):
+                    add_to_connections(device_info, info)
+
+            if device_info.uid != '':
+                for info in inventory.get_children_infos(device_info.uid):
+                    if info == device_info:
+                        continue
 
-                if info.connected_uid != '' and info.connected_uid == device_info.uid:
                     if info in device_info.connections_values(): # device was already connected, but to another port
                         device_info.connections_remove_value(info)
 
@@ -953,7 +1108,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                         add_to_connections(info, device_info)
 
             if device_info.plugin == None:
-                self.plugin_manager.create_plugin_instance(device_identifier, self.ipcon, device_info)
+                self.plugin_manager.create_headless_plugin_instance(device_identifier, self.ipcon, device_info)
 
                 device_info.tab_window = self.create_tab_window(device_info, self.ipcon)
                 device_info.tab_window.setWindowFlags(Qt.Widget)
@@ -984,7 +1139,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         for other_info in inventory.get_device_infos():
             other_info.connections_remove_value(device_info)
 
-        self.update_tree_view()
+        self.delayed_update_tree_view_timer.start()
 
     def hack_to_remove_red_brick_tab(self, uid):
         device_info = inventory.get_info(uid)
@@ -1090,7 +1245,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.update_ui_state(IPConnection.CONNECTION_STATE_PENDING)
 
     def set_tree_view_defaults(self):
-        self.tree_view_model.setHorizontalHeaderLabels(self.tree_view_model_labels)
         self.tree_view.setAnimated(False)
         self.tree_view.expandAll()
         self.tree_view.setAnimated(True)
@@ -1175,15 +1329,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def update_tree_view(self):
         self.delayed_update_tree_view_timer.stop()
 
-        self.tree_view_model.setHorizontalHeaderLabels(self.tree_view_model_labels)
         self.tab_widget.tabBar().setTabButton(0, QTabBar.RightSide, None)
 
-        sis = self.tree_view.header().sortIndicatorSection()
-        sio = self.tree_view.header().sortIndicatorOrder()
+        any_updateable = False
 
-        self.tree_view_model.clear()
+        def get_row(info, children):
+            nonlocal any_updateable
 
-        def get_row(info):
             replacement = '0.0.0'
             is_red_brick = isinstance(info, BrickREDInfo)
 
@@ -1197,11 +1349,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                                             is_red_brick=is_red_brick)
 
             uid = info.uid if info.kind != "extension" else ''
-
-            row = [QStandardItem(info.name),
-                   QStandardItem(uid),
-                   QStandardItem(info.position.title()),
-                   QStandardItem(fw_version)]
+            texts = [info.name, uid, info.position.title(), fw_version]
 
             updateable = info.firmware_version_installed != (0, 0, 0) and info.firmware_version_installed < info.firmware_version_latest
 
@@ -1222,43 +1370,55 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 red_brick_binding_update_only = False
 
             if updateable:
-                self.tree_view_model.setHorizontalHeaderLabels(self.tree_view_model_labels + ['Update'])
-                row.append(QStandardItem(
-                    get_version_string(info.firmware_version_latest, is_red_brick=is_red_brick) + ("+" if red_brick_binding_update_only else "")))
-
-                self.tab_widget.tabBar().setTabButton(0, QTabBar.RightSide, self.update_tab_button)
-                self.update_tab_button.show()
-
-            for item in row:
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                if updateable:
-                    item.setData(QBrush(QColor(255, 160, 55)), Qt.BackgroundRole)
+                any_updateable = True
+                texts.append(get_version_string(info.firmware_version_latest, is_red_brick=is_red_brick) + ("+" if red_brick_binding_update_only else ""))
+                background = QBrush(QColor(255, 160, 55))
+            else:
+                background = None
 
-            return row
+            # extensions have no UID, their position is unique below their Brick
+            if info.kind == "extension":
+                key = info.position
+            else:
+                key = info.uid
 
-        def recurse_on_device(info, insertion_point):
-            row = get_row(info)
-            insertion_point.appendRow(row)
+            return DevicesTreeRow(key, texts, background=background, children=children)
 
-            for child in info.connections_values():
-                recurse_on_device(child, row[0])
+        def get_device_row(info):
+            children = [get_device_row(child) for child in info.connections_values()]
 
             if info.can_have_extension:
                 for extension in info.extensions.values():
                     if extension is None:
                         continue
-                    ext_row = get_row(extension)
-                    row[0].appendRow(ext_row)
+
+                    children.append(get_row(extension, ()))
+
+            return get_row(info, children)
+
+        rows = []
 
         for info in inventory.get_device_infos():
             # If a device has a reverse connection, it will be handled as a child of another top-level brick.
             if info.reverse_connection is not None:
                 continue
 
-            recurse_on_device(info, self.tree_view_model)
+            rows.append(get_device_row(info))
+
+        if any_updateable:
+            self.tree_view_model.set_labels(self.tree_view_model_labels + ['Update'])
+            self.tree_view.setColumnWidth(4, 105)
+        else:
+            self.tree_view_model.set_labels(self.tree_view_model_labels)
+
+        # only the inserted rows get expanded, existing rows keep their state
+        for item, expanded in self.tree_view_model.update_rows(rows):
+            self.tree_view.setExpanded(self.tree_view_proxy_model.mapFromSource(item.index()), expanded)
+
+        if any_updateable:
+            self.tab_widget.tabBar().setTabButton(0, QTabBar.RightSide, self.update_tab_button)
+            self.update_tab_button.show()
 
-        self.set_tree_view_defaults()
-        self.tree_view.header().setSortIndicator(sis, sio)
         self.delayed_refresh_updates_timer.start()
 
     def delayed_refresh_updates(self):
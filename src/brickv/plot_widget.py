@@ -26,14 +26,15 @@ Boston, MA 02111-1307, USA.
 import math
 import functools
 import bisect
-from collections import namedtuple
+from array import array
+from collections import namedtuple, deque
 import time
-import queue
 import threading
+import weakref
 
-from PyQt5.QtCore import pyqtSignal, Qt, QObject, QTimer, QSize, QRectF, QLineF, QPoint, QPointF, QThread
+from PyQt5.QtCore import pyqtSignal, Qt, QObject, QTimer, QSize, QRectF, QLineF, QPoint, QPointF
 from PyQt5.QtGui import QPainter, QFontMetrics, QPixmap, QIcon, QColor, \
-                        QPainterPath, QTransform, QPen, QFont, QPalette
+                        QTransform, QPen, QFont, QPalette, QPolygonF, QGuiApplication
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QToolButton, \
                             QSizePolicy, QLabel, QSpinBox, QDialog
 
@@ -50,13 +51,27 @@ CURVE_Y_OFFSET_COMPENSATION = 0.5
 CURVE_HEIGHT_COMPENSATION = 1.0
 CURVE_JUMP_COLOR = QColor(140, 140, 140)
 CANVAS_BORDER_COLOR = QColor(190, 190, 190)
+HISTORY_RAW_CAPACITY = 4096 # samples
+HISTORY_LEVEL_CAPACITY = 2048 # buckets per level
+HISTORY_BUCKET_WIDTHS = [0.1, 0.5, 2.5, 12.5, 62.5] # seconds, covers about 35 hours
+HISTORY_X_DIFF_MIN = 1.0 # seconds
+HISTORY_TICK_DISTANCE_MIN = 60 # px, between two labeled x-scale ticks in the history view
+HISTORY_ZOOM_STEP = 1.25 # zoom factor per wheel step
+HISTORY_TEXT_COLOR = QColor(140, 140, 140)
 
-plot_timers = {} # by interval
+plot_clock = None
+
+def get_plot_clock():
+    global plot_clock
+
+    if plot_clock == None:
+        plot_clock = PlotClock()
+
+    return plot_clock
 
 def stop_plot_timers():
-    for plot_timer in plot_timers.values():
-        plot_timer.stop()
-        plot_timer.wait(1000)
+    if plot_clock != None:
+        plot_clock.stop()
 
 def istr(i):
     return str(int(i))
@@ -78,6 +93,17 @@ def fuzzy_leq(a, b):
 def fuzzy_geq(a, b):
     return a > b or fuzzy_eq(a, b)
 
+# returns the smallest step size of the sequence 1, 2, 5, 10, 20, 50 etc that
+# is at least step_size_min, together with a fitting subdivision count
+def get_step_size(step_size_min):
+    step_size = 10.0 ** math.floor(math.log(max(step_size_min, EPSILON), 10.0))
+
+    for multiplier, step_subdivision_count in [(1, 5), (2, 4), (5, 5), (10, 5)]:
+        if fuzzy_geq(step_size * multiplier, step_size_min):
+            break
+
+    return step_size * multiplier, step_subdivision_count
+
 class PlotScaleConfigWindow(QDialog, Ui_PlotScaleConfig):
     def __init__(self, parent, y_scale_title_text, x_scale_title_text):
         super().__init__(parent, get_modeless_dialog_flags())
@@ -135,36 +161,93 @@ class PlotScaleConfigWindow(QDialog, Ui_PlotScaleConfig):
     def x_scale_change(self):
         self.parent().plot.set_x_diff(self.spin_x_scale_length.value())
 
-class PlotTimer(QThread):
-    timeout = pyqtSignal()
+class PlotClock(QObject):
+    """
+    Single clock in the GUI thread that ticks all plot widgets in one pass. The
+    clock interval is the shortest update interval of all running plot widgets,
+    rounded to a multiple of the display refresh interval. It is recomputed if
+    a plot widget is added, removed, paused or resumed. Paused plot widgets are
+    not ticked at all. Hidden plot widgets, including those in a non-visible tab,
+    are only ticked every HIDDEN_INTERVAL to keep their pending data bounded.
+    """
 
-    def __init__(self, interval):
+    HIDDEN_INTERVAL = 1.0 # seconds
+
+    def __init__(self):
         super().__init__(get_main_window())
 
-        self.interval = interval
-        self.stop_flag = False
-        self.stop_queue = queue.Queue()
+        self.plot_widgets = weakref.WeakKeyDictionary() # plot widget -> monotonic timestamp of last tick
+        self.plot_widget_count = 0 # to notice plot widgets that got garbage collected
+        self.interval = None # seconds
+        self.stopped = False
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+    def get_frame_interval(self): # seconds
+        screen = QGuiApplication.primaryScreen()
+
+        if screen == None or screen.refreshRate() <= 0:
+            return 1 / 60
+
+        return 1 / screen.refreshRate()
 
-    def run(self):
-        monotonic_timestamp = time.monotonic()
+    def add(self, plot_widget):
+        self.plot_widgets[plot_widget] = time.monotonic()
 
-        while not self.stop_flag:
-            elapsed = time.monotonic() - monotonic_timestamp
-            remaining = max(self.interval - elapsed, 0)
+        self.update_timer()
 
+    def update_timer(self):
+        if self.stopped:
+            return
+
+        self.plot_widget_count = len(self.plot_widgets)
+        update_intervals = [plot_widget.update_interval for plot_widget in self.plot_widgets.keys() if not plot_widget.stop]
+
+        if len(update_intervals) == 0:
+            self.interval = None
+            self.timer.stop()
+            return
+
+        frame_interval = self.get_frame_interval()
+        interval = max(round(min(update_intervals) / frame_interval), 1) * frame_interval
+
+        if interval != self.interval or not self.timer.isActive():
+            self.interval = interval
+            self.timer.start(max(round(interval * 1000), 1))
+
+    def tick(self):
+        now = time.monotonic()
+
+        if len(self.plot_widgets) != self.plot_widget_count:
+            self.update_timer()
+
+            if self.interval == None:
+                return
+
+        for plot_widget, last_tick in list(self.plot_widgets.items()):
             try:
-                self.stop_queue.get(timeout=remaining)
-                break
-            except queue.Empty:
-                pass
+                if plot_widget.stop:
+                    continue
+
+                if plot_widget.isVisible():
+                    interval = plot_widget.update_interval
+                else:
+                    interval = PlotClock.HIDDEN_INTERVAL
 
-            monotonic_timestamp = time.monotonic()
+                # allow half a clock interval of jitter
+                if now - last_tick < interval - self.interval / 2:
+                    continue
+
+                self.plot_widgets[plot_widget] = now
 
-            self.timeout.emit()
+                plot_widget.add_new_data()
+            except RuntimeError: # underlying C++ object was already deleted
+                self.plot_widgets.pop(plot_widget, None)
 
     def stop(self):
-        self.stop_flag = True
-        self.stop_queue.put(None)
+        self.stopped = True
+        self.timer.stop()
 
 class FakeLock:
     def __enter__(self):
@@ -194,6 +277,345 @@ class CurveValueWrapper:
 
             self.history.append((time.monotonic(), value))
 
+class CurveData:
+    """
+    Points of a single curve, stored in flat arrays. Removing the oldest points
+    only advances the start index, the arrays are compacted once the unused
+    prefix is as large as the used part. Together with monotonic deques for
+    the sliding y-minimum and y-maximum this makes appending a point and
+    removing the oldest points amortized O(1).
+    """
+
+    def __init__(self):
+        self.x = array('d')
+        self.y = array('d')
+        self.jump = bytearray()
+        self.start = 0 # index of the oldest point in x, y and jump
+        self.removed = 0 # number of points removed so far, used as index base
+        self.y_min_deque = deque() # (index, y) with ascending y
+        self.y_max_deque = deque() # (index, y) with descending y
+
+    def __len__(self):
+        return len(self.x) - self.start
+
+    def append(self, x, y, jump):
+        index = self.removed + len(self)
+
+        self.x.append(x)
+        self.y.append(y)
+        self.jump.append(jump)
+
+        while len(self.y_min_deque) > 0 and self.y_min_deque[-1][1] >= y:
+            self.y_min_deque.pop()
+
+        self.y_min_deque.append((index, y))
+
+        while len(self.y_max_deque) > 0 and self.y_max_deque[-1][1] <= y:
+            self.y_max_deque.pop()
+
+        self.y_max_deque.append((index, y))
+
+    def remove_first(self, count):
+        count = min(count, len(self))
+
+        if count <= 0:
+            return
+
+        self.start += count
+        self.removed += count
+
+        while len(self.y_min_deque) > 0 and self.y_min_deque[0][0] < self.removed:
+            self.y_min_deque.popleft()
+
+        while len(self.y_max_deque) > 0 and self.y_max_deque[0][0] < self.removed:
+            self.y_max_deque.popleft()
+
+        if self.start >= len(self.x) - self.start:
+            del self.x[:self.start]
+            del self.y[:self.start]
+            del self.jump[:self.start]
+
+            self.start = 0
+
+    def set(self, x, y):
+        self.x = array('d', x)
+        self.y = array('d', y)
+        self.jump = bytearray(len(x))
+        self.start = 0
+        self.removed = 0
+        self.y_min_deque = deque()
+        self.y_max_deque = deque()
+
+        for index, value in enumerate(self.y):
+            while len(self.y_min_deque) > 0 and self.y_min_deque[-1][1] >= value:
+                self.y_min_deque.pop()
+
+            self.y_min_deque.append((index, value))
+
+            while len(self.y_max_deque) > 0 and self.y_max_deque[-1][1] <= value:
+                self.y_max_deque.pop()
+
+            self.y_max_deque.append((index, value))
+
+    # returns the index into x, y and jump of the first point with an x-value >= x
+    def bisect_x(self, x):
+        return bisect.bisect_left(self.x, x, self.start)
+
+    @property
+    def x_first(self):
+        return self.x[self.start] if len(self) > 0 else None
+
+    @property
+    def x_last(self):
+        return self.x[-1] if len(self) > 0 else None
+
+    @property
+    def y_min(self):
+        return self.y_min_deque[0][1] if len(self.y_min_deque) > 0 else None
+
+    @property
+    def y_max(self):
+        return self.y_max_deque[0][1] if len(self.y_max_deque) > 0 else None
+
+class CurveDecimation:
+    """
+    Level-of-detail representation of a CurveData for a given x-scale factor.
+    For every pixel column only the first, minimum, maximum and last point are
+    kept, so drawing cost depends on the plot width instead of the number of
+    points. The decimated points are maintained incrementally: each update only
+    processes points that were added since the last update. The column of the
+    newest point is still open and kept separately until a point for the next
+    column arrives.
+    """
+
+    def __init__(self, curve, factor_x):
+        self.curve = curve
+        self.curve_x = curve.x # detects CurveData.set replacing the arrays
+        self.factor_x = factor_x
+        self.points = CurveData()
+        self.next_index = curve.removed # index of the next curve point to process
+        self.column = None
+        self.column_jump = False
+        self.column_entries = None # [first, min, max, last] as (index, x, y)
+
+    def is_valid(self, curve, factor_x):
+        return self.curve is curve and self.curve_x is curve.x and self.factor_x == factor_x
+
+    def update(self):
+        curve = self.curve
+
+        if len(curve) == 0:
+            self.points.remove_first(len(self.points))
+            self.column = None
+            self.column_entries = None
+        else:
+            self.points.remove_first(self.points.bisect_x(curve.x_first) - self.points.start)
+
+        curve_x = curve.x
+        curve_y = curve.y
+        curve_jump = curve.jump
+        offset = curve.start - curve.removed
+        factor_x = self.factor_x
+
+        for i in range(max(self.next_index, curve.removed) + offset, len(curve_x)):
+            x = curve_x[i]
+            y = curve_y[i]
+            entry = (i - offset, x, y)
+            column = math.floor(x * factor_x)
+
+            if column != self.column or curve_jump[i]:
+                self.flush_column()
+
+                self.column = column
+                self.column_jump = curve_jump[i] != 0
+                self.column_entries = [entry, entry, entry, entry]
+            else:
+                entries = self.column_entries
+
+                if y < entries[1][2]:
+                    entries[1] = entry
+
+                if y > entries[2][2]:
+                    entries[2] = entry
+
+                entries[3] = entry
+
+        self.next_index = curve.removed + len(curve)
+
+    def flush_column(self):
+        if self.column_entries == None:
+            return
+
+        jump = self.column_jump
+
+        for entry in self.get_open_entries():
+            self.points.append(entry[1], entry[2], jump)
+            jump = False
+
+        self.column_entries = None
+
+    # returns the distinct points of the open column in curve order
+    def get_open_entries(self):
+        if self.column_entries == None:
+            return []
+
+        return sorted(set(self.column_entries))
+
+class HistoryLevel:
+    """
+    One level of the min/max pyramid of a CurveHistory. Samples are collected
+    into buckets of fixed x-width, for each bucket its start x-value and the
+    minimum and maximum y-value are stored. A level with a bucket width of None
+    stores the raw samples. The level keeps at most capacity buckets, the
+    oldest buckets are dropped first.
+    """
+
+    def __init__(self, bucket_width, capacity):
+        self.bucket_width = bucket_width
+        self.capacity = capacity
+        self.x = array('d') # bucket start
+        self.y_min = array('f')
+        self.y_max = array('f')
+        self.jump = bytearray()
+        self.start = 0 # index of the oldest bucket in x, y_min, y_max and jump
+        self.dropped = False # True if buckets were dropped because of the capacity limit
+        self.bucket = None # index of the open bucket
+        self.bucket_entry = None # [x, y_min, y_max, jump] of the open bucket
+
+    def __len__(self):
+        return len(self.x) - self.start
+
+    def add(self, x, y, jump):
+        if self.bucket_width == None:
+            self.append(x, y, y, jump)
+            return
+
+        bucket = math.floor(x / self.bucket_width)
+
+        if bucket != self.bucket:
+            self.flush_bucket()
+
+            self.bucket = bucket
+            self.bucket_entry = [bucket * self.bucket_width, y, y, jump]
+        else:
+            entry = self.bucket_entry
+
+            if y < entry[1]:
+                entry[1] = y
+
+            if y > entry[2]:
+                entry[2] = y
+
+            if jump:
+                entry[3] = True
+
+    def flush_bucket(self):
+        if self.bucket_entry != None:
+            self.append(*self.bucket_entry)
+
+            self.bucket_entry = None
+
+    def append(self, x, y_min, y_max, jump):
+        self.x.append(x)
+        self.y_min.append(y_min)
+        self.y_max.append(y_max)
+        self.jump.append(jump)
+
+        if len(self) > self.capacity:
+            self.start += 1
+            self.dropped = True
+
+            if self.start >= len(self.x) - self.start:
+                del self.x[:self.start]
+                del self.y_min[:self.start]
+                del self.y_max[:self.start]
+                del self.jump[:self.start]
+
+                self.start = 0
+
+    @property
+    def x_first(self):
+        if len(self) > 0:
+            return self.x[self.start]
+        elif self.bucket_entry != None:
+            return self.bucket_entry[0]
+        else:
+            return None
+
+    # returns the [first, last) index range of the buckets overlapping the given x-range
+    def get_range(self, x_min, x_max):
+        first = max(bisect.bisect_right(self.x, x_min, self.start) - 1, self.start)
+        last = bisect.bisect_right(self.x, x_max, first)
+
+        return first, last
+
+    # returns the buckets overlapping the given x-range, including the open
+    # bucket, as (x, y_min, y_max, jump) tuples. the range is extended by one
+    # bucket on each side to connect the curve to the edges
+    def get_entries(self, x_min, x_max):
+        first, last = self.get_range(x_min, x_max)
+        first = max(first - 1, self.start)
+        last = min(last + 1, len(self.x))
+        entries = list(zip(self.x[first:last], self.y_min[first:last], self.y_max[first:last], self.jump[first:last]))
+
+        if self.bucket_entry != None and self.bucket_entry[0] <= x_max + self.bucket_width:
+            entries.append(tuple(self.bucket_entry))
+
+        return entries
+
+class CurveHistory:
+    """
+    Bounded long-term history of a curve, stored as a multi-resolution min/max
+    pyramid: the most recent raw samples plus several levels of min/max
+    buckets with growing width. Each level is filled directly from the raw
+    samples, so adding a sample is O(number of levels). For drawing, the level
+    with about one bucket per pixel is selected, so drawing cost depends on the
+    plot width instead of the zoom level.
+    """
+
+    def __init__(self):
+        self.levels = [HistoryLevel(None, HISTORY_RAW_CAPACITY)]
+
+        for bucket_width in HISTORY_BUCKET_WIDTHS:
+            self.levels.append(HistoryLevel(bucket_width, HISTORY_LEVEL_CAPACITY))
+
+        self.x_last = None
+
+    def append(self, x, y, jump):
+        for level in self.levels:
+            level.add(x, y, jump)
+
+        self.x_last = x
+
+    @property
+    def x_first(self):
+        return self.levels[-1].x_first
+
+    # returns the level to draw the given x-range with the given width in px
+    def select_level(self, x_min, x_max, width):
+        max_count = max(width, 1) * 2
+
+        for level in self.levels:
+            # skip levels that don't reach back far enough anymore
+            if level.dropped and (level.x_first == None or level.x_first > x_min):
+                continue
+
+            first, last = level.get_range(x_min, x_max)
+
+            if last - first <= max_count:
+                return level
+
+        return self.levels[-1]
+
+    # returns the y-range of the given x-range at the resolution used for drawing
+    def get_y_min_max(self, x_min, x_max, width):
+        entries = self.select_level(x_min, x_max, width).get_entries(x_min, x_max)
+
+        if len(entries) == 0:
+            return None, None
+
+        return min(entry[1] for entry in entries), max(entry[2] for entry in entries)
+
 class Scale(QObject):
     def __init__(self, tick_text_font, title_text_font, parent):
         super().__init__(parent)
@@ -569,6 +991,17 @@ class CurveArea(QWidget):
         self.plot = plot
 
         self.max_points = None
+        self.decimations = {} # by curve index
+        self.polygon = QPolygonF() # reused for every polyline to avoid reallocations
+        self.backing_pixmap = None
+        self.backing_key = None
+        self.backing_offset_x = None # px, x-offset of the transform the pixmap content is aligned to
+        self.backing_curves_x_min = None
+        self.backing_curves_x_max = None
+        self.drag_x = None # px, last mouse position while panning the history view
+
+        if self.plot.history_enabled:
+            self.setToolTip('Ctrl+Wheel to zoom, drag to pan, double-click to return to live view')
 
         # FIXME: need to enable opaque painting to avoid that updates of other
         #        widgets trigger a full update of the curve
@@ -577,115 +1010,415 @@ class CurveArea(QWidget):
     # override QWidget.paintEvent
     def paintEvent(self, event):
         painter = QPainter(self)
+
+        if self.plot.x_min == None or self.plot.x_max == None:
+            self.backing_pixmap = None
+
+            if DEBUG:
+                painter.fillRect(event.rect(), Qt.blue)
+            else:
+                painter.fillRect(event.rect(), self.plot.canvas_color)
+
+            return
+
         width = self.width()
         height = self.height()
 
-        if DEBUG:
-            painter.fillRect(0, 0, width, height, Qt.blue)
-        else:
-            painter.fillRect(event.rect(), self.plot.canvas_color)
+        if self.plot.history_view != None:
+            self.backing_pixmap = None
+
+            self.draw_history(painter, QRectF(event.rect()), width, height)
 
+            return
+
+        factor_x = width / self.plot.x_diff
+        transform = self.get_transform(width, height, factor_x)
+
+        self.plot.partial_update_width = math.ceil(transform.map(QLineF(0, 0, 1.5, 0)).length())
+
+        self.update_backing_pixmap(width, height, factor_x, transform)
+
+        # the backing pixmap is always in sync with the curve data, so any
+        # requested region can be copied from it
+        ratio = self.backing_pixmap.devicePixelRatio()
+        rect = QRectF(event.rect())
+        source = QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+
+        painter.drawPixmap(rect, self.backing_pixmap, source)
+
+    def get_transform(self, width, height, factor_x):
         y_min_scale = self.plot.y_scale.value_min
         y_max_scale = self.plot.y_scale.value_max
 
-        factor_x = width / self.plot.x_diff
         factor_y = (height - CURVE_HEIGHT_COMPENSATION) / max(y_max_scale - y_min_scale, EPSILON)
 
-        if self.plot.x_min != None and self.plot.x_max != None:
-            x_min = self.plot.x_min
-            x_max = self.plot.x_max
+        x_min = self.plot.x_min
+        x_max = self.plot.x_max
+
+        if self.plot.curve_start == 'left':
+            curve_x_offset = int((x_min - int(x_min)) * factor_x)
+        else:
+            curve_x_offset = int((self.plot.x_diff - (x_max - x_min)) * factor_x)
+
+        transform = QTransform()
+
+        transform.translate(curve_x_offset, height - CURVE_Y_OFFSET_COMPENSATION)
+        transform.scale(factor_x, -factor_y)
+        transform.translate(-x_min, -y_min_scale)
+
+        return transform
+
+    # Brings the backing pixmap up to date. As long as only the x-offset of the
+    # transform changed, the already drawn pixels are scrolled by the x-delta
+    # and only the exposed strips are drawn again: the strip between the old
+    # and the new left end of the curves (removed data) and the strip from the
+    # old right end of the curves to the right edge (new data). Everything else
+    # (size, y-scale, visibility, set_data, clear) forces a full redraw
+    def update_backing_pixmap(self, width, height, factor_x, transform):
+        ratio = self.devicePixelRatioF()
+        key = (width, height, ratio, factor_x, transform.m22(), transform.dy(),
+               tuple(self.plot.curves_visible), self.plot.curves_generation)
+
+        # x-offset of the transform in px: x_device = x * factor_x + offset_x
+        offset_x = transform.dx()
+        scroll = 0 # physical px
+
+        if self.backing_pixmap != None and self.backing_key == key:
+            scroll = round((offset_x - self.backing_offset_x) * ratio)
+
+            if abs(scroll) >= self.backing_pixmap.width():
+                self.backing_pixmap = None
+            elif scroll != 0:
+                self.backing_pixmap.scroll(scroll, 0, self.backing_pixmap.rect())
+                self.backing_offset_x += scroll / ratio
+
+        strips = self.get_dirty_strips(width, factor_x, key, scroll / ratio)
+
+        if strips == None:
+            self.backing_pixmap = QPixmap(max(round(width * ratio), 1), max(round(height * ratio), 1))
+            self.backing_pixmap.setDevicePixelRatio(ratio)
+            self.backing_key = key
+            self.backing_offset_x = offset_x
 
-            if self.plot.curve_start == 'left':
-                curve_x_offset = int((x_min - int(x_min)) * factor_x)
+            strips = [(0, width)]
+
+        # draw aligned to the scrolled pixels, the remaining sub-pixel error is
+        # not accumulated, because the scroll is always calculated from the
+        # actual transform
+        transform = transform * QTransform.fromTranslate(self.backing_offset_x - offset_x, 0)
+        painter = QPainter(self.backing_pixmap)
+
+        for left, right in strips:
+            self.draw_curves(painter, QRectF(left, 0, right - left, height), factor_x, transform)
+
+        painter.end()
+
+        self.backing_curves_x_min = list(self.plot.curves_x_min)
+        self.backing_curves_x_max = list(self.plot.curves_x_max)
+
+    # returns the sorted and merged list of (left, right) strips in px that
+    # have to be drawn again, or None if the whole pixmap has to be redrawn
+    def get_dirty_strips(self, width, factor_x, key, scroll):
+        if self.backing_pixmap == None or self.backing_key != key:
+            return None
+
+        margin = 2 # px, covers the pen width and the open decimation column
+        strips = []
+
+        if scroll > 0:
+            strips.append((0, scroll))
+        elif scroll < 0:
+            strips.append((width + scroll, width))
+
+        def to_px(x):
+            return x * factor_x + self.backing_offset_x
+
+        for c, visible in enumerate(self.plot.curves_visible):
+            if not visible:
+                continue
+
+            old_x_min = self.backing_curves_x_min[c]
+            old_x_max = self.backing_curves_x_max[c]
+            new_x_min = self.plot.curves_x_min[c]
+            new_x_max = self.plot.curves_x_max[c]
+
+            if old_x_min == new_x_min and old_x_max == new_x_max:
+                continue
+
+            if None in [old_x_min, old_x_max, new_x_min, new_x_max]:
+                return None
+
+            if old_x_min != new_x_min: # data got removed
+                strips.append((to_px(min(old_x_min, new_x_min)) - margin, to_px(max(old_x_min, new_x_min)) + margin))
+
+            if old_x_max != new_x_max: # data got added
+                strips.append((to_px(min(old_x_max, new_x_max)) - margin, width))
+
+        merged = []
+
+        for left, right in sorted(strips):
+            left = max(math.floor(left), 0)
+            right = min(math.ceil(right), width)
+
+            if right <= left:
+                continue
+
+            if len(merged) > 0 and left <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], right))
             else:
-                curve_x_offset = int((self.plot.x_diff - (x_max - x_min)) * factor_x)
+                merged.append((left, right))
 
-            transform = QTransform()
+        return merged
 
-            transform.translate(curve_x_offset, height - CURVE_Y_OFFSET_COMPENSATION)
-            transform.scale(factor_x, -factor_y)
-            transform.translate(-x_min, -y_min_scale)
+    def draw_curves(self, painter, rect, factor_x, transform):
+        if DEBUG:
+            painter.fillRect(rect, Qt.blue)
+        else:
+            painter.fillRect(rect, self.plot.canvas_color)
 
-            self.plot.partial_update_width = math.ceil(transform.map(QLineF(0, 0, 1.5, 0)).length())
-            inverted_event_rect = transform.inverted()[0].mapRect(QRectF(event.rect()))
+        y_min_scale = self.plot.y_scale.value_min
+        y_max_scale = self.plot.y_scale.value_max
 
-            painter.save()
-            painter.setTransform(transform)
+        inverted_rect = transform.inverted()[0].mapRect(rect)
 
-            pen = QPen()
-            pen.setCosmetic(True)
-            pen.setWidth(0)
+        painter.save()
+        painter.setClipRect(rect)
+        painter.setTransform(transform)
 
-            painter.setPen(pen)
+        pen = QPen()
+        pen.setCosmetic(True)
+        pen.setWidth(0)
 
-            if False and self.plot.curves_visible[0]:
-                # Currently unused support for bar graphs.
-                # If we need this later on we should add an option to the
-                # PlotWidget for it.
-                # I tested this for the Sound Pressure Level Bricklet and it works,
-                # but it didnt't look good.
-                curve_x = self.plot.curves_x[0]
-                curve_y = self.plot.curves_y[0]
-
-                t = time.time()
-                if self.max_points == None:
-                    self.max_points = []
-                    for y in curve_y:
-                        self.max_points.append((t, y))
-                else:
-                    for i in range(len(curve_y)):
-                        if (curve_y[i] > self.max_points[i][1]) or ((t - self.max_points[i][0]) > 5):
-                            self.max_points[i] = (t, curve_y[i])
+        painter.setPen(pen)
 
-                for i in range(len(self.plot.curves_x[0])):
-                    pen.setColor(self.plot.curve_configs[0].color)
-                    painter.setPen(pen)
-                    painter.drawLine(QPoint(curve_x[i], 0), QPoint(curve_x[i], curve_y[i]))
-                    pen.setColor(Qt.white)
-                    painter.setPen(pen)
-                    painter.drawLine(QPoint(curve_x[i], curve_y[i]), QPoint(curve_x[i], y_max_scale))
-                    pen.setColor(Qt.darkGreen)
-                    painter.setPen(pen)
-                    painter.drawPoint(QPoint(curve_x[i], self.max_points[i][1]))
+        if False and self.plot.curves_visible[0]:
+            # Currently unused support for bar graphs.
+            # If we need this later on we should add an option to the
+            # PlotWidget for it.
+            # I tested this for the Sound Pressure Level Bricklet and it works,
+            # but it didnt't look good.
+            curve_x = self.plot.curves[0].x[self.plot.curves[0].start:]
+            curve_y = self.plot.curves[0].y[self.plot.curves[0].start:]
+
+            t = time.time()
+            if self.max_points == None:
+                self.max_points = []
+                for y in curve_y:
+                    self.max_points.append((t, y))
             else:
-                for c in range(len(self.plot.curves_x)):
-                    if not self.plot.curves_visible[c]:
-                        continue
+                for i in range(len(curve_y)):
+                    if (curve_y[i] > self.max_points[i][1]) or ((t - self.max_points[i][0]) > 5):
+                        self.max_points[i] = (t, curve_y[i])
+
+            for i in range(len(curve_x)):
+                pen.setColor(self.plot.curve_configs[0].color)
+                painter.setPen(pen)
+                painter.drawLine(QPoint(curve_x[i], 0), QPoint(curve_x[i], curve_y[i]))
+                pen.setColor(Qt.white)
+                painter.setPen(pen)
+                painter.drawLine(QPoint(curve_x[i], curve_y[i]), QPoint(curve_x[i], y_max_scale))
+                pen.setColor(Qt.darkGreen)
+                painter.setPen(pen)
+                painter.drawPoint(QPoint(curve_x[i], self.max_points[i][1]))
+        else:
+            for c, curve in enumerate(self.plot.curves):
+                if not self.plot.curves_visible[c]:
+                    continue
+
+                decimation = self.decimations.get(c)
+
+                if decimation == None or not decimation.is_valid(curve, factor_x):
+                    decimation = CurveDecimation(curve, factor_x)
+                    self.decimations[c] = decimation
+
+                decimation.update()
+
+                points = decimation.points
+                points_x = points.x
+                points_y = points.y
+                points_jump = points.jump
+                open_entries = decimation.get_open_entries()
+
+                if len(points) + len(open_entries) == 0:
+                    continue
+
+                if len(points) > 0:
+                    start = max(min(points.bisect_x(inverted_rect.left()), len(points_x) - 1) - 1, points.start)
+                else:
+                    start = points.start
+
+                polygon = self.polygon
+                jump_x = []
+
+                polygon.clear() # keeps the allocated capacity
+
+                pen.setColor(self.plot.curve_configs[c].color)
+                painter.setPen(pen)
+
+                # split into polylines at jumps
+                for i in range(start, len(points_x)):
+                    if points_jump[i] and i > start:
+                        self.draw_polyline(painter, polygon)
+                        jump_x.append(points_x[i])
+
+                    polygon.append(QPointF(points_x[i], points_y[i]))
+
+                for k, entry in enumerate(open_entries):
+                    if k == 0 and decimation.column_jump and polygon.count() > 0:
+                        self.draw_polyline(painter, polygon)
+                        jump_x.append(entry[1])
 
-                    curve_x = self.plot.curves_x[c]
-                    curve_y = self.plot.curves_y[c]
-                    curve_jump = self.plot.curves_jump[c]
-                    path = QPainterPath()
-                    lineTo = path.lineTo
-                    moveTo = path.moveTo
-                    start = max(min(bisect.bisect_left(curve_x, inverted_event_rect.left()), len(curve_x) - 1) - 1, 0)
+                    polygon.append(QPointF(entry[1], entry[2]))
 
-                    if start >= len(curve_x):
-                        continue
+                self.draw_polyline(painter, polygon)
 
+                if len(jump_x) > 0:
                     pen.setColor(CURVE_JUMP_COLOR)
                     painter.setPen(pen)
 
-                    moveTo(curve_x[start], curve_y[start])
+                    for x in jump_x:
+                        painter.drawLine(QPointF(x, y_min_scale), QPointF(x, y_max_scale))
 
-                    for i in range(start + 1, len(curve_x)):
-                        if curve_jump[i]:
-                            painter.drawLine(QPointF(curve_x[i], y_min_scale), QPointF(curve_x[i], y_max_scale))
-                            moveTo(curve_x[i], curve_y[i])
-                        else:
-                            lineTo(curve_x[i], curve_y[i])
+        painter.restore()
 
-                    pen.setColor(self.plot.curve_configs[c].color)
-                    painter.setPen(pen)
-                    painter.drawPath(path)
+    def draw_history(self, painter, rect, width, height):
+        if DEBUG:
+            painter.fillRect(rect, Qt.blue)
+        else:
+            painter.fillRect(rect, self.plot.canvas_color)
+
+        x_min, x_diff = self.plot.history_view
+        y_min_scale = self.plot.y_scale.value_min
+        y_max_scale = self.plot.y_scale.value_max
+
+        factor_x = width / x_diff
+        factor_y = (height - CURVE_HEIGHT_COMPENSATION) / max(y_max_scale - y_min_scale, EPSILON)
+
+        transform = QTransform()
+
+        transform.translate(0, height - CURVE_Y_OFFSET_COMPENSATION)
+        transform.scale(factor_x, -factor_y)
+        transform.translate(-x_min, -y_min_scale)
+
+        painter.save()
+        painter.setTransform(transform)
+
+        pen = QPen()
+        pen.setCosmetic(True)
+        pen.setWidth(0)
+
+        for c, history in enumerate(self.plot.histories):
+            if not self.plot.curves_visible[c]:
+                continue
 
-            painter.restore()
+            level = history.select_level(x_min, x_min + x_diff, width)
+
+            if level.bucket_width != None:
+                x_offset = level.bucket_width / 2 # draw buckets at their center
+            else:
+                x_offset = 0
+
+            polygon = self.polygon
+            jump_x = []
+
+            polygon.clear()
+
+            pen.setColor(self.plot.curve_configs[c].color)
+            painter.setPen(pen)
+
+            # every bucket is a vertical line from its minimum to its maximum
+            for x, y_min, y_max, jump in level.get_entries(x_min, x_min + x_diff):
+                if jump and polygon.count() > 0:
+                    self.draw_polyline(painter, polygon)
+                    jump_x.append(x)
+
+                polygon.append(QPointF(x + x_offset, y_min))
+
+                if y_max != y_min:
+                    polygon.append(QPointF(x + x_offset, y_max))
+
+            self.draw_polyline(painter, polygon)
+
+            if len(jump_x) > 0:
+                pen.setColor(CURVE_JUMP_COLOR)
+                painter.setPen(pen)
+
+                for x in jump_x:
+                    painter.drawLine(QPointF(x, y_min_scale), QPointF(x, y_max_scale))
+
+        painter.restore()
+
+        painter.setPen(HISTORY_TEXT_COLOR)
+        painter.drawText(QRectF(4, 2, max(width - 8, 0), max(height - 4, 0)),
+                         int(Qt.AlignTop | Qt.AlignLeft),
+                         'History (double-click to return to live view)')
+
+    # override QWidget.wheelEvent
+    def wheelEvent(self, event):
+        if self.plot.histories == None or not (event.modifiers() & Qt.ControlModifier) or self.width() <= 0:
+            super().wheelEvent(event)
+            return
+
+        x_min, x_diff = self.plot.get_x_view()
+        x_anchor = x_min + event.pos().x() * x_diff / self.width()
+
+        self.plot.zoom_history_view(HISTORY_ZOOM_STEP ** (-event.angleDelta().y() / 120.0), x_anchor)
+
+        event.accept()
+
+    # override QWidget.mousePressEvent
+    def mousePressEvent(self, event):
+        if self.plot.histories == None or event.button() != Qt.LeftButton:
+            super().mousePressEvent(event)
+            return
+
+        self.drag_x = event.pos().x()
+
+        event.accept()
+
+    # override QWidget.mouseMoveEvent
+    def mouseMoveEvent(self, event):
+        if self.drag_x == None or self.width() <= 0:
+            super().mouseMoveEvent(event)
+            return
+
+        dx = event.pos().x() - self.drag_x
+
+        if dx != 0:
+            self.drag_x = event.pos().x()
+
+            self.plot.pan_history_view(-dx * self.plot.get_x_view()[1] / self.width())
+
+        event.accept()
+
+    # override QWidget.mouseReleaseEvent
+    def mouseReleaseEvent(self, event):
+        self.drag_x = None
+
+        super().mouseReleaseEvent(event)
+
+    # override QWidget.mouseDoubleClickEvent
+    def mouseDoubleClickEvent(self, event):
+        if self.plot.histories == None:
+            super().mouseDoubleClickEvent(event)
+            return
+
+        self.plot.reset_history_view()
+
+        event.accept()
+
+    # draws and clears the polygon
+    def draw_polyline(self, painter, polygon):
+        if polygon.count() > 1:
+            painter.drawPolyline(polygon)
+
+        polygon.clear()
 
 class Plot(QWidget):
     def __init__(self, parent, x_scale_title_text, y_scale_title_text, x_scale_skip_last_tick,
                  curve_configs, x_scale_visible, y_scale_visible, curve_outer_border_visible,
                  curve_motion, canvas_color, curve_start, x_diff, y_diff_min,
-                 y_scale_shrinkable, update_interval):
+                 y_scale_shrinkable, update_interval, history):
         super().__init__(parent)
 
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -708,6 +1441,10 @@ class Plot(QWidget):
         self.y_diff_min = y_diff_min
         self.partial_update_width = 50 # px, initial value, calculated in update
         self.partial_update_enabled = False
+        self.history_enabled = history
+        self.history_view = None # (x_min, x_diff) while showing the history instead of the live data
+        self.history_y_min = None
+        self.history_y_max = None
 
         self.tick_text_font = self.font()
 
@@ -729,6 +1466,7 @@ class Plot(QWidget):
         self.curve_area = CurveArea(self)
         self.y_scale.total_width_changed.connect(self.resize_curve_area)
 
+        self.curves_generation = 0 # incremented if the curve data changed non-incrementally
         self.clear_graph()
         self.resize_curve_area()
 
@@ -789,7 +1527,7 @@ class Plot(QWidget):
 
         # draw scales
         if self.x_scale_visible:
-            factor_x = curve_width / self.x_diff
+            factor_x = curve_width / self.get_x_view()[1]
 
             self.draw_x_scale(painter, curve_width, factor_x)
 
@@ -850,17 +1588,34 @@ class Plot(QWidget):
             offset_x = self.curve_outer_border
 
         offset_y = self.height() - self.x_scale.total_height
+        x_min, x_diff = self.get_x_view()
 
-        if self.x_min != None:
-            x_min = math.floor(self.x_min)
-        else:
-            x_min = 0.0
+        if self.history_view != None:
+            # the configured step size is made for the live x-diff, adapt it
+            # to the zoom level of the history view
+            step_size = self.x_scale.step_size
+            step_subdivision_count = self.x_scale.step_subdivision_count
+
+            self.x_scale.update_tick_config(*get_step_size(HISTORY_TICK_DISTANCE_MIN / factor))
 
         painter.save()
         painter.translate(offset_x, offset_y)
-        self.x_scale.draw(painter, width, factor, x_min, x_min + self.x_diff)
+        self.x_scale.draw(painter, width, factor, x_min, x_min + x_diff)
         painter.restore()
 
+        if self.history_view != None:
+            self.x_scale.update_tick_config(step_size, step_subdivision_count)
+
+    # returns the (x_min, x_diff) of the visible x-range
+    def get_x_view(self):
+        if self.history_view != None:
+            return self.history_view
+
+        if self.x_min != None:
+            return math.floor(self.x_min), self.x_diff
+        else:
+            return 0.0, self.x_diff
+
     def draw_y_scale(self, painter, height, factor):
         offset_x = self.y_scale.total_width
 
@@ -876,90 +1631,100 @@ class Plot(QWidget):
 
     # NOTE: assumes that x constantly grows
     def add_data(self, c, x, y):
+        self.add_data_many(c, [x], [y])
+
+    # NOTE: assumes that xs constantly grows and continues after the last added x
+    def add_data_many(self, c, xs, ys):
+        if len(xs) == 0:
+            return
+
         if self.y_type == None:
-            self.y_type = type(y)
+            self.y_type = type(ys[0])
 
-        x = float(x)
-        y = float(y)
+        xs = [float(x) for x in xs]
+        ys = [float(y) for y in ys]
 
         last_y_min = self.y_min
         last_y_max = self.y_max
 
         if self.x_min == None:
-            self.x_min = x
+            self.x_min = xs[0]
 
         if self.x_max == None:
-            self.x_max = x
+            self.x_max = xs[0]
 
         if self.curves_visible[c]:
+            ys_min = min(ys)
+            ys_max = max(ys)
+
             if self.y_min == None:
-                self.y_min = y
+                self.y_min = ys_min
             else:
-                self.y_min = min(self.y_min, y)
+                self.y_min = min(self.y_min, ys_min)
 
             if self.y_max == None:
-                self.y_max = y
+                self.y_max = ys_max
             else:
-                self.y_max = max(self.y_max, y)
+                self.y_max = max(self.y_max, ys_max)
+
+        curve = self.curves[c]
+        jump = self.curves_jump_pending[c]
+
+        history = self.histories[c] if self.histories != None else None
+
+        for x, y in zip(xs, ys):
+            curve.append(x, y, jump)
+
+            if history != None:
+                history.append(x, y, jump)
+
+            jump = False
 
-        self.curves_x[c].append(x)
-        self.curves_y[c].append(y)
-        self.curves_jump[c].append(self.curves_jump_pending[c])
         self.curves_jump_pending[c] = False
 
         if self.curves_x_min[c] == None:
-            self.curves_x_min[c] = x
+            self.curves_x_min[c] = curve.x_first
 
-        if self.curves_x_max[c] == None:
-            self.curves_x_max[c] = x
+        removed = False
 
-        if self.curves_y_min[c] == None:
-            self.curves_y_min[c] = y
-        else:
-            self.curves_y_min[c] = min(self.curves_y_min[c], y)
+        while curve.x_last - curve.x_first >= self.x_diff:
+            if self.curve_motion == 'jump': # 1 second
+                k_motion = curve.bisect_x(int(self.x_min) + 1.0) - curve.start
+            else: # smooth
+                k_motion = curve.bisect_x(curve.x_last - self.x_diff) - curve.start + 1
 
-        if self.curves_y_max[c] == None:
-            self.curves_y_max[c] = y
-        else:
-            self.curves_y_max[c] = max(self.curves_y_max[c], y)
-
-        if len(self.curves_x[c]) > 0:
-            if (self.curves_x[c][-1] - self.curves_x[c][0]) >= self.x_diff:
-                if self.curve_motion == 'jump': # 1 second
-                    k_motion = bisect.bisect_left(self.curves_x[c], int(self.x_min) + 1.0)
-                else: # smooth
-                    k_motion = 1
-
-                self.curves_x[c] = self.curves_x[c][k_motion:]
-                self.curves_y[c] = self.curves_y[c][k_motion:]
-                self.curves_jump[c] = self.curves_jump[c][k_motion:]
-
-                if len(self.curves_x[c]) > 0:
-                    self.curves_x_min[c] = self.curves_x[c][0]
-                    self.curves_x_max[c] = self.curves_x[c][-1]
-                else:
-                    self.curves_x_min[c] = None
-                    self.curves_x_max[c] = None
+            if k_motion <= 0:
+                break
 
-                if len(self.curves_y[c]) > 0:
-                    self.curves_y_min[c] = min(self.curves_y[c])
-                    self.curves_y_max[c] = max(self.curves_y[c])
-                else:
-                    self.curves_y_min[c] = None
-                    self.curves_y_max[c] = None
+            curve.remove_first(k_motion)
+            removed = True
 
-                self.update_x_min_max_y_min_max()
+            if len(curve) == 0:
+                break
 
-                self.partial_update_enabled = True
-            else:
-                self.curves_x_max[c] = self.curves_x[c][-1]
-                self.x_max = max([curve_x_max for curve_x_max in self.curves_x_max if curve_x_max != None])
+            self.curves_x_min[c] = curve.x_first
+            self.x_min = min([curve_x_min for curve_x_min in self.curves_x_min if curve_x_min != None])
+
+        self.curves_x_min[c] = curve.x_first
+        self.curves_x_max[c] = curve.x_last
+        self.curves_y_min[c] = curve.y_min
+        self.curves_y_max[c] = curve.y_max
+
+        if removed:
+            self.update_x_min_max_y_min_max()
+
+            self.partial_update_enabled = True
+        else:
+            self.x_max = max([curve_x_max for curve_x_max in self.curves_x_max if curve_x_max != None])
 
         if self.curves_visible[c] and (last_y_min != self.y_min or last_y_max != self.y_max):
             self.update_y_min_max_scale()
 
         if self.partial_update_enabled:
-            self.curve_area.update(self.curve_area.width() - self.partial_update_width, 0, self.partial_update_width, self.curve_area.height())
+            # cover all new points, the partial update width already includes some margin
+            update_width = self.partial_update_width + math.ceil((xs[-1] - xs[0]) * self.curve_area.width() / self.x_diff)
+
+            self.curve_area.update(self.curve_area.width() - update_width, 0, update_width, self.curve_area.height())
         else:
             self.curve_area.update()
 
@@ -983,10 +1748,18 @@ class Plot(QWidget):
         last_y_min = self.y_min
         last_y_max = self.y_max
 
-        self.curves_x[c] = x
-        self.curves_y[c] = y
-        self.curves_jump[c] = [False] * len(x)
+        self.curves[c].set(x, y)
         self.curves_jump_pending[c] = False
+        self.curves_generation += 1 # forces a full redraw of the curve area
+
+        if self.history_enabled:
+            # plots fed by set_data (e.g. spectra) replace their data as a whole
+            # instead of growing over time, a history view would stay empty
+            self.history_enabled = False
+            self.histories = None
+
+            self.reset_history_view()
+            self.curve_area.setToolTip('')
 
         self.curves_x_min[c] = x_min
         self.curves_x_max[c] = x_max
@@ -1056,6 +1829,9 @@ class Plot(QWidget):
         if self.y_min_external != None and self.y_max_external != None:
             y_min = self.y_min_external
             y_max = self.y_max_external
+        elif self.history_view != None and self.history_y_min != None and self.history_y_max != None:
+            y_min = self.history_y_min
+            y_max = self.history_y_max
         elif self.y_min == None or self.y_max == None:
             y_min = 0.0
             y_max = 0.0
@@ -1141,6 +1917,89 @@ class Plot(QWidget):
         self.update()
         self.curve_area.update()
 
+    # returns the x-range covered by the history of all curves, or None
+    def get_history_x_range(self):
+        if self.histories == None:
+            return None
+
+        x_firsts = [history.x_first for history in self.histories if history.x_first != None]
+        x_lasts = [history.x_last for history in self.histories if history.x_last != None]
+
+        if len(x_firsts) == 0 or len(x_lasts) == 0:
+            return None
+
+        return min(x_firsts), max(x_lasts)
+
+    def set_history_view(self, x_min, x_diff):
+        x_range = self.get_history_x_range()
+
+        if x_range == None:
+            return
+
+        x_first, x_last = x_range
+        x_diff = max(min(x_diff, max(x_last - x_first, self.x_diff)), HISTORY_X_DIFF_MIN)
+        x_min = max(min(x_min, x_last - x_diff), x_first)
+
+        self.history_view = (x_min, x_diff)
+
+        self.update_history_y_min_max()
+        self.update()
+        self.curve_area.update()
+
+    def reset_history_view(self):
+        if self.history_view == None:
+            return
+
+        self.history_view = None
+        self.history_y_min = None
+        self.history_y_max = None
+
+        self.update_y_min_max_scale()
+        self.update()
+        self.curve_area.update()
+
+    # zooms the visible x-range by factor, keeping x_anchor at the same position
+    def zoom_history_view(self, factor, x_anchor):
+        x_min, x_diff = self.get_x_view()
+
+        self.set_history_view(x_anchor - (x_anchor - x_min) * factor, x_diff * factor)
+
+    def pan_history_view(self, dx):
+        x_min, x_diff = self.get_x_view()
+
+        self.set_history_view(x_min + dx, x_diff)
+
+    def update_history_y_min_max(self):
+        if self.history_view == None:
+            return
+
+        x_min, x_diff = self.history_view
+        y_mins = []
+        y_maxs = []
+
+        for c, history in enumerate(self.histories):
+            if not self.curves_visible[c]:
+                continue
+
+            y_min, y_max = history.get_y_min_max(x_min, x_min + x_diff, self.curve_area.width())
+
+            if y_min != None and y_max != None:
+                y_mins.append(y_min)
+                y_maxs.append(y_max)
+
+        last_y_min = self.history_y_min
+        last_y_max = self.history_y_max
+
+        if len(y_mins) > 0:
+            self.history_y_min = min(y_mins)
+            self.history_y_max = max(y_maxs)
+        else:
+            self.history_y_min = None
+            self.history_y_max = None
+
+        if last_y_min != self.history_y_min or last_y_max != self.history_y_max:
+            self.update_y_min_max_scale()
+
     def show_curve(self, c, show):
         if self.curves_visible[c] == show:
             return
@@ -1151,6 +2010,7 @@ class Plot(QWidget):
         self.curves_visible[c] = show
 
         self.update_x_min_max_y_min_max()
+        self.update_history_y_min_max()
 
         if last_y_min != self.y_min or last_y_max != self.y_max:
             self.update_y_min_max_scale()
@@ -1164,9 +2024,7 @@ class Plot(QWidget):
         if not hasattr(self, 'curves_visible'):
             self.curves_visible = [True]*count # per curve visibility
 
-        self.curves_x = [[] for i in range(count)] # per curve x values
-        self.curves_y = [[] for i in range(count)] # per curve y values
-        self.curves_jump = [[] for i in range(count)] # per curve jump values
+        self.curves = [CurveData() for i in range(count)] # per curve x, y and jump values
         self.curves_jump_pending = [False] * count # per curve jump pending
         self.curves_x_min = [None] * count # per curve minimum x value
         self.curves_x_max = [None] * count # per curve maximum x value
@@ -1178,6 +2036,16 @@ class Plot(QWidget):
         self.y_max = None # maximum y value over all curves
         self.y_type = None
         self.partial_update_enabled = False
+        self.curves_generation += 1 # forces a full redraw of the curve area
+
+        if self.history_enabled:
+            self.histories = [CurveHistory() for i in range(count)] # per curve long-term history
+        else:
+            self.histories = None
+
+        self.history_view = None
+        self.history_y_min = None
+        self.history_y_max = None
 
         self.update()
         self.curve_area.update()
@@ -1219,7 +2087,8 @@ class PlotWidget(QWidget):
                  x_scale_skip_last_tick=True,
                  y_resolution=None,
                  y_scale_shrinkable=True,
-                 multi_threading=False):
+                 multi_threading=False,
+                 history=True):
         super().__init__(parent)
 
         assert update_interval < 0.5, update_interval
@@ -1249,7 +2118,7 @@ class PlotWidget(QWidget):
         self.plot = Plot(self, x_scale_title_text, y_scale_title_text, x_scale_skip_last_tick,
                          self.curve_configs, x_scale_visible, y_scale_visible, curve_outer_border_visible,
                          curve_motion, canvas_color, curve_start, x_diff, y_diff_min,
-                         y_scale_shrinkable, update_interval)
+                         y_scale_shrinkable, update_interval, history)
         self.set_x_scale = self.plot.set_x_scale
         self.set_fixed_y_scale = self.plot.set_fixed_y_scale
         self.key = key
@@ -1397,15 +2266,7 @@ class PlotWidget(QWidget):
 
             v2layout.addLayout(self.moving_average_layout)
 
-        self.timer = plot_timers.get(self.update_interval)
-
-        if self.timer == None:
-            self.timer = PlotTimer(self.update_interval)
-            self.timer.start()
-
-            plot_timers[self.update_interval] = self.timer
-
-        self.timer.timeout.connect(self.add_new_data)
+        get_plot_clock().add(self)
 
     def update_y_scale_sibling(self, plot_widget): # internal
         total_unpadded_width_diff = plot_widget.plot.y_scale.total_unpadded_width - self.plot.y_scale.total_unpadded_width
@@ -1478,7 +2339,15 @@ class PlotWidget(QWidget):
 
         self._stop = stop
 
-        if not stop:
+        # the clock interval only depends on the running plot widgets
+        get_plot_clock().update_timer()
+
+        if stop:
+            # the plot clock doesn't tick paused plot widgets, so remember the
+            # stop-timestamp here already
+            if self.stop_timestamp == None:
+                self.stop_timestamp = self.last_timestamp[0]
+        else:
             self.add_new_data()
 
     # internal
@@ -1501,15 +2370,12 @@ class PlotWidget(QWidget):
                 history = curve_config.value_wrapper.history
                 curve_config.value_wrapper.history = []
 
+            xs = []
+            ys = []
+
             for timestamp, value in history:
                 assert value != None
 
-                if len(self.key_items) > 0 and self.key_has_values:
-                    if curve_config.title == '':
-                        self.key_items[i].setText(curve_config.value_formatter(value))
-                    else:
-                        self.key_items[i].setText(curve_config.title + ': ' + curve_config.value_formatter(value))
-
                 if self.zero_timestamp == None:
                     # FIXME: in a multi curve plot the zero-timestamp should be
                     #        the min or max of all curves instead of the first one,
@@ -1526,12 +2392,21 @@ class PlotWidget(QWidget):
                 if plot_timestamp < 0:
                     continue
 
-                self.plot.add_data(i, plot_timestamp, value)
+                xs.append(plot_timestamp)
+                ys.append(value)
 
                 self.last_timestamp[i] = timestamp
                 self.last_plot_timestamp[i] = plot_timestamp
                 self.last_value[i] = value
 
+            if len(history) > 0 and len(self.key_items) > 0 and self.key_has_values:
+                value = history[-1][1]
+
+                if curve_config.title == '':
+                    self.key_items[i].setText(curve_config.value_formatter(value))
+                else:
+                    self.key_items[i].setText(curve_config.title + ': ' + curve_config.value_formatter(value))
+
             # don't allow a gap of more than 0.5 seconds in the data to ensure proper curve motion
             while self.last_plot_timestamp[i] != None and \
                   self.stop_timestamp == None and \
@@ -1540,7 +2415,11 @@ class PlotWidget(QWidget):
                 self.last_plot_timestamp[i] += self.update_interval
 
                 # FIXME: maybe render this fake data in a different style/color
-                self.plot.add_data(i, self.last_plot_timestamp[i], self.last_value[i])
+                xs.append(self.last_plot_timestamp[i])
+                ys.append(self.last_value[i])
+
+            # add all new data of this tick at once
+            self.plot.add_data_many(i, xs, ys)
 
     # internal
     def clear_clicked(self):
@@ -29,6 +29,8 @@ from brickv.async_call import async_call
 from brickv.utils import get_main_window
 
 class COMCUPluginBase(PluginBase):
+    lazy_construction = True
+
     def __init__(self, device_class, ipcon, device_info, override_base_name=None):
         super().__init__(device_class, ipcon, device_info, override_base_name)
 
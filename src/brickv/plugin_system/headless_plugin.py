@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+brickv (Brick Viewer)
+
+headless_plugin.py: Stand-in for a plugin whose widgets are not constructed
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public
+License along with this program; if not, write to the
+Free Software Foundation, Inc., 59 Temple Place - Suite 330,
+Boston, MA 02111-1307, USA.
+"""
+
+from brickv.plugin_system.plugin_base import PluginBase
+from brickv.plugin_system.comcu_plugin_base import COMCUPluginBase
+from brickv.plugin_system.tng_plugin_base import TNGPluginBase
+from brickv.utils import get_main_window
+from brickv.infos import inventory
+
+class HeadlessPlugin:
+    """
+    Takes the place of a plugin in its DeviceInfo until the plugin widget is
+    constructed by the MainWindow, and again after it got torn down. Provides
+    the device object and the health metrics of the plugin class, but no
+    widgets. Starting and stopping does nothing, there is nothing to show.
+    """
+
+    headless = True
+    plugin_state = PluginBase.PLUGIN_STATE_STOPPED
+
+    def __init__(self, plugin_class, device_class, ipcon, device_info, device=None, error_count=0):
+        self.plugin_class = plugin_class
+        self.device_class = device_class
+        self.ipcon = ipcon
+        self.device_info = device_info
+        self.uid = device_info.uid
+        self.hardware_version = device_info.hardware_version
+        self.firmware_version = device_info.firmware_version_installed
+        self.error_count = error_count
+        self.has_comcu = issubclass(plugin_class, COMCUPluginBase)
+        self.is_tng = issubclass(plugin_class, TNGPluginBase)
+        self.base_name = device_class.DEVICE_DISPLAY_NAME
+
+        if device != None:
+            self.device = device
+        else:
+            self.device = device_class(self.uid, ipcon)
+
+        # same name as the plugin would get, the tree view shows it
+        if plugin_class.is_hardware_version_relevant(self):
+            self.name = '{0} {1}.{2}'.format(self.base_name,
+                                             self.hardware_version[0],
+                                             self.hardware_version[1])
+        else:
+            self.name = self.base_name
+
+        self.device_info.plugin = self
+        self.device_info.name = self.name
+        self.device_info.url_part = device_class.DEVICE_URL_PART
+
+        # replace the callback of a torn down plugin
+        if self.device_info.tab_window is not None:
+            self.device_info.tab_window.add_callback_post_tab(lambda tab_window, tab_index: self.device_info_changed(self.device_info.uid), 'plugin_base_device_info_changed')
+
+        inventory.infos_changed.connect(self.device_infos_changed)
+
+    def device_infos_changed(self, uids):
+        if self.device_info.uid in uids:
+            self.device_info_changed(self.device_info.uid)
+
+    def device_info_changed(self, uid):
+        if uid != self.device_info.uid:
+            return
+
+        if self.device_info.tab_window is None:
+            return
+
+        self.hardware_version = self.device_info.hardware_version
+        self.firmware_version = self.device_info.firmware_version_installed
+
+        # only the tab button exists, the rest of the tab is constructed with the plugin
+        if self.device_info.firmware_version_installed < self.device_info.firmware_version_latest:
+            if self.device_info.flashable_like_bricklet:
+                clicked = lambda: get_main_window().show_bricklet_update(self.device_info.connected_uid, self.device_info.position)
+            else:
+                clicked = lambda: get_main_window().show_brick_update(self.device_info.url_part)
+
+            self.device_info.tab_window.show_update_tab_button('Update available', clicked)
+        else:
+            self.device_info.tab_window.hide_update_tab_button()
+
+    def start_plugin(self):
+        pass
+
+    def stop_plugin(self):
+        pass
+
+    def pause_plugin(self):
+        pass
+
+    def resume_plugin(self):
+        pass
+
+    # the device object might be taken over by the constructed plugin at
+    # this point, therefore leave its registered callbacks alone
+    def destroy_plugin(self):
+        inventory.infos_changed.disconnect(self.device_infos_changed)
+
+    @property
+    def async_lane(self):
+        return self.device_info.uid
+
+    def increase_error_count(self):
+        self.error_count += 1
+
+    def get_health_metric_names(self):
+        return self.plugin_class.get_health_metric_names(self)
+
+    def get_health_metric_values(self):
+        return self.plugin_class.get_health_metric_values(self)
@@ -41,6 +41,13 @@ class PluginBase(QWidget):
     PLUGIN_STATE_RUNNING = 1
     PLUGIN_STATE_PAUSED = 2
 
+    headless = False
+
+    # if True, the MainWindow constructs the plugin when its tab is shown or
+    # detached for the first time and a HeadlessPlugin takes its place before
+    # and after that
+    lazy_construction = False
+
     def __init__(self, device_class, ipcon, device_info, override_base_name=None):
         super().__init__()
 
@@ -64,7 +71,15 @@ class PluginBase(QWidget):
 
         if device_class is not None:
             self.base_name = self.device_class.DEVICE_DISPLAY_NAME
-            self.device = self.device_class(self.uid, self.ipcon)
+
+            # take over the device object of the HeadlessPlugin. a second device
+            # object for the same UID would replace it in the IP Connection
+            if self.device_info.plugin is not None and self.device_info.plugin.headless and \
+               self.device_info.plugin.device_class == device_class:
+                self.device = self.device_info.plugin.device
+                self.error_count = self.device_info.plugin.error_count
+            else:
+                self.device = self.device_class(self.uid, self.ipcon)
         else:
             self.base_name = 'Unnamed'
             self.device = None
@@ -89,7 +104,11 @@ class PluginBase(QWidget):
         self.device_info.name = self.name
         self.device_info.url_part = self.get_url_part()
 
-        inventory.info_changed.connect(self.device_info_changed)
+        inventory.infos_changed.connect(self.device_infos_changed)
+
+    def device_infos_changed(self, uids):
+        if self.device_info.uid in uids:
+            self.device_info_changed(self.device_info.uid)
 
     def device_info_changed(self, uid):
         if uid != self.device_info.uid:
@@ -213,7 +232,7 @@ class PluginBase(QWidget):
 
         # Disconnect from infos_changed before destroying the widgets, because
         # self.device_infos_changed accesses the widgets.
-        inventory.info_changed.disconnect(self.device_info_changed)
+        inventory.infos_changed.disconnect(self.device_infos_changed)
 
         # disconnect all signals to ensure that callbacks that already emitted
         # a signal don't get delivered anymore after this point
@@ -309,6 +328,11 @@ class PluginBase(QWidget):
     def is_hardware_version_relevant(self):
         return False
 
+    # async_call executes the calls of plugin methods in the lane of the device
+    @property
+    def async_lane(self):
+        return self.device_info.uid
+
     def get_health_metric_names(self):
         if self.device_info.kind == 'brick':
             return ['SPITFP ACK Checksum Errors', 'SPITFP Message Checksum Errors', 'SPITFP Frame Errors', 'SPITFP Overflow Errors']
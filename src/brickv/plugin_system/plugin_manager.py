@@ -23,23 +23,69 @@ Boston, MA 02111-1307, USA.
 """
 
 import sys
+import importlib
 
 from brickv.plugin_system.error import Error
 from brickv.plugin_system.unknown import Unknown
-from brickv.plugin_system.plugins import device_classes
+from brickv.plugin_system.headless_plugin import HeadlessPlugin
+from brickv.bindings.ip_connection import Device
+from brickv.plugin_system.plugins import device_modules
 
 class PluginManager:
     def __init__(self):
-        self.plugins = device_classes
+        self.device_modules = device_modules # by device identifier
+        self.device_classes = {} # by device identifier, filled on first use
+
+    # imports the plugin module for the device identifier on first use,
+    # returns None if there is no plugin for it
+    def get_device_class(self, device_identifier):
+        if device_identifier not in self.device_classes:
+            module_name = self.device_modules.get(device_identifier)
+
+            if module_name != None:
+                self.device_classes[device_identifier] = importlib.import_module(module_name).device_class
+            else:
+                self.device_classes[device_identifier] = None
+
+        return self.device_classes[device_identifier]
 
     def create_plugin_instance(self, device_identifier, ipcon, device_info):
-        for plugin in self.plugins:
-            if plugin.has_device_identifier(device_identifier):
-                try:
-                    return plugin(ipcon, device_info)
-                except:
-                    # Report the exception without unwinding the call stack.
-                    sys.excepthook(*sys.exc_info())
-                    return Error(ipcon, device_info)
-
-        return Unknown(ipcon, device_info)
+        try:
+            plugin = self.get_device_class(device_identifier)
+
+            if plugin == None:
+                return Unknown(ipcon, device_info)
+
+            return plugin(ipcon, device_info)
+        except:
+            # Report the exception without unwinding the call stack.
+            sys.excepthook(*sys.exc_info())
+            return Error(ipcon, device_info)
+
+    # the plugin class does not expose its binding class, but its module
+    # imports it. returns None if it cannot be found
+    def get_binding_class(self, plugin, device_identifier):
+        for value in vars(sys.modules[plugin.__module__]).values():
+            if isinstance(value, type) and issubclass(value, Device) and \
+               getattr(value, 'DEVICE_IDENTIFIER', None) == device_identifier:
+                return value
+
+        return None
+
+    # returns a HeadlessPlugin if the plugin supports lazy construction,
+    # otherwise the plugin is constructed right away
+    def create_headless_plugin_instance(self, device_identifier, ipcon, device_info):
+        try:
+            plugin = self.get_device_class(device_identifier)
+
+            if plugin != None and plugin.lazy_construction:
+                binding = self.get_binding_class(plugin, device_identifier)
+
+                if binding != None:
+                    return HeadlessPlugin(plugin, binding, ipcon, device_info)
+        except:
+            # Report the exception without unwinding the call stack.
+            sys.excepthook(*sys.exc_info())
+            return Error(ipcon, device_info)
+
+        return self.create_plugin_instance(device_identifier, ipcon, device_info)
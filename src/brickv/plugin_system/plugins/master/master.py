@@ -237,7 +237,8 @@ class Master(PluginBase, Ui_Master):
             async_call(self.master.is_wifi2_present, None, functools.partial(is_present_async, self.master.EXTENSION_TYPE_WIFI2, 'WIFI Extension 2.0'), self.increase_error_count)
             async_call(self.master.get_connection_type, None, get_connection_type_async, self.increase_error_count)
 
-        async_call(lambda: None, None, get_main_window().update_tree_view, None)
+        # executed in the lane of the master, so after the queries above returned
+        async_call(lambda: None, None, get_main_window().update_tree_view, None, lane=self.master.uid_string)
 
     def get_wifi2_firmware_version_async(self, ext, version):
         self.wifi2_firmware_version = version
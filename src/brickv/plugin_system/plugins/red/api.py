@@ -275,6 +275,10 @@ class REDSession(QObject):
     @property
     def session_id(self): return self._session_id
 
+    # async_call executes calls of the same RED Brick in order
+    @property
+    def async_lane(self): return self._brick.uid_string
+
 
 def _attach_or_release(session, object_class, object_id, extra_object_ids_to_release_on_error=None, extra_parameters=None):
     if extra_object_ids_to_release_on_error == None:
@@ -349,6 +353,9 @@ class REDObject(QObject):
     def __repr__(self):
         return '<REDObject object_id: {0}>'.format(self.__object_id)
 
+    @property
+    def async_lane(self): return self._session.async_lane
+
     def _initialize(self):
         raise NotImplementedError()
 
@@ -253,7 +253,7 @@ class ProgramInfoFiles(QWidget, Ui_ProgramInfoFiles):
                 self.label_error.setVisible(True)
                 self.refresh_files_done()
 
-            async_call(expand_async, result.stdout, cb_expand_success, cb_expand_error)
+            async_call(expand_async, result.stdout, cb_expand_success, cb_expand_error, lane=expand_async)
 
         self.refresh_in_progress = True
         self.update_main_ui_state()
@@ -273,7 +273,7 @@ class ProgramInfoMain(QWidget, Ui_ProgramInfoMain):
         self.program_refresh_in_progress = True
         self.update_ui_state()
 
-        async_call(refresh_async, None, cb_success, cb_error)
+        async_call(refresh_async, None, cb_success, cb_error, lane=self.session.async_lane)
 
     def update_ui_state(self):
         any_refresh_in_progress = self.program_refresh_in_progress or \
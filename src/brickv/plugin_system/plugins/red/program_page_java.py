@@ -262,7 +262,7 @@ class ProgramPageJava(ProgramPage, Ui_ProgramPageJava):
                         self.label_main_class_error.setVisible(True)
                         done()
 
-                    async_call(expand_async, result.stdout, cb_expand_success, cb_expand_error)
+                    async_call(expand_async, result.stdout, cb_expand_success, cb_expand_error, lane=expand_async)
 
                 script_instance_ref[0] = self.wizard().script_manager.execute_script('java_main_classes', cb_java_main_classes,
                                                                                      [self.bin_directory], max_length=1024*1024,
@@ -317,7 +317,7 @@ class ProgramPageJava(ProgramPage, Ui_ProgramPageJava):
 
                 self.combo_main_class.setEnabled(False)
 
-                async_call(get_main_classes_async, uploads, cb_main_classes, cb_main_classes_error)
+                async_call(get_main_classes_async, uploads, cb_main_classes, cb_main_classes_error, lane=get_main_classes_async)
 
         # if a program exists then this page is used in an edit wizard
         if program != None:
@@ -234,7 +234,7 @@ class RED(PluginBase, Ui_RED):
         self.label_discovering.setText('Discovering Image Version...')
         self.widget_discovering.show()
 
-        async_call(read_image_version_async, REDFile(self.session), cb_success, None)
+        async_call(read_image_version_async, REDFile(self.session), cb_success, None, lane=self.session.async_lane)
 
     def bindings_version_success(self, result):
         okay, message = check_script_result(result)
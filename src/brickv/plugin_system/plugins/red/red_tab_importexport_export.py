@@ -162,7 +162,7 @@ class REDTabImportExportExport(QWidget, Ui_REDTabImportExportExport):
         self.update_ui_state()
         self.tree_programs.invisibleRootItem().takeChildren()
 
-        async_call(refresh_async, None, cb_success, cb_error, pass_exception_to_error_callback=True)
+        async_call(refresh_async, None, cb_success, cb_error, pass_exception_to_error_callback=True, lane=self.session.async_lane)
 
     def export_archive(self):
         #FIXME: fromTime_t is obsolete: https://doc.qt.io/qt-5/qdatetime-obsolete.html#toTime_t
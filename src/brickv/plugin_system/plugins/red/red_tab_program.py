@@ -179,7 +179,7 @@ class REDTabProgram(REDTab, Ui_REDTabProgram):
             self.stacked_container.removeWidget(self.stacked_container.widget(1))
             QApplication.processEvents()
 
-        async_call(refresh_async, None, cb_success, cb_error)
+        async_call(refresh_async, None, cb_success, cb_error, lane=self.session.async_lane)
 
     def refresh_program_name(self, program):
         for i in range(self.tree_programs.topLevelItemCount()):
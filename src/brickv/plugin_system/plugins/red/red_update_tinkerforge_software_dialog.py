@@ -449,7 +449,8 @@ Please make sure that your internet connection is working.'
                    (name, url),
                    self.download_update_s_async_cb,
                    lambda e: self.download_update_f_async_cb(name, e),
-                   pass_exception_to_error_callback=True)
+                   pass_exception_to_error_callback=True,
+                   lane=url) # downloads don't involve the RED Brick, run them concurrently
 
     def check_update_available(self, update_info):
         if not self.dialog_session:
@@ -541,28 +541,28 @@ class Servo(PluginBase, Ui_Servo):
             return
 
     def position_changed(self, value):
-        try:
-            self.servo.set_position(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_position, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_position, servo))
 
     def velocity_changed(self, value):
-        try:
-            self.servo.set_velocity(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_velocity, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_velocity, servo))
 
     def acceleration_changed(self, value):
-        try:
-            self.servo.set_acceleration(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_acceleration, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_acceleration, servo))
 
     def period_changed(self, value):
-        try:
-            self.servo.set_period(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_period, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_period, servo))
 
     def pulse_width_spin_finished(self):
         try:
@@ -330,22 +330,23 @@ class ServoV2(COMCUPluginBase, Ui_ServoV2):
             return
 
     def position_changed(self, value):
-        try: 
-            self.servo.set_position(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_position, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_position, servo))
 
     def motion_changed(self, _):
-        try:
-            self.servo.set_motion_configuration(self.selected_servo(), self.velocity_spin.value(), self.acceleration_spin.value(), self.deceleration_spin.value())
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_motion_configuration,
+                   (servo, self.velocity_spin.value(), self.acceleration_spin.value(), self.deceleration_spin.value()),
+                   None, None, coalesce_key=(self.servo.set_motion_configuration, servo))
 
     def period_changed(self, value):
-        try:
-            self.servo.set_period(self.selected_servo(), value)
-        except ip_connection.Error:
-            return
+        servo = self.selected_servo()
+
+        async_call(self.servo.set_period, (servo, value), None, None,
+                   coalesce_key=(self.servo.set_period, servo))
 
     def pulse_width_spin_finished(self):
         try:
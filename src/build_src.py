@@ -29,6 +29,7 @@ if (sys.hexversion & 0xFF000000) != 0x03000000:
     sys.exit(1)
 
 import os
+import re
 import subprocess
 
 basedir = os.path.dirname(os.path.realpath(__file__))
@@ -62,11 +63,10 @@ for dirpath, dirnames, filenames in os.walk(brickv):
 
         subprocess.check_call([sys.executable, 'pyuic5-fixed.py', '-o', out_file, in_file], cwd=basedir)
 
-# build plugins list
-imports_all = []
-imports_released = []
-device_classes_all = []
-device_classes_released = []
+# build plugins registry. the plugin modules are only imported by the
+# PluginManager when a device with their identifier is enumerated
+device_modules_all = []
+device_modules_released = []
 plugins = os.path.join(basedir, 'brickv', 'plugin_system', 'plugins')
 bindings = os.path.join(basedir, 'brickv', 'bindings')
 
@@ -85,28 +85,32 @@ for plugin in sorted(os.listdir(plugins)):
     for file in [brick_binding, bricklet_binding, tng_binding]:
         if os.path.isfile(file):
             with open(file, 'r') as f:
-                released = not '#### __DEVICE_IS_NOT_RELEASED__ ####' in f.read()
-                break
+                content = f.read()
+
+            released = not '#### __DEVICE_IS_NOT_RELEASED__ ####' in content
+            match = re.search(r'^    DEVICE_IDENTIFIER = (\d+)$', content, re.MULTILINE)
+
+            if match == None:
+                raise Exception('No device identifier found in bindings of plugin ' + plugin)
+
+            device_identifier = int(match.group(1))
+            break
     else:
         raise Exception('No bindings found corresponding to plugin ' + plugin)
 
-    import_ = 'from brickv.plugin_system.plugins.{0} import device_class as {0}\n'.format(plugin)
-    device_class = '    {0},\n'.format(plugin)
+    device_module = "    {0}: 'brickv.plugin_system.plugins.{1}',\n".format(device_identifier, plugin)
 
-    imports_all.append(import_)
-    device_classes_all.append(device_class)
+    device_modules_all.append(device_module)
 
     if released:
-        imports_released.append(import_)
-        device_classes_released.append(device_class)
+        device_modules_released.append(device_module)
 
-for path, imports, device_classes in [(os.path.join(plugins, '__init__.py'), imports_all, device_classes_all),
-                                      (os.path.join(basedir, 'released_plugins.py'), imports_released, device_classes_released)]:
+for path, device_modules in [(os.path.join(plugins, '__init__.py'), device_modules_all),
+                             (os.path.join(basedir, 'released_plugins.py'), device_modules_released)]:
     print('building ' + os.path.relpath(path, basedir))
 
     with open(path, 'w') as f:
-        f.writelines(imports)
-        f.write('\n')
-        f.write('device_classes = [\n')
-        f.writelines(device_classes)
-        f.write(']\n')
+        f.write('# device identifier -> plugin module, the module provides device_class\n')
+        f.write('device_modules = {\n')
+        f.writelines(device_modules)
+        f.write('}\n')